@@ -24,3 +24,4 @@ set_property PORT.TXRATE 0 [get_hw_sio_links localhost:3121/xilinx_tcf/Digilent/
 commit_hw_sio [get_hw_sio_links localhost:3121/xilinx_tcf/Digilent/210308A1D0A7/0_1_0_0/IBERT/Quad_127/MGT_X0Y15/TX->localhost:3121/xilinx_tcf/Digilent/210308A1D0A7/0_1_0_0/IBERT/Quad_127/MGT_X0Y15/RX]
 
 close_hw
+unset -nocomplain ptcs_hw_target_open
@@ -3,12 +3,16 @@
 
 # No Parameters
 
-# connect to VCU108
-open_hw
-connect_hw_server -url localhost:3121
-current_hw_target [get_hw_targets */xilinx_tcf/Digilent/210308A1D0A7]
-set_property PARAM.FREQUENCY 15000000 [get_hw_targets */xilinx_tcf/Digilent/210308A1D0A7]
-open_hw_target
+# connect to VCU108, unless an earlier queue already did in this Tcl session and the hardware manager is still
+# connected to its server (a script may have closed it without clearing ptcs_hw_target_open)
+if {![info exists ptcs_hw_target_open] || [catch {current_hw_server}]} {
+    open_hw
+    connect_hw_server -url localhost:3121
+    current_hw_target [get_hw_targets */xilinx_tcf/Digilent/210308A1D0A7]
+    set_property PARAM.FREQUENCY 15000000 [get_hw_targets */xilinx_tcf/Digilent/210308A1D0A7]
+    open_hw_target
+    set ptcs_hw_target_open 1
+}
 current_hw_device [get_hw_devices xcvu095_0]
 refresh_hw_device -update_hw_probes false [lindex [get_hw_devices xcvu095_0] 0]
 
@@ -0,0 +1,119 @@
+"""
+Checks that starting the headless queue runner stays fast, by importing it in a fresh interpreter with -X importtime.
+Fails (exit code 1) if the imports take longer than the budget, or if any of the heavy libraries that should only be
+loaded on first use (the GUI toolkit, plotting, numpy, vendor VISA/COM libraries, jsonschema) is imported at startup.
+
+    python -m src.Benchmarks.ImportTimeBudget [--budget 150] [--top 15]
+
+tests/test_import_time.py runs the same check with the default budget as part of the test suite.
+
+Run it with --statement to audit the startup of something else, the GUI for example:
+
+    python -m src.Benchmarks.ImportTimeBudget --statement "import src.GUI.GuiMainApp" --allow wx --budget 2000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from src.GUI.Util.CONSTANTS import PROJ_DIR
+
+# What RunSavedQueueMain imports before it runs the first queue
+HEADLESS_STARTUP = "import src.GUI.RunSavedQueueMain; import src.GUI.Application.SystemConfigManager"
+
+# Packages that must not be imported by HEADLESS_STARTUP
+DEFERRED_PACKAGES = ("wx", "matplotlib", "numpy", "pyvisa", "win32com", "pythoncom", "jsonschema", "pyarrow")
+
+# Milliseconds the imports of HEADLESS_STARTUP may take, with plenty of room for slow machines
+DEFAULT_BUDGET = 150.0
+
+
+def measure_imports(statement, python=sys.executable):
+    """
+    Run statement in a new interpreter with -X importtime
+    :param statement: the python code to run
+    :param python: the interpreter to run it with
+    :return: a list of (module, depth, self milliseconds, cumulative milliseconds) in the order they finished
+    importing, leaving out the modules the interpreter imports before running any code
+    """
+    environment = dict(os.environ, PYTHONPATH=PROJ_DIR)
+    process = subprocess.run([python, "-X", "importtime", "-c", statement], cwd=PROJ_DIR, env=environment,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if process.returncode != 0:
+        raise RuntimeError("Could not run " + statement + ":\n" + process.stderr)
+
+    startup = set()
+    if statement != "pass":
+        startup = {module for module, _, _, _ in measure_imports("pass", python)}
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():
+            continue  # the header line
+        module = name.strip()
+        if module in startup:
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((module, depth, int(self_time) / 1000.0, int(cumulative) / 1000.0))
+    return imports
+
+
+def check_budget(statement=HEADLESS_STARTUP, budget=DEFAULT_BUDGET, deferred=DEFERRED_PACKAGES, repeat=5):
+    """
+    :param statement: the python code whose imports are measured
+    :param budget: the milliseconds the imports may take
+    :param deferred: the packages that must not be imported
+    :param repeat: the number of times to measure, the fastest is kept so a busy machine does not fail the check
+    :return: a dictionary with the time the imports took, the slowest imports, the deferred packages that were
+    imported and whether the check passed
+    """
+    runs = [measure_imports(statement) for _ in range(repeat)]
+    totals = [sum(self_time for _, _, self_time, _ in imports) for imports in runs]
+    fastest = runs[totals.index(min(totals))]
+    loaded = sorted({module.split(".")[0] for module, _, _, _ in fastest} & set(deferred))
+    return {
+        "statement": statement,
+        "milliseconds": min(totals),
+        "budget": budget,
+        "modules": len(fastest),
+        "slowest": [{"module": module, "self": self_time, "cumulative": cumulative}
+                    for module, _, self_time, cumulative in sorted(fastest, key=lambda i: -i[2])],
+        "deferred_imported": loaded,
+        "passed": min(totals) <= budget and not loaded,
+    }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Check the import time of the headless queue runner")
+    parser.add_argument("--statement", default=HEADLESS_STARTUP, help="the python code whose imports are measured")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="the milliseconds the imports may take")
+    parser.add_argument("--allow", action="append", default=[],
+                        help="a deferred package that may be imported, can be given more than once")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of measurements, the fastest is kept")
+    parser.add_argument("--top", type=int, default=15, help="the number of slowest imports to report")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    arguments = parser.parse_args(args)
+
+    deferred = [package for package in DEFERRED_PACKAGES if package not in arguments.allow]
+    report = check_budget(arguments.statement, arguments.budget, deferred, arguments.repeat)
+    report["slowest"] = report["slowest"][:arguments.top]
+    if arguments.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print("{:.1f} ms importing {} modules (budget {:.1f} ms)".format(report["milliseconds"], report["modules"],
+                                                                      report["budget"]))
+        print("Slowest imports (self / cumulative ms):")
+        for entry in report["slowest"]:
+            print("    {:8.2f} {:8.2f}  {}".format(entry["self"], entry["cumulative"], entry["module"]))
+        if report["deferred_imported"]:
+            print("Imported at startup but should only load on first use: " + ", ".join(report["deferred_imported"]))
+        print("PASSED" if report["passed"] else "FAILED")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
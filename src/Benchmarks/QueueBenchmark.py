@@ -0,0 +1,357 @@
+"""
+Runs standard queues through the real QueueManager, QueueRunner and spawn_scripts path with every device played by
+a simulated instrument, and reports where the time went as JSON so runs can be compared over time.
+
+    python -m src.Benchmarks.QueueBenchmark [--workload configs|repeat_series|tcl_block] [--output results.json]
+
+Workloads:
+    configs         every bundled Configs/*.json that is not a Tcl test or a sweep, each as its own queue
+    repeat_series   the Fake Voltage Accuracy Test followed by a Repeat Experiment of --repeat-count steps
+    tcl_block       a contiguous block of Tcl tests, with Vivado replaced by a stand in that just reads the script
+"""
+import argparse
+import contextlib
+import functools
+import importlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.GUI.Util import CONSTANTS
+from src.GUI.Util import Globals
+from src.GUI.Util.Timestamp import Timestamp
+
+WORKLOADS = ("configs", "repeat_series", "tcl_block")
+
+# configs that are not run on their own in the configs workload
+TCL_SUFFIX = "(Tcl)"
+REPEAT_EXPERIMENT_NAME = "Repeat Experiment"
+PARAMETER_SWEEP_NAME = "Parameter Sweep"
+REPEAT_BASE_CONFIG = "Fake_Voltage_Accuracy_Test.json"
+REPEAT_PARAMETER = "Levels"
+TCL_BLOCK_CONFIGS = ("Initialize_VCU108_Tcl.json", "Eyescan_Tcl.json", "Close_VCU108_Tcl.json")
+
+# Vivado is replaced by a python process that ignores the Tcl it is sent and only prints the marker the Tcl session
+# waits for after every script
+VIVADO_STAND_IN = ("\"{}\" -c \"import sys; [print(line.split(chr(34))[1], flush=True) for line in sys.stdin "
+                   "if line.startswith('puts ' + chr(34) + 'PTCS_DONE')]\"").format(sys.executable)
+
+# (module, owner attribute path, phase) of every callable that is timed. Times are inclusive, so a phase that calls
+# another timed callable (scripts calling plotting functions for example) includes its time as well
+PHASES = (
+    ("src.GUI.Model.ConfigFile", "ConfigFile.from_json_file", "config_load"),
+    ("src.GUI.RunAConfigFile.DeviceSetup", "DeviceSetup.connect_devices", "device_connect"),
+    ("src.GUI.RunAConfigFileMain", "spawn_scripts", "scripts"),
+    ("src.GUI.Model.ExperimentResultModel", "ExperimentResultsModel.add_scatter_chart", "plotting"),
+    ("src.GUI.Model.ExperimentResultModel", "ExperimentResultsModel.add_heat_map", "plotting"),
+    ("matplotlib.figure", "Figure.savefig", "plotting"),
+    ("src.GUI.Model.ExperimentResultModel", "ExperimentResultsModel.add_csv", "result_saving"),
+    ("src.GUI.Model.ExperimentResultModel", "ExperimentResultsModel.add_csv_dict", "result_saving"),
+    ("src.GUI.Model.ExperimentResultModel", "ExperimentResultsModel.add_json_file_dict", "result_saving"),
+    ("src.GUI.Model.ExperimentResultModel", "ExperimentResultsModel.add_array", "result_saving"),
+    ("src.GUI.Model.ExperimentResultModel", "ExperimentResultsModel.add_image_file", "result_saving"),
+    ("src.GUI.Model.ExperimentResultModel", "ExperimentResultsModel.add_result_file", "result_saving"),
+    ("src.GUI.Application.ResultsManager", "ResultsManager.save_experiment_result", "result_saving"),
+    ("src.GUI.Model.QueueResultModel", "QueueResultsModel.save", "result_saving"),
+    ("src.GUI.Application.QueueRunner", "QueueRunner.run_tcl_tests", "tcl"),
+)
+
+
+class PhaseTimer:
+    """
+    Times every call of the callables it wraps, grouped into named phases
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._restore = []
+        # how many timed calls of each phase are running, only the outermost one is counted so a phase calling
+        # itself (a chart saving its figure) is not counted twice
+        self._depth = {}
+
+    def _record(self, phase, seconds):
+        calls, total = self.phases.get(phase, (0, 0.0))
+        self.phases[phase] = (calls + 1, total + seconds)
+
+    def wrap(self, owner, name, phase):
+        """
+        Replace owner.name with a version that records how long each call takes
+        :param owner: the module or class the callable is an attribute of
+        :param name: the attribute name of the callable
+        :param phase: the phase the time is added to
+        """
+        original = owner.__dict__[name]
+        function = original.__func__ if isinstance(original, (classmethod, staticmethod)) else original
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            self._depth[phase] = self._depth.get(phase, 0) + 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._depth[phase] -= 1
+                if self._depth[phase] == 0:
+                    self._record(phase, time.perf_counter() - start)
+
+        setattr(owner, name, type(original)(timed) if isinstance(original, (classmethod, staticmethod)) else timed)
+        self._restore.append((owner, name, original))
+
+    def wrap_all(self, phases):
+        for module_name, path, phase in phases:
+            owner = importlib.import_module(module_name)
+            *owner_path, name = path.split(".")
+            for attribute in owner_path:
+                owner = getattr(owner, attribute)
+            self.wrap(owner, name, phase)
+
+    def restore(self):
+        for owner, name, original in reversed(self._restore):
+            setattr(owner, name, original)
+        self._restore = []
+
+    def to_dict(self):
+        return {phase: {"calls": calls, "seconds": round(total, 6)}
+                for phase, (calls, total) in sorted(self.phases.items())}
+
+
+class RoundTripCounter:
+    """
+    Keeps every simulated connection made during a workload, and gives the connections the simulation settings of the
+    benchmark when their device in Devices.json does not have any
+    """
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.connections = []
+        self._module = None
+        self._original = None
+
+    def install(self):
+        self._module = importlib.import_module("src.GUI.RunAConfigFile.DeviceSetup")
+        self._original = self._module.open_simulated_connection
+
+        def open_connection(driver_name, address, simulation=None):
+            connection = self._original(driver_name, address, simulation or self.simulation)
+            self.connections.append((driver_name, connection))
+            return connection
+        self._module.open_simulated_connection = open_connection
+
+    def restore(self):
+        self._module.open_simulated_connection = self._original
+
+    def to_dict(self):
+        totals = {"writes": 0, "reads": 0, "bytes_written": 0, "bytes_read": 0}
+        per_driver = {}
+        for driver_name, connection in self.connections:
+            counts = {"writes": getattr(connection, "write_count", 0), "reads": getattr(connection, "read_count", 0),
+                      "bytes_written": getattr(connection, "bytes_written", 0),
+                      "bytes_read": getattr(connection, "bytes_read", 0)}
+            driver_totals = per_driver.setdefault(driver_name, dict.fromkeys(totals, 0))
+            for key, value in counts.items():
+                totals[key] += value
+                driver_totals[key] += value
+        totals["connections"] = len(self.connections)
+        totals["per_driver"] = per_driver
+        return totals
+
+
+def config_path(file_name):
+    return os.path.join(CONSTANTS.CONFIGS, file_name)
+
+
+def build_configs_workload():
+    """
+    :return: a list of (name, [config file paths]) queues, one for each bundled config that runs on its own
+    """
+    from src.GUI.Model.ExperimentModel import Experiment
+    queues = []
+    for file_name in sorted(os.listdir(CONSTANTS.CONFIGS)):
+        if not file_name.endswith(".json"):
+            continue
+        name = Experiment(config_path(file_name)).get_name()
+        if name.endswith(TCL_SUFFIX) or name in (REPEAT_EXPERIMENT_NAME, PARAMETER_SWEEP_NAME):
+            continue
+        queues.append((name, [config_path(file_name)]))
+    return queues
+
+
+def build_queue(config_files, repeat_count=None):
+    """
+    :param config_files: the config files of the queue in order
+    :param repeat_count: if given, a Repeat Experiment of this many steps is added after the configs
+    :return: an ExperimentQueue
+    """
+    from src.GUI.Model.ExperimentModel import Experiment
+    from src.GUI.Model.ExperimentQueue import ExperimentQueue
+    queue = ExperimentQueue()
+    for file_name in config_files:
+        queue.add_to_queue(Experiment(file_name))
+    if repeat_count is not None:
+        repeat = Experiment(config_path("Repeat_Experiment.json"))
+        repeat.config.data.update({"Parameter": REPEAT_PARAMETER, "Start": 10, "Count": repeat_count, "Step": 0})
+        queue.add_to_queue(repeat)
+    return queue
+
+
+@contextlib.contextmanager
+def isolated_results(directory):
+    """
+    Send every result of the benchmark to a scratch directory instead of the Results folder of PTCS
+    """
+    from src.GUI.Application.ResultsManager import ResultsManager
+    from src.GUI.Application.SystemConfigManager import SystemConfigManager
+    from src.GUI.Model import QueueResultModel, QueueCheckpoint
+    from src.GUI.Application import QueueRunner
+    from src.GUI.Util import CONSTANTS
+
+    previous = (Globals.systemConfigManager, Globals.simulate_all_devices, QueueResultModel.RESULTS_CONFIG_DIR,
+                QueueCheckpoint.CHECKPOINTS_DIR, QueueRunner.VIVADO_TCL_COMMAND, CONSTANTS.SETTLE_TIMES_FILE)
+    results_config_dir = os.path.join(directory, "ResultsConfiguration")
+    results_dir = os.path.join(directory, "Results")
+    os.mkdir(results_dir)
+    config_manager = SystemConfigManager()
+    config_manager.results_manager = ResultsManager(results_dir, results_config_dir)
+    Globals.systemConfigManager = config_manager
+    Globals.simulate_all_devices = True
+    QueueResultModel.RESULTS_CONFIG_DIR = results_config_dir
+    QueueCheckpoint.CHECKPOINTS_DIR = os.path.join(directory, "Checkpoints")
+    QueueRunner.VIVADO_TCL_COMMAND = VIVADO_STAND_IN
+    CONSTANTS.SETTLE_TIMES_FILE = os.path.join(directory, "Settle_Times.json")
+    try:
+        yield config_manager
+    finally:
+        Globals.systemConfigManager, Globals.simulate_all_devices, QueueResultModel.RESULTS_CONFIG_DIR, \
+            QueueCheckpoint.CHECKPOINTS_DIR, QueueRunner.VIVADO_TCL_COMMAND, CONSTANTS.SETTLE_TIMES_FILE = previous
+
+
+def run_queue(config_files, repeat_count=None, verbose=False):
+    """
+    Build a queue and run it to completion through QueueManager
+    :return: (seconds to build the queue, seconds to run it, number of experiments run with every step of a Repeat
+    Experiment counted, the finished QueueRunner)
+    """
+    start = time.perf_counter()
+    queue = build_queue(config_files, repeat_count)
+    built = time.perf_counter()
+    output = sys.stdout if verbose else io.StringIO()
+    with contextlib.redirect_stdout(output):
+        runner = Globals.systemConfigManager.get_queue_manager().run_queue(queue)
+        runner.join()
+    finished = time.perf_counter()
+    return built - start, finished - built, runner.run_count, runner
+
+
+def run_workload(name, queues, simulation, repeat_count=None, trace_memory=True, verbose=False):
+    """
+    :param name: the name of the workload
+    :param queues: a list of (queue name, [config files]) to run one after the other
+    :param simulation: the Simulation settings given to devices that have none in Devices.json
+    :return: a dictionary of the measurements of the workload
+    """
+    timer = PhaseTimer()
+    counter = RoundTripCounter(simulation)
+    timer.wrap_all(PHASES)
+    counter.install()
+    errors = []
+    experiments = 0
+    queue_build = 0.0
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(prefix="ptcs_benchmark_") as directory, isolated_results(directory):
+            for queue_name, config_files in queues:
+                try:
+                    build_time, _, count, runner = run_queue(config_files, repeat_count, verbose)
+                    queue_build += build_time
+                    experiments += count
+                    if runner.current_experiment is not None:
+                        errors.append({"queue": queue_name, "error": "the queue stopped part of the way through"})
+                    elif not runner.queue_result.get_experiment_results_list():
+                        errors.append({"queue": queue_name, "error": "no experiment of the queue was run"})
+                except Exception as e:
+                    errors.append({"queue": queue_name, "error": "{}: {}".format(type(e).__name__, e)})
+    finally:
+        wall_time = time.perf_counter() - start
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        timer.restore()
+        counter.restore()
+
+    phases = timer.to_dict()
+    phases["queue_build"] = {"calls": len(queues), "seconds": round(queue_build, 6)}
+    return {
+        "workload": name,
+        "wall_time": round(wall_time, 6),
+        "experiments": experiments,
+        "phases": phases,
+        "round_trips": counter.to_dict(),
+        "peak_memory_bytes": peak_memory,
+        "errors": errors,
+    }
+
+
+def run_benchmarks(workloads=WORKLOADS, repeat_count=500, simulation=None, trace_memory=True, verbose=False):
+    """
+    :return: a JSON serializable report of every workload
+    """
+    report = {
+        "timestamp": str(Timestamp()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "simulation": simulation,
+        "workloads": [],
+    }
+    for workload in workloads:
+        if workload == "configs":
+            queues, repeat = build_configs_workload(), None
+        elif workload == "repeat_series":
+            queues, repeat = [("Repeat series", [config_path(REPEAT_BASE_CONFIG)])], repeat_count
+        elif workload == "tcl_block":
+            queues, repeat = [("Tcl block", [config_path(file_name) for file_name in TCL_BLOCK_CONFIGS])], None
+        else:
+            raise Exception("Unknown workload " + workload)
+        print("Running the {} workload...".format(workload), file=sys.stderr)
+        report["workloads"].append(run_workload(workload, queues, simulation, repeat, trace_memory, verbose))
+    return report
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark running queues against simulated instruments")
+    parser.add_argument("--workload", action="append", choices=WORKLOADS,
+                        help="a workload to run, can be given more than once. Defaults to all of them")
+    parser.add_argument("--repeat-count", type=int, default=500,
+                        help="the number of steps of the Repeat Experiment in the repeat_series workload")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of latency of every instrument command")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds of jitter added to the latency")
+    parser.add_argument("--throughput", type=float, default=None, help="bytes per second of every connection")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the jitter")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="do not trace memory use, tracing slows Python code down")
+    parser.add_argument("--verbose", action="store_true", help="show the output of the queues")
+    parser.add_argument("--output", help="the file to write the JSON report to, defaults to standard output")
+    arguments = parser.parse_args(args)
+
+    simulation = {"Latency": arguments.latency, "Jitter": arguments.jitter, "Seed": arguments.seed}
+    if arguments.throughput:
+        simulation["Throughput"] = arguments.throughput
+    report = run_benchmarks(arguments.workload or WORKLOADS, arguments.repeat_count, simulation,
+                            not arguments.no_memory, arguments.verbose)
+    text = json.dumps(report, indent=4)
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0 if not any(workload["errors"] for workload in report["workloads"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,6 @@ import json
 
 from src.GUI.Model.HardwareModel import HardwareModel
 
-from jsonschema import validate
 
 from src.GUI.Util.CONSTANTS import DEVICES_SCHEMA_FILE_NAME
 
@@ -20,6 +19,7 @@ class HardwareManager:
             config = json.load(f)
         with open(DEVICES_SCHEMA_FILE_NAME) as f:
             schema = json.load(f)
+        from jsonschema import validate
         validate(instance=config, schema=schema)
 
         for key in config:
@@ -1,8 +1,20 @@
+import json
 import os
 
 from .QueueRunner import QueueRunner
+from src.GUI.Model.ConfigCache import config_cache
 from src.GUI.Model.ExperimentQueue import ExperimentQueue
-from src.GUI.Model.ExperimentModel import Experiment
+from src.GUI.Model.QueueCheckpoint import QueueCheckpoint
+from src.GUI.Util.CONSTANTS import CONFIGS, PROJ_DIR
+
+# Saved queues are JSON with this format name. Queues saved as "value // key" text before it are version 1
+SAVED_QUEUE_FORMAT = "PTCS Saved Queue"
+SAVED_QUEUE_VERSION = 2
+
+
+def _same_value(first, second):
+    # 1 and 1.0 (and True) are equal in python but are not the same value to save
+    return type(first) is type(second) and first == second
 
 
 class QueueManager:
@@ -18,17 +30,51 @@ class QueueManager:
     def get_ith_experiment(self, index):
         return self.experiment_queue.get_ith_experiment(index)
 
-    def run_queue(self, to_run):
+    def run_queue(self, to_run, profile=None, continue_on_error=False, on_finished=None, wait=False, log_sink=None):
         """
             Starts the thread that runs the queue.
         :param to_run:
             The queue to be run
+        :param profile:
+            "cprofile", "sampling" or "both" to profile the scripts of every experiment in the queue
+        :param continue_on_error:
+            Keep running the rest of the queue when an experiment fails
+        :param on_finished:
+            Called with the QueueRunner once the queue is done
+        :param wait:
+            Run the queue on this thread instead, and only return once it is done
+        :param log_sink:
+            The LogSink the output of the queue is printed to, its output is also saved in a log file for the queue
         :return:
-            None, immediately
+            The QueueRunner thread, immediately
         """
         queue_result = self.results_config_manager.get_results_manager().make_new_queue_result()
-        runner = QueueRunner(to_run, queue_result)
-        runner.start()
+        runner = QueueRunner(to_run, queue_result, profile, continue_on_error, on_finished, log_sink)
+        if wait:
+            runner.run()
+        else:
+            runner.start()
+        return runner
+
+    def resume_queue(self, name, profile=None, continue_on_error=False, on_finished=None, wait=False, log_sink=None):
+        """
+            Starts the thread that runs the rest of a queue that did not finish, into the queue result it started.
+            Takes the same arguments as run_queue, except:
+        :param name:
+            The name of the queue result of the run, or the path of its checkpoint file
+        :return:
+            The QueueRunner thread, immediately
+        """
+        checkpoint = QueueCheckpoint.load(name)
+        queue_result = self.results_config_manager.get_results_manager().resume_queue_result(
+            checkpoint.start_datetime, checkpoint.results)
+        runner = QueueRunner(checkpoint.make_queue(), queue_result, profile, continue_on_error, on_finished, log_sink,
+                             checkpoint)
+        if wait:
+            runner.run()
+        else:
+            runner.start()
+        return runner
 
     def get_experiment_names(self):
         return self.experiment_queue.get_experiment_names()
@@ -36,15 +82,16 @@ class QueueManager:
     def add_to_queue(self, experiment):
         self.experiment_queue.add_to_queue(experiment)
 
-    def run(self):
-        self.run_queue(self.experiment_queue)
+    def run(self, profile=None, log_sink=None):
+        return self.run_queue(self.experiment_queue, profile, log_sink=log_sink)
 
     def clear_queue(self):
         self.experiment_queue.clear_queue()
 
     def save_queue_to_file(self, folder_path, name):
         """
-        Save the queue to a file
+        Save the queue to a file. The data of each config used in the queue is saved once, and each experiment only
+        saves the data values it changed, with their types
         :param folder_path:
             The folder to save it in.
         :return:
@@ -53,17 +100,50 @@ class QueueManager:
         if len(self.experiment_queue) == 0:
             return False
         index = len(os.listdir(folder_path)) + 1
-        output = ""
+        configs = {}
+        queue = []
         for i in range(len(self.experiment_queue)):
             exp = self.experiment_queue.get_ith_experiment(i)
-            output += "*" + exp.config_file_name.split("/")[-1][:-5] + "\n"
-            for field in (list(exp.config.data.keys()) if exp.config.data else dict()):
-                output += str(exp.config.data[field]) + " // " + str(field) + "\n"
+            config_name = QueueManager.saved_config_name(exp.config_file_name)
+            if config_name not in configs:
+                configs[config_name] = {"data": config_cache.get(exp.config_file_name).data or {}}
+            base = configs[config_name]["data"]
+            data = exp.config.data or {}
+            entry = {"config": config_name,
+                     "data": {key: value for key, value in data.items()
+                              if key not in base or not _same_value(value, base[key])}}
+            removed = [key for key in base if key not in data]
+            if removed:
+                entry["removed"] = removed
+            queue.append(entry)
 
         with open(folder_path + "/Saved_Queue_" + name, "w") as f:
-            f.write(output)
+            json.dump({"format": SAVED_QUEUE_FORMAT, "version": SAVED_QUEUE_VERSION, "configs": configs,
+                       "queue": queue}, f)
         return index
 
+    @staticmethod
+    def saved_config_name(config_file_name):
+        """
+        :return: how a config file is named in a saved queue, the file name without .json for the configs in the
+        Configs folder, the path (from the project folder if it is in it) for any other
+        """
+        path = os.path.abspath(config_file_name)
+        if os.path.dirname(path) == os.path.abspath(CONFIGS):
+            return os.path.basename(path)[:-5]
+        if path.startswith(os.path.abspath(PROJ_DIR) + os.sep):
+            return os.path.relpath(path, PROJ_DIR).replace("\\", "/")
+        return path
+
+    @staticmethod
+    def saved_config_path(config_name):
+        """
+        :return: the config file of a config named in a saved queue, see saved_config_name
+        """
+        if config_name.endswith(".json"):
+            return config_name if os.path.isabs(config_name) else os.path.join(PROJ_DIR, config_name)
+        return os.path.join(CONFIGS, config_name + ".json")
+
     def read_queue_from_file(self, file_path):
         """
         Construct a queue from a file
@@ -72,34 +152,70 @@ class QueueManager:
         :return:
             The constructed queue.
         """
-        rqueue = []
         if not os.path.isfile(file_path):
             return False
         with open(file_path) as f:
-            exp = None
-            for line in f.readlines():
-                if line.startswith('*'):
-                    if exp is not None:
-                        rqueue.append(exp)
-                    exp = Experiment(line[1:-1] + ".json")
-                else:
-                    ind = line.find(' // ')
-                    if ind > -1:
-                        val = line[:ind]
-                        if len(val) > 0 and ('0' <= val[0] <= '9' or val[0] == '.') and '_' not in val:
-                            try:
-                                val = int(val)
-                            except ValueError:
-                                ux = 0
-                                while val[ux] in ' .0123456789':
-                                    ux += 1
-                                uv = QueueManager.parse_units(line[ux:])
-                                if exp.config.data.get('Units', None) is not None:
-                                    uv /= QueueManager.parse_units(exp.config.data['Units'])
-                                val = float(line[:ux].replace(" ", ""))*uv
-                            if float(int(val)) == val:
-                                val = int(val)
-                        exp.config.data[line[ind+4:-1]] = val
+            text = f.read()
+        if text.lstrip().startswith("{"):
+            return self.read_saved_queue(json.loads(text))
+        return self.read_text_queue(text.splitlines(True))
+
+    @staticmethod
+    def read_saved_queue(saved):
+        """
+        :param saved: a saved queue read from its JSON
+        :return: the experiments of the queue
+        """
+        if saved.get("format") != SAVED_QUEUE_FORMAT or saved.get("version") != SAVED_QUEUE_VERSION:
+            raise ValueError("Unsupported saved queue format " + str(saved.get("format")) + " version " +
+                             str(saved.get("version")))
+        configs = saved["configs"]
+        rqueue = []
+        for entry in saved["queue"]:
+            config_name = entry["config"]
+            file_name = QueueManager.saved_config_path(config_name)
+            # the data the config had when the queue was saved, in case the config file changed since
+            data = dict(configs[config_name]["data"], **entry["data"])
+            for key in entry.get("removed", []):
+                data.pop(key, None)
+            experiment = config_cache.experiment(file_name)
+            experiment.config.data = data
+            rqueue.append(experiment)
+        return rqueue
+
+    @staticmethod
+    def read_text_queue(lines):
+        """
+        :param lines: the lines of a queue saved in the "value // key" text format used before the JSON one
+        :return: the experiments of the queue
+        """
+        rqueue = []
+        exp = None
+        for line in lines:
+            if line.startswith('*'):
+                if exp is not None:
+                    rqueue.append(exp)
+                # saved queues only keep the file name of each config, which is in the Configs folder
+                exp = config_cache.experiment(os.path.join(CONFIGS, line[1:].rstrip("\n") + ".json"))
+            else:
+                ind = line.find(' // ')
+                if ind > -1:
+                    val = line[:ind]
+                    if len(val) > 0 and ('0' <= val[0] <= '9' or val[0] == '.') and '_' not in val:
+                        try:
+                            val = int(val)
+                        except ValueError:
+                            ux = 0
+                            while ux < len(val) and val[ux] in ' .0123456789':
+                                ux += 1
+                            uv = QueueManager.parse_units(line[ux:])
+                            if exp.config.data.get('Units', None) is not None:
+                                uv /= QueueManager.parse_units(exp.config.data['Units'])
+                            val = float(line[:ux].replace(" ", ""))*uv
+                        if float(int(val)) == val:
+                            val = int(val)
+                    exp.config.data[line[ind+4:-1]] = val
+        if exp is not None:
             rqueue.append(exp)
         return rqueue
 
@@ -1,5 +1,5 @@
 import os
-from shutil import copyfile
+import traceback
 from threading import Thread
 import contextlib2
 
@@ -8,14 +8,18 @@ from src.GUI.Util import Globals
 from src.GUI.Util.Functions import clean_name_for_file
 from src.GUI.Util.Timestamp import Timestamp
 from src.GUI.RunAConfigFile.DeviceSetup import DeviceSetup
+from src.GUI.RunAConfigFile.ResourceDiscovery import resource_discovery
+from src.GUI.RunAConfigFile.SessionPool import session_pool
 
 from src.GUI.Model.ExperimentModel import Experiment
 from src.GUI.Model.ExperimentScriptModel import ExperimentScript
+from src.GUI.Model.ParameterSweep import ParameterSweep, SweepAxis, SWEEP_INDEX
+from src.GUI.Model.QueueCheckpoint import QueueCheckpoint
 
 from src.GUI.Util.CONSTANTS import TEMP_DIR
-from src.GUI.Util.CONSTANTS import SCRIPTS_DIR
 from src.GUI.Util.CONSTANTS import PROJ_DIR
-from src.GUI.Util.CONSTANTS import VIVADO_LOCATION
+from src.GUI.Util.CONSTANTS import VIVADO_TCL_COMMAND
+from src.GUI.Util.CONSTANTS import POOL_DEVICE_SESSIONS
 
 
 class QueueRunner(Thread):
@@ -23,20 +27,52 @@ class QueueRunner(Thread):
     Thread class to run a provided queue
     """
 
-    def __init__(self, queue, queue_result):
+    def __init__(self, queue, queue_result, profile=None, continue_on_error=False, on_finished=None, log_sink=None,
+                 checkpoint=None):
         """
         Create a new QueueRunner that will run the provided queue using the provided temporary directory
         :param queue:
             The queue to run with Prober
+        :param profile:
+            "cprofile", "sampling" or "both" to profile the scripts of every experiment in the queue, None to only
+            profile the experiments with a "Profile" in their data
+        :param continue_on_error:
+            If true, an experiment that raises an exception is recorded in failures and the rest of the queue is still
+            run. Otherwise the exception stops the queue
+        :param on_finished:
+            Called with this QueueRunner once the queue is done, whether or not it succeeded
+        :param log_sink:
+            The LogSink the queue prints to. While the queue runs, its output is also saved to <queue result>.log in
+            the results directory
+        :param checkpoint:
+            The QueueCheckpoint of an earlier run of the queue to resume, the experiments it completed are skipped and
+            the rest are run into the same queue result. None to start a new run
         """
         Thread.__init__(self)
         self.queue = queue
         self.queue_result = queue_result
+        self.profile = profile
+        self.continue_on_error = continue_on_error
+        self.on_finished = on_finished
+        self.log_sink = log_sink
+        # (experiment name, error message) of every experiment that failed, and of the queue itself if it could not
+        # be started
+        self.failures = []
         # Initialize the status of all of the experiments in the queue to "not yet run"
         self.experiment_status = {}
         for i in range(len(queue)):
             self.experiment_status[queue.get_ith_experiment(i)] = -1
         self.current_experiment = None
+        # the number of experiments started so far, with sweeps counted as the number of points run
+        self.run_count = 0
+        # [queue position of the sweep, logical index] of the experiment behind each result added to queue_result,
+        # [None, None] for results not from a sweep. Used to put the results of sweeps run out of order back in order
+        self.result_sweep_positions = []
+        # saved after every experiment, so the run can be resumed if it stops
+        self.checkpoint = checkpoint
+        if checkpoint is not None:
+            self.result_sweep_positions = list(checkpoint.sweep_positions)
+            self.run_count = checkpoint.run_count
 
     def run(self):
         """
@@ -44,84 +80,208 @@ class QueueRunner(Thread):
         :return:
             Nothing
         """
+        if POOL_DEVICE_SESSIONS:
+            # the devices connected by verify_devices stay connected for the experiments, and are kept alive between
+            # them until the queue is done
+            session_pool.open()
+        try:
+            self.run_queue()
+        finally:
+            session_pool.close()
+            if self.log_sink is not None:
+                self.log_sink.close_log_file()
+            if self.on_finished is not None:
+                self.on_finished(self)
+
+    def run_queue(self):
+        """
+        Run the provided queue, see run
+        """
         if not self.verify_devices():
             print("\nAborting experiment since all devices were not successfully connected.\n")
+            self.failures.append(("Queue", "not all devices were connected"))
             return
-        print("\n====================\nStarting the Queue\n====================\n")
-        self.queue_result.start_queue()
-        # TODO catch any exceptions run by prober and try to continue, but only if a flag in the __init__ has been
-        # set
+        if self.checkpoint is None:
+            print("\n====================\nStarting the Queue\n====================\n")
+            self.queue_result.start_queue()
+            self.checkpoint = QueueCheckpoint.for_run(self.queue, self.queue_result)
+            self.checkpoint.save()
+        else:
+            print("\n====================\nResuming the Queue\n====================\n")
+            print(str(len(self.checkpoint.completed)) + " experiments were already completed")
+        if self.log_sink is not None:
+            # named like the queue result, so the log can be found next to it
+            results_directory = Globals.systemConfigManager.get_results_manager().results_directory
+            if not os.path.exists(results_directory):
+                os.makedirs(results_directory)
+            self.log_sink.open_log_file(os.path.join(results_directory, self.queue_result.get_name() + ".log"))
         self.queue.schedule_experiments()
-        i = 0
-        while i < len(self.queue):
-            if self.queue.get_ith_experiment(i).config.data is not None:
-                rt = self.queue.get_ith_experiment(i).config.data.get('Results', None)
+        for experiment in self.queue.queue:
+            if experiment.config.data is not None:
+                rt = experiment.config.data.get('Results', None)
                 if rt is not None:
                     if rt != "":
                         Globals.systemConfigManager.get_results_manager().results_directory = rt
-            if self.queue.get_ith_experiment(i).get_name() == 'Repeat Experiment':
-                if i > 0:
-                    ex = self.queue.get_ith_experiment(i)
-                    vary_param = ex.config.data['Parameter']
-                    start = float(ex.config.data['Start'])
-                    if float(int(start)) == start:
-                        start = int(start)
-                    count = int(ex.config.data['Count'])
-                    step = float(ex.config.data['Step'])
-                    if float(int(step)) == step:
-                        step = int(step)
-                    base_exp = self.queue.get_ith_experiment(i - 1)
-                    rq = self.add_test_series(base_exp, vary_param, start, count, step)
-                    tq = self.queue.queue[:i-1]
-                    tq.extend(rq)
-                    tq.extend(self.queue.queue[i+1:])
-                    self.queue.queue = tq
-                else:
-                    self.queue.queue = self.queue.queue[1:]
-                i -= 1
-            else:
-                i += 1
-        i = 0
-        while i < len(self.queue):
-            self.current_experiment = self.queue.get_ith_experiment(i)
+
+        # Contiguous Tcl experiments are run together, so they are held here until a non-Tcl experiment comes
+        tcl_block = []
+        tcl_positions = []
+        position = -1
+        for position, experiment in enumerate(self.iter_experiments()):
+            if position in self.checkpoint.completed:
+                continue
+            if experiment.get_name()[-5:] == '(Tcl)':
+                tcl_block.append(experiment)
+                tcl_positions.append(position)
+                continue
+            if tcl_block:
+                self.run_tcl_block(tcl_block, tcl_positions)
+                tcl_block = []
+                tcl_positions = []
+            self.current_experiment = experiment
             print((self.current_experiment.get_name()))
-            if self.current_experiment.get_name()[-5:] == '(Tcl)':
-                # Run a contiguous sequence of Tcl tests
-                tcl_end = i + 1
-                while tcl_end < len(self.queue) and self.queue.get_ith_experiment(tcl_end).get_name()[-5:] == '(Tcl)':
-                    tcl_end += 1
-                self.run_tcl_tests(tcl_end, i)
-                i = tcl_end
-            else:
-                self.experiment_status[self.current_experiment] = 0
-                # The file to store the json to call prober on to run the experiment
+            self.run_count += 1
+            self.experiment_status[self.current_experiment] = 0
+            results_before = len(self.queue_result.get_experiment_results_list())
+            # The file to store the json to call prober on to run the experiment
 
-                tmp_file_name = os.path.join(TEMP_DIR, "tmp" + self.current_experiment.get_name().replace(" ", "_") + ".json")
-                self.current_experiment.export_to_json(tmp_file_name)
-                try:
-                    RunAConfigFileMain.main(
-                        ["RunAConfigFileMain.py", "-c", tmp_file_name],
-                        config_manager=Globals.systemConfigManager,
-                        queue_result=self.queue_result
-                    )
-                finally:
-                    os.remove(tmp_file_name)
-                self.experiment_status[self.current_experiment] = 1
-                i += 1
+            tmp_file_name = os.path.join(TEMP_DIR, "tmp" + self.current_experiment.get_name().replace(" ", "_") + ".json")
+            self.current_experiment.export_to_json(tmp_file_name)
+            succeeded = False
+            try:
+                succeeded = self.run_experiment(
+                    self.current_experiment.get_name(),
+                    RunAConfigFileMain.main,
+                    self.main_args(tmp_file_name),
+                    config_manager=Globals.systemConfigManager,
+                    queue_result=self.queue_result
+                )
+            finally:
+                os.remove(tmp_file_name)
+                self.record_sweep_positions(self.current_experiment, results_before)
+                self.save_checkpoint([position] if succeeded else [])
+            self.experiment_status[self.current_experiment] = 1 if succeeded else 2
+        if tcl_block:
+            self.run_tcl_block(tcl_block, tcl_positions)
+        self.sort_sweep_results()
         self.current_experiment = None
         self.queue_result.end_queue()
         self.queue_result.save()
+        if len(self.checkpoint.completed) == position + 1:
+            self.checkpoint.delete()
+        else:
+            self.save_checkpoint([])
+            print("Not every experiment finished, run the rest with:\n"
+                  "    python -m src.GUI.RunSavedQueueMain --resume " + self.checkpoint.queue_result_name)
         print("\n====================\nQueue has finished\n====================\n")
-        Globals.systemConfigManager.get_ui_controller(). \
-            mainframe.experiment_results_page.experiment_list_panel.append_just_run_queue()
+        ui_controller = Globals.systemConfigManager.get_ui_controller()
+        if ui_controller is not None:
+            ui_controller.mainframe.experiment_results_page.experiment_list_panel.append_just_run_queue()
 
-    def run_tcl_tests(self, tcl_end, start_index=0):
+    def iter_experiments(self):
+        """
+        Go through the experiments of the queue in order, with every Parameter Sweep (or Repeat Experiment) replaced
+        by the variants of the experiment before it. The variants are made as they are reached, so a sweep costs
+        nothing before it runs, and the queue itself is not changed. Every variant is derived from the experiment as
+        it is in the queue, so data edited there is kept, where Repeat Experiment used to read its config file again
+        :return: a generator of the experiments to run
+        """
+        pending = None
+        for queue_position, experiment in enumerate(self.queue.queue):
+            if ParameterSweep.is_sweep(experiment):
+                if pending is None:
+                    # nothing before it to sweep
+                    continue
+                # the last variant is held back like any other experiment, so a sweep right after this one sweeps it
+                base, pending = pending, None
+                sweep = ParameterSweep.from_experiment(experiment)
+                print("Sweeping " + base.get_name() + " over " + str(len(sweep)) + " points in " + sweep.order +
+                      " order")
+                if sweep.costs.costs and sweep.order != "logical":
+                    print("Estimated transition time: {:.1f} s, {:.1f} s in logical order".format(
+                        sweep.estimated_transition_time(), sweep.estimated_transition_time(range(len(sweep)))))
+                for variant in sweep.variants(base):
+                    variant.sweep_position = queue_position
+                    if pending is not None:
+                        yield pending
+                    pending = variant
+                continue
+            if pending is not None:
+                yield pending
+            pending = experiment
+        if pending is not None:
+            yield pending
+
+    def run_tcl_block(self, experiments, positions):
+        """
+        Run contiguous Tcl experiments together
+        :param experiments: the Tcl experiments in the order they are in the queue
+        :param positions: the positions of the experiments in the run, see QueueCheckpoint
+        """
+        self.current_experiment = experiments[0]
+        print((self.current_experiment.get_name()))
+        start_index = self.run_count
+        self.run_count += len(experiments)
+        results_before = len(self.queue_result.get_experiment_results_list())
+        succeeded = False
+        try:
+            succeeded = self.run_experiment(self.current_experiment.get_name(), self.run_tcl_tests, experiments,
+                                            start_index)
+        finally:
+            # the whole block has one result, which is not moved
+            self.record_sweep_positions(None, results_before)
+            self.save_checkpoint(positions if succeeded else [])
+
+    def record_sweep_positions(self, experiment, results_before):
+        """
+        Remember which point of which sweep the results added since results_before came from
+        :param experiment: the experiment that was run, None for results that should stay where they are
+        :param results_before: the number of results queue_result had before the experiment was run
+        """
+        sweep_position = getattr(experiment, "sweep_position", None)
+        position = [sweep_position, experiment.config.data.get(SWEEP_INDEX) if sweep_position is not None else None]
+        added = len(self.queue_result.get_experiment_results_list()) - results_before
+        self.result_sweep_positions.extend([list(position) for _ in range(added)])
+
+    def save_checkpoint(self, completed_positions):
+        """
+        Save how far the run got, and the queue result so far
+        :param completed_positions: the positions of the experiments that just finished, see QueueCheckpoint
+        """
+        self.checkpoint.completed.update(completed_positions)
+        self.checkpoint.results = list(self.queue_result.get_experiment_results_list())
+        self.checkpoint.sweep_positions = self.result_sweep_positions
+        self.checkpoint.run_count = self.run_count
+        self.checkpoint.save()
+        self.queue_result.save()
+
+    def sort_sweep_results(self):
+        """
+        Put the results of every sweep in queue_result back in the logical order of the sweep, whatever order its
+        points were run in
+        """
+        results = self.queue_result.get_experiment_results_list()
+        positions = self.result_sweep_positions
+        if len(results) != len(positions):
+            return
+        start = 0
+        while start < len(results):
+            end = start + 1
+            while end < len(results) and positions[start][0] is not None and positions[end][0] == positions[start][0]:
+                end += 1
+            if positions[start][0] is not None:
+                block = sorted(zip(positions[start:end], results[start:end]), key=lambda pair: pair[0][1])
+                results[start:end] = [result for _, result in block]
+                positions[start:end] = [position for position, _ in block]
+            start = end
+
+    def run_tcl_tests(self, experiments, start_index=0):
         """
                 Run a series of TCL tests
-                :param tcl_end:
-                    The ending index
+                :param experiments:
+                    The Tcl experiments to run
                 :param start_index:
-                    The starting index
+                    The number of experiments run in the queue before these, used to number their results
                 :return:
                     Nothing
                 """
@@ -132,18 +292,20 @@ class QueueRunner(Thread):
         self.queue_result.time = now
         result_dir = Globals.systemConfigManager.get_results_manager().results_directory
         master_tcl = ""
+        # [experiment name, script path] of every experiment, run one after the other in the Tcl session
+        tcl_scripts = []
         output_folder = os.path.join(result_dir, name).replace("\\", "/")
         os.mkdir(output_folder)
-        for i in range(start_index, tcl_end):
-            with open(PROJ_DIR + "/" + self.queue.get_ith_experiment(i).config.tcl, "r") as f:
+        for i, experiment in enumerate(experiments, start_index):
+            with open(PROJ_DIR + "/" + experiment.config.tcl, "r") as f:
                 # Edit the Tcl scripts with the test parameters
                 done_sets = False
-                ex_name = clean_name_for_file(self.queue.get_ith_experiment(i).get_name())
+                ex_name = clean_name_for_file(experiment.get_name())
                 # Create a subdirectory for results from this specific test
                 os.mkdir(output_folder + "/" + ex_name + "_" + str(i+1))
-                master_tcl += "set output \"" + output_folder + "/" + ex_name + "_" + str(i+1) + \
-                              "/Collected_Data.csv\"\n"
-                master_tcl += "set index " + str(i+1) + "\n"
+                experiment_tcl = "set output \"" + output_folder + "/" + ex_name + "_" + str(i+1) + \
+                                 "/Collected_Data.csv\"\n"
+                experiment_tcl += "set index " + str(i+1) + "\n"
                 for line in f.readlines():
                     if not done_sets:
                         if not line.startswith("#"):
@@ -152,70 +314,90 @@ class QueueRunner(Thread):
                             else:
                                 words = line.split(' ')
                                 val = words[1]
-                                for k in list(self.queue.get_ith_experiment(i).config.data.keys()):
+                                for k in list(experiment.config.data.keys()):
                                     if k == val:
-                                        dt = self.queue.get_ith_experiment(i).config.data[k]
+                                        dt = experiment.config.data[k]
                                         if isinstance(dt, str) or isinstance(dt, str):
                                             dt = "\"" + dt + "\""
                                         line = words[0]+" "+words[1]+" " + str(dt) + "\n"
-                    master_tcl += line
-        target_location = os.path.join(output_folder, "combined.tcl")
-        # Save the combined Tcl script to be run
-        with open(target_location, "w") as f:
+                    experiment_tcl += line
+            script_location = output_folder + "/" + ex_name + "_" + str(i+1) + ".tcl"
+            with open(script_location, "w") as f:
+                f.write(experiment_tcl)
+            tcl_scripts.append([experiment.get_name(), script_location])
+            master_tcl += experiment_tcl
+        # Save the combined Tcl script, to run the block again by hand
+        with open(os.path.join(output_folder, "combined.tcl"), "w") as f:
             f.writelines(master_tcl)
 
         # Read in necessary devices and scripts
         master_experiment = Experiment(PROJ_DIR + "/template.json")
-        for i in range(start_index, tcl_end):
-            if self.queue.get_ith_experiment(i).config.devices is not None:
-                for key in self.queue.get_ith_experiment(i).config.devices:
+        for experiment in experiments:
+            if experiment.config.devices is not None:
+                for key in experiment.config.devices:
                     if key not in master_experiment.config.devices:
                         master_experiment.config.devices.append(key)
-            if self.queue.get_ith_experiment(i).config.experiment is not None:
-                for key in self.queue.get_ith_experiment(i).config.experiment:
+            if experiment.config.experiment is not None:
+                for key in experiment.config.experiment:
                     if key not in master_experiment.config.experiment:
                         master_experiment.config.experiment.append(key)
-        # Generate the script to run the Tcl script through the Vivado command line
+        # Run the scripts in the Tcl session shared by every queue, which only starts Vivado the first time
         tmp_file_name = os.path.join(TEMP_DIR, master_experiment.get_name().replace(" ", "_") + ".json")
-        pyLoc = os.path.join(SCRIPTS_DIR, "script" + str(name) + ".py")
         exp = dict()
         exp['type'] = 'PY_SCRIPT'
-        exp['source'] = 'script' + str(name) + '.py'
+        exp['source'] = 'TclSessionRun.py'
         exp['order'] = 1
-        with open(pyLoc, "w") as f:
-            f.write("import os\ndef main(data_map, experiment_result):\n\t" +
-                    "os.system('" + VIVADO_LOCATION + " -mode tcl < ' + '\""
-                    + target_location + "\"')")
-        copyfile(pyLoc, output_folder + "/script.py")
         master_experiment.config.experiment.append(ExperimentScript(exp))
+        master_experiment.config.data = {
+            "Tcl_Command": VIVADO_TCL_COMMAND,
+            "Tcl_Scripts": tcl_scripts,
+            "Tcl_Output": output_folder + "/vivado_output.txt",
+        }
         master_experiment.export_to_json(tmp_file_name)
 
         try:
             # Run the experiment
-            RunAConfigFileMain.main(["RunAConfigFileMain.py", "-c", tmp_file_name],
+            RunAConfigFileMain.main(self.main_args(tmp_file_name),
                                     config_manager=Globals.systemConfigManager,
                                     queue_result=self.queue_result)
         finally:
             # remove files
-            for i in range(start_index, tcl_end):
-                ex_name = clean_name_for_file(self.queue.get_ith_experiment(i).get_name())
+            for i, experiment in enumerate(experiments, start_index):
+                ex_name = clean_name_for_file(experiment.get_name())
                 if len(os.listdir(result_dir + "/" + name + "/" + ex_name + "_" + str(i+1))) == 0:
                     os.rmdir(result_dir + "/" + name + "/" + ex_name + "_" + str(i+1))
 
-            # Get rid of the annoying files Vivado creates
-            for fl in os.listdir("."):
-                try:
-                    if fl.endswith(".jou") or fl.endswith(".log"):
-                        os.remove(fl)
-                except WindowsError:
-                    pass
-
             # remove the config file in the temp directory that we passed into the RunAConfigFileMain.main. The config
             # would have been copied already into the results directory as Config.json
             os.remove(tmp_file_name)
 
-            # delete the script that we put in the scripts directory to run
-            os.remove(pyLoc)
+    def run_experiment(self, name, function, *args, **kwargs):
+        """
+        Call function to run an experiment of the queue, recording the error if it fails and continue_on_error is set
+        :param name: the name of the experiment, used when recording a failure
+        :return: True if the experiment finished without an exception
+        """
+        if not self.continue_on_error:
+            function(*args, **kwargs)
+            return True
+        try:
+            function(*args, **kwargs)
+            return True
+        except (Exception, SystemExit) as e:
+            traceback.print_exc()
+            self.failures.append((name, "{}: {}".format(type(e).__name__, e)))
+            print("\n" + name + " failed, continuing with the rest of the queue\n")
+            return False
+
+    def main_args(self, config_file_name):
+        """
+        :param config_file_name: the experiment config to run
+        :return: the arguments to run the experiment with RunAConfigFileMain.main
+        """
+        args = ["RunAConfigFileMain.py", "-c", config_file_name]
+        if self.profile:
+            args.append("Profile=" + self.profile)
+        return args
 
     def get_current_experiment(self):
         """
@@ -230,7 +412,8 @@ class QueueRunner(Thread):
         :param experiment:
             The experiment object to get the run status of
         :return:
-            The current run status of the provided experiment in the currently running queue
+            The current run status of the provided experiment in the currently running queue: -1 not yet run, 0
+            running, 1 finished, 2 failed
         """
         return self.experiment_status[experiment]
 
@@ -246,6 +429,9 @@ class QueueRunner(Thread):
                 for dev in d:
                     if dev not in device_list:
                         device_list.append(dev)
+        # look for the VISA resources again once at the start of the queue, for devices plugged in since the last one,
+        # then every experiment of the queue uses what was found
+        resource_discovery.refresh()
         with contextlib2.ExitStack() as stack:
             device_setup = DeviceSetup()
             try:
@@ -269,11 +455,4 @@ class QueueRunner(Thread):
         :param step: The amount to change vary_param by each time.
         :return: The created test series.
         """
-        rqueue = []
-        i = start
-        for it in range(0, count):
-            exp = Experiment(base_exp.config_file_name)
-            exp.config.data[vary_param] = i
-            rqueue.append(exp)
-            i += step
-        return rqueue
+        return list(ParameterSweep([SweepAxis(vary_param, "step", [start, step, count])]).variants(base_exp))
@@ -3,6 +3,8 @@ import os
 from src.GUI.Model import QueueResultModel
 from src.GUI.Model.ExperimentModel import Experiment
 from src.GUI.Model.ExperimentResultModel import ExperimentResultsModel
+from src.GUI.Model.ResultsJournal import ResultsJournal, JOURNAL_FILE_NAME
+from src.GUI.Model.ResultsCatalog import ResultsCatalog, CATALOG_FILE_NAME
 from src.GUI.Util.Functions import clean_name_for_file
 from src.GUI.Util.CONSTANTS import QUEUE_FILE_TITLE
 from src.GUI.Util.Timestamp import Timestamp
@@ -16,7 +18,10 @@ class ResultsManager:
         self.results_config_directory = results_config_directory
         if not os.path.exists(results_config_directory):
             os.mkdir(results_config_directory)
+        # results saved before the journal, one JSON file each
         for config in os.listdir(results_config_directory):
+            if not config.endswith(".json"):
+                continue
             if QUEUE_FILE_TITLE in config:
                 self.queue_result_list.append(QueueResultModel.QueueResultsModel(
                     queue_result_config=os.path.join(results_config_directory, config))
@@ -26,6 +31,45 @@ class ResultsManager:
                     results_directory,
                     experiment_result_config=os.path.join(results_config_directory, config))
                 )
+        self.journal = ResultsJournal(os.path.join(results_config_directory, JOURNAL_FILE_NAME))
+        queue_results, experiment_results = self.journal.replay(self.make_journaled_queue_result,
+                                                                self.make_journaled_experiment_result)
+        names = set(queue_results)
+        self.queue_result_list = [queue_result for queue_result in self.queue_result_list
+                                  if queue_result.get_name() not in names] + list(queue_results.values())
+        self.experiment_result_dict.update(experiment_results)
+        self.catalog = ResultsCatalog(os.path.join(results_config_directory, CATALOG_FILE_NAME))
+        self.add_missing_to_catalog()
+
+    def add_missing_to_catalog(self):
+        """
+        Add the experiment results that are not in the catalog yet to it, the ones run before it existed for example
+        """
+        missing = set(self.experiment_result_dict) - self.catalog.names()
+        if not missing:
+            return
+        queues = {}
+        for queue_result in self.queue_result_list:
+            for name in queue_result.get_experiment_results_list():
+                queues[name] = queue_result.get_name()
+        self.catalog.add_finished_runs(
+            (name, getattr(result, "experiment_config_location", None), result.get_results_dir(),
+             str(result.start_datetime), str(result.end_datetime), result.get_experiment_results_file_list(),
+             queues.get(name))
+            for name, result in self.experiment_result_dict.items() if name in missing)
+
+    @staticmethod
+    def make_journaled_queue_result(start_datetime):
+        result = QueueResultModel.QueueResultsModel()
+        result.set_start(start_datetime)
+        return result
+
+    @staticmethod
+    def make_journaled_experiment_result(directory, config, start_datetime):
+        result = ExperimentResultsModel(directory)
+        result.experiment_config_location = config
+        result.start_datetime = Timestamp.from_str(start_datetime)
+        return result
 
     def get_experiment_result(self, key):
         return self.experiment_result_dict[key]
@@ -50,6 +94,9 @@ class ResultsManager:
 
         result = ExperimentResultsModel(os.path.join(self.results_directory, name), exeriment_config_location)
         result.set_start(now)
+        result.attach_journal(self.journal, name)
+        self.catalog.add_run(name, result.experiment_config_location, result.get_results_dir(), str(now),
+                             queue_result.get_name() if queue_result else None)
         self.experiment_result_dict[name] = result
         if queue_result:
             queue_result.add_experiment_result(name)
@@ -57,19 +104,40 @@ class ResultsManager:
 
     def make_new_queue_result(self):
         result = QueueResultModel.QueueResultsModel()
+        result.attach_journal(self.journal)
         self.queue_result_list.append(result)
         # print "STUFF HAPPENS HERE", len(self.queue_result_list)
         return result
 
+    def resume_queue_result(self, start_datetime, experiments_results_locations):
+        """
+        :param start_datetime: when the queue was first started, as a string
+        :param experiments_results_locations: the results the queue made before it stopped
+        :return: the queue result of a queue that is being resumed, replacing the one that was saved when it stopped
+        """
+        result = QueueResultModel.QueueResultsModel(list(experiments_results_locations))
+        result.set_start(start_datetime)
+        result.attach_journal(self.journal)
+        result.record_start()
+        self.queue_result_list = [queue_result for queue_result in self.queue_result_list
+                                  if queue_result.get_name() != result.get_name()]
+        self.queue_result_list.append(result)
+        return result
+
     def save_experiment_results(self):
-        for name in list(self.experiment_result_dict.keys()):
-            self.save_experiment_result(name, self.experiment_result_dict[name])
+        # results are recorded in the journal as they change, and the ones loaded from files have not changed
+        self.journal.sync()
 
     def save_queue_results(self):
         for queue_result in self.queue_result_list:
             queue_result.save()
 
     def save_experiment_result(self, name, experiment_result):
+        self.catalog.finish_run(name, str(experiment_result.end_datetime),
+                                experiment_result.get_experiment_results_file_list())
+        if experiment_result.journal is not None:
+            experiment_result.journal.record("experiment_end", experiment=name, end=str(experiment_result.end_datetime))
+            return
         experiment_result.export_to_json(os.path.join(self.results_config_directory, name + ".json"))
 
     def get_queue_results(self):
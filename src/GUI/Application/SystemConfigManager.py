@@ -2,7 +2,6 @@ from .HardwareManager import HardwareManager
 from .QueueManager import QueueManager
 from .ExperimentsManager import ExperimentsManager
 from .ResultsManager import ResultsManager
-from src.GUI.Application.UIController import UIController
 from src.GUI.Util import CONSTANTS
 
 
@@ -25,6 +24,8 @@ class SystemConfigManager:
             A new HardwareManager object if one has not already been created by this class, an existing on otherwise.
         """
         if self.ui_controller is None and self.mainframe is not None:
+            # imported here because the UI needs wx, and queues can be run without a window
+            from src.GUI.Application.UIController import UIController
             self.ui_controller = UIController(self.mainframe)
         return self.ui_controller
 
@@ -0,0 +1,162 @@
+import atexit
+import queue
+import re
+import subprocess
+import threading
+
+# Printed by the session after every script it runs, so the output of a script can be told apart from the next one's
+DONE_MARKER = "PTCS_DONE"
+ERROR_MARKER = "PTCS_ERROR"
+
+# A marker line, possibly after an interpreter prompt such as "Vivado% ". A line echoing the puts command that printed
+# the marker does not match, since it does not start with the marker
+MARKER_LINE = re.compile(r'(?:^|%\s)(?P<marker>' + DONE_MARKER + '|' + ERROR_MARKER + r') (?P<id>\d+)(?: (?P<error>.*))?$')
+
+# Seconds an interpreter gets to exit on its own before it is killed
+CLOSE_TIMEOUT = 10
+
+
+class TclSessionError(RuntimeError):
+    """
+    A Tcl script raised an error, or the interpreter running it stopped
+    """
+    pass
+
+
+class TclSession:
+    """
+    A Tcl interpreter (Vivado in Tcl mode, or tclsh) that stays open between scripts, so the interpreter only starts
+    and connects to the hardware once instead of once per block of Tcl experiments. Scripts are sourced over its
+    standard input and their output is streamed back until the interpreter prints the marker of the script.
+    """
+
+    def __init__(self, command):
+        """
+        :param command: the shell command that starts an interpreter reading Tcl from its standard input, for example
+        "C:/Xilinx/Vivado/2017.4/bin/vivado -mode tcl" or "tclsh"
+        """
+        self.command = command
+        self.process = None
+        self._lines = queue.Queue()
+        self._reader = None
+        self._lock = threading.Lock()
+        self._script_count = 0
+
+    def start(self):
+        """
+        Start the interpreter, if it is not already running
+        """
+        if self.is_alive():
+            return
+        print("Starting Tcl session: " + self.command)
+        self._lines = queue.Queue()
+        self.process = subprocess.Popen(self.command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1)
+        self._reader = threading.Thread(target=self._read_output, args=(self.process.stdout, self._lines),
+                                        name="TclSession", daemon=True)
+        self._reader.start()
+
+    @staticmethod
+    def _read_output(stream, lines):
+        for line in stream:
+            lines.put(line)
+        # the interpreter exited
+        lines.put(None)
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def run(self, script_path, on_output=print, timeout=None):
+        """
+        Source a Tcl script in the interpreter, starting it if needed. Variables, open projects and hardware
+        connections are kept for the next script
+        :param script_path: the Tcl file to source
+        :param on_output: called with every line the interpreter prints while running the script
+        :param timeout: the seconds to wait for the script to finish, None to wait as long as it takes
+        :raise TclSessionError: if the script raised an error, or the interpreter exited or timed out. The
+        interpreter is stopped in the last two cases, the next script starts a new one
+        """
+        with self._lock:
+            self.start()
+            self._script_count += 1
+            script_id = str(self._script_count)
+            path = script_path.replace("\\", "/")
+            self._send("set ptcs_failed [catch {source {" + path + "}} ptcs_error]\n"
+                       "if {$ptcs_failed} {puts \"" + ERROR_MARKER + " " + script_id + " [lindex [split $ptcs_error "
+                       "\\n] 0]\"}\n"
+                       "puts \"" + DONE_MARKER + " " + script_id + "\"\n"
+                       "flush stdout\n")
+            error = None
+            while True:
+                try:
+                    line = self._lines.get(timeout=timeout)
+                except queue.Empty:
+                    self.close(kill=True)
+                    raise TclSessionError(script_path + " did not finish within " + str(timeout) + " seconds")
+                if line is None:
+                    self.process.wait()
+                    raise TclSessionError("The Tcl session stopped with exit code " + str(self.process.returncode) +
+                                          " while running " + script_path)
+                match = MARKER_LINE.search(line.rstrip("\r\n"))
+                if match is None or match.group("id") != script_id:
+                    on_output(line.rstrip("\r\n"))
+                elif match.group("marker") == ERROR_MARKER:
+                    error = match.group("error") or "unknown error"
+                else:
+                    break
+            if error is not None:
+                raise TclSessionError(script_path + ": " + error)
+
+    def _send(self, text):
+        try:
+            self.process.stdin.write(text)
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise TclSessionError("Could not send to the Tcl session: " + str(e))
+
+    def close(self, kill=False):
+        """
+        Stop the interpreter
+        :param kill: kill it straight away instead of asking it to exit
+        """
+        if self.process is None:
+            return
+        if self.is_alive() and not kill:
+            try:
+                self._send("exit\n")
+                self.process.wait(CLOSE_TIMEOUT)
+            except (TclSessionError, subprocess.TimeoutExpired):
+                pass
+        if self.is_alive():
+            self.process.kill()
+            self.process.wait()
+        self.process.stdin.close()
+        self.process = None
+
+
+# The open session of every command, shared by all of the queues run by the application
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(command):
+    """
+    :param command: the command that starts the interpreter, see TclSession
+    :return: the TclSession of the command, made the first time it is asked for. It is started when it runs a script
+    """
+    with _sessions_lock:
+        if command not in _sessions:
+            _sessions[command] = TclSession(command)
+        return _sessions[command]
+
+
+@atexit.register
+def close_sessions():
+    """
+    Stop every Tcl session, this is called when the application exits
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
@@ -1,5 +1,9 @@
 import sys
 
+import wx
+
+from src.GUI.Util.CONSTANTS import QUEUE_OUTPUT_MAX_CHARACTERS
+from src.GUI.Util.LogSink import LogSink
 from src.GUI.UI.Queue.ExperimentControlPanel import ExperimentControlPanel
 from src.GUI.UI.Queue.ExperimentOutputPanel import ExperimentOutputPanel
 
@@ -8,15 +12,40 @@ class UIController:
     def __init__(self, mainframe):
         assert (mainframe is not None)
         self.mainframe = mainframe
+        # the LogSink standing in for sys.stdout while the queue output is shown, None otherwise
+        self.log_sink = None
 
     def rebuild_queue_page(self):
         self.mainframe.queue_page.reload_display_panel()
 
     def redirectSTDout(self, logger):
-        if logger:
-            sys.stdout = logger
-        else:
+        """
+        Show everything printed in a text field. The queue thread prints to a LogSink, which hands the text to the
+        text field in batches on the GUI thread, so printing never waits on the GUI
+        :param logger: the wx.TextCtrl to show the output in, None to print to the console again
+        """
+        if self.log_sink is not None:
             sys.stdout = sys.__stdout__
+            self.log_sink.stop()
+            self.log_sink = None
+        if logger:
+            self.log_sink = LogSink(lambda text: wx.CallAfter(self.append_output, logger, text))
+            self.log_sink.start()
+            sys.stdout = self.log_sink
+
+    @staticmethod
+    def append_output(text_field, text):
+        """
+        Add text to the end of an output text field, dropping its oldest text once it gets too long to stay responsive
+        :param text_field: the wx.TextCtrl
+        :param text: the text to add
+        """
+        if not text_field:
+            return  # the panel was closed before the last batch arrived
+        text_field.AppendText(text)
+        excess = text_field.GetLastPosition() - QUEUE_OUTPUT_MAX_CHARACTERS
+        if excess > 0:
+            text_field.Remove(0, excess)
 
     def test_added_to_config_directory(self):
         """
@@ -0,0 +1,55 @@
+import os
+import threading
+
+from src.GUI.Model.ConfigFile import ConfigFile
+from src.GUI.Model.ExperimentModel import Experiment
+from src.GUI.Util.CONSTANTS import CONFIG_SCHEMA_FILE_NAME
+
+
+class ConfigCache:
+    """
+    The validated ConfigFile of every config file read so far, so a config used by many experiments (a saved queue
+    with thousands of entries for example) is only opened and validated once. A file is read again if it changed.
+    """
+
+    def __init__(self, schema_name=CONFIG_SCHEMA_FILE_NAME):
+        """
+        :param schema_name: the schema the config files are validated against
+        """
+        self.schema_name = schema_name
+        # absolute path to (modification time, ConfigFile)
+        self._configs = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_name):
+        """
+        :param file_name: the config file
+        :return: its ConfigFile. It is shared by everything that asks for the same file, so it should not be changed,
+        use experiment to get one that can be
+        """
+        path = os.path.abspath(file_name)
+        modified = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._configs.get(path)
+            if cached is not None and cached[0] == modified:
+                return cached[1]
+        config = ConfigFile.from_json_file(path, self.schema_name)
+        with self._lock:
+            self._configs[path] = (modified, config)
+        return config
+
+    def experiment(self, file_name, data_updates=None):
+        """
+        :param file_name: the config file
+        :param data_updates: a dictionary of the data values that differ from the ones in the config file
+        :return: a new Experiment of the config, with its own data, sharing the rest of its config with the cache
+        """
+        return Experiment.from_config(file_name, self.get(file_name).derive(data_updates or {}))
+
+    def clear(self):
+        with self._lock:
+            self._configs = {}
+
+
+# The cache shared by everything that loads many experiments
+config_cache = ConfigCache()
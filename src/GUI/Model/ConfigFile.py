@@ -1,9 +1,9 @@
 import json
 
-from jsonschema import validate
 
+from src.GUI.Model.ConfigView import ConfigView
 from src.GUI.Model.ExperimentScriptModel import ExperimentScript
-from copy import deepcopy
+from copy import copy, deepcopy
 
 
 class ConfigFile:
@@ -42,25 +42,46 @@ class ConfigFile:
             config = json.load(f)
         with open(schema_name) as f:
             schema = json.load(f)
+        # imported here because jsonschema takes a while to load and most modules importing this never validate
+        from jsonschema import validate
         validate(instance=config, schema=schema)
         return cls(**config)
 
     def copy(self):
-        return ConfigFile(**self.to_dict())
+        return ConfigFile(**deepcopy(self.to_dict()))
+
+    def derive(self, data_updates):
+        """
+        Make a variant of this config with some data values changed, without reading or validating anything again.
+        The variant has its own data dictionary but shares everything else (the scripts, devices, ...) with this
+        config, so those should not be changed through it
+        :param data_updates: a dictionary of the data values to change
+        :return: the new ConfigFile
+        """
+        variant = copy(self)
+        variant.data = dict(self.data or {}, **data_updates)
+        return variant
 
     def to_dict(self):
         """
-        Makes a deep copy of this class and returns its dictionary representation
-        with each entry with a null or empty value removed
+        Returns the dictionary representation of this class with each entry with a null or empty value removed.
+        The values are shared with this config rather than copied, so it should only be read (use view to get one
+        that can be changed)
         """
-        copy = deepcopy(self)
-        copy.experiment = [i.__dict__ for i in self.experiment]
-        dct = copy.__dict__
+        dct = dict(self.__dict__)
+        dct["experiment"] = [dict(i.__dict__) for i in self.experiment]
         for item in list(dct.keys()):
             if not dct[item]:
                 del dct[item]
         return dct
 
+    def view(self):
+        """
+        :return: a ConfigView of the dictionary representation of this config, that can be changed without copying or
+        changing the config
+        """
+        return ConfigView(self.to_dict())
+
     def initialize_data(self, data_map):
         """
         Initializes optional Data section of the JSON config into the data map for the tasks
@@ -68,6 +89,4 @@ class ConfigFile:
         :return: None
         """
         if self.data:
-            data_map['Data']['Initial'] = {}
-            for key in list(self.data.keys()):
-                data_map['Data']['Initial'][key] = self.data[key]
+            data_map['Data']['Initial'] = ConfigView(self.data)
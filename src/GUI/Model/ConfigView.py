@@ -0,0 +1,85 @@
+from collections.abc import Mapping, MutableMapping
+from copy import deepcopy
+
+
+class ConfigView(MutableMapping):
+    """
+    A dictionary that reads through to a shared base dictionary and keeps every change in its own small layer of
+    overrides, so many views of one config cost almost nothing and none of them can change it. A value that can be
+    changed in place is not shared: a dictionary is returned as a view of its own and a list is copied into the
+    overrides the first time it is read.
+    """
+
+    def __init__(self, base=None):
+        """
+        :param base: the dictionary to read through to, it is never changed
+        """
+        self._base = base if base is not None else {}
+        self._overrides = {}
+        self._removed = set()
+
+    def __getitem__(self, key):
+        if key in self._overrides:
+            return self._overrides[key]
+        if key in self._removed:
+            raise KeyError(key)
+        value = self._base[key]
+        if isinstance(value, Mapping):
+            value = self._overrides[key] = ConfigView(value)
+        elif isinstance(value, list):
+            value = self._overrides[key] = deepcopy(value)
+        return value
+
+    def __setitem__(self, key, value):
+        self._overrides[key] = value
+        self._removed.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._overrides.pop(key, None)
+        if key in self._base:
+            self._removed.add(key)
+
+    def __contains__(self, key):
+        return key in self._overrides or (key in self._base and key not in self._removed)
+
+    def __iter__(self):
+        for key in self._base:
+            if key not in self._removed:
+                yield key
+        for key in self._overrides:
+            if key not in self._base:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "ConfigView(" + repr(self.to_dict()) + ")"
+
+    def overrides(self):
+        """
+        :return: a dictionary of the values set in this view, and the list of the keys removed from it
+        """
+        return dict(self._overrides), sorted(self._removed, key=str)
+
+    def to_dict(self):
+        """
+        :return: a plain dictionary of everything in the view. Values that were not changed are shared with the base,
+        so it should only be read, to save it to a file for example
+        """
+        return {key: self._peek(key) for key in self}
+
+    def _peek(self, key):
+        value = self._overrides[key] if key in self._overrides else self._base[key]
+        return value.to_dict() if isinstance(value, ConfigView) else value
+
+
+def json_default(value):
+    """
+    The default of json.dump for anything that may hold a ConfigView
+    """
+    if isinstance(value, ConfigView):
+        return value.to_dict()
+    raise TypeError("Object of type " + type(value).__name__ + " is not JSON serializable")
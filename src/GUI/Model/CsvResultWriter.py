@@ -0,0 +1,87 @@
+import csv
+
+
+def csv_cells(row):
+    """
+    :param row: a list, tuple, numpy array or any other iterable of cells, or a single value
+    :return: the row as something the csv module can write, a single value becomes a row with one cell
+    """
+    if isinstance(row, (str, bytes)) or not hasattr(row, "__iter__"):
+        return [row]
+    return row
+
+
+class CsvResultWriter:
+    """
+    Writes rows to a csv result file as they are produced instead of building the whole file in memory first.
+    Scripts can keep one of these open during collection and append rows as the data comes in, so a long run never
+    holds more than the current row in memory and a crash part of the way through keeps everything written so far.
+    """
+
+    def __init__(self, file_name, column_labels=None, separator=",", surround_character="\"", new_line="\n",
+                 flush_every=100):
+        """
+        :param file_name: the full path of the csv file to create. WARNING: The specified file will be overwritten
+        :param column_labels: if given, written as the first row of the file
+        :param separator: the character put between cells
+        :param surround_character: the character every cell is quoted with. If empty, cells are only quoted
+        when they contain the separator or a new line
+        :param new_line: the character sequence ending every row
+        :param flush_every: the number of rows to buffer before they are pushed to the file on disk
+        """
+        self.file_name = file_name
+        self.flush_every = flush_every
+        self.rows_written = 0
+
+        if surround_character:
+            quoting = csv.QUOTE_ALL
+            quote_character = surround_character
+        else:
+            quoting = csv.QUOTE_MINIMAL
+            quote_character = "\""
+        self._file = open(file_name, "w", newline="")
+        self._writer = csv.writer(self._file, delimiter=separator, quotechar=quote_character, quoting=quoting,
+                                  lineterminator=new_line)
+        if column_labels is not None:
+            self._writer.writerow(column_labels)
+
+    def __enter__(self):
+        """
+        Enter method for ability to use "with open" statements
+        :return: Class Object
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Close the file when leaving the with block, even if the collection failed
+        """
+        self.close()
+
+    def write_row(self, row):
+        """
+        Append one row to the end of the file
+        :param row: the cells of the row, or a single value to write as a one cell row
+        """
+        self._writer.writerow(csv_cells(row))
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self._file.flush()
+
+    def write_rows(self, rows):
+        """
+        Append every row in rows to the end of the file
+        :param rows: any iterable of rows, it is consumed lazily so a generator can be passed in
+        """
+        for row in rows:
+            self.write_row(row)
+
+    def flush(self):
+        """
+        Push every buffered row to the file on disk
+        """
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
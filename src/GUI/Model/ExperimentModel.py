@@ -14,9 +14,30 @@ class Experiment:
         self.config_file_name = config_file
         self.config = ConfigFile.from_json_file(config_file, CONFIG_SCHEMA_FILE_NAME)
 
+    @classmethod
+    def from_config(cls, config_file_name, config):
+        """
+        Make an Experiment of a config that was already read
+        :param config_file_name: the file the config was read from
+        :param config: its ConfigFile
+        :return: the new Experiment
+        """
+        experiment = cls.__new__(cls)
+        experiment.config_file_name = config_file_name
+        experiment.config = config
+        return experiment
+
     def copy(self):
         return Experiment(self.config_file_name)
 
+    def derive(self, data_updates):
+        """
+        Make a variant of this experiment with some data values changed, without reading its config file again
+        :param data_updates: a dictionary of the data values to change
+        :return: the new Experiment
+        """
+        return Experiment.from_config(self.config_file_name, self.config.derive(data_updates))
+
     def __str__(self):
         return self.get_name()
 
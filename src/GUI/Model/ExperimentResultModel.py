@@ -1,10 +1,14 @@
 import json
 import os
 from shutil import copyfile
-import matplotlib.pyplot as plt
 
+from src.GUI.Model.CsvResultWriter import CsvResultWriter, csv_cells
+from src.GUI.Model.ConfigView import json_default
 from src.GUI.Util.Timestamp import Timestamp
 
+# matplotlib and numpy are imported by the methods that use them, so making an experiment result (which every
+# experiment does) does not load them for experiments that never plot or save arrays
+
 
 class ExperimentResultsModel:
     """
@@ -17,6 +21,10 @@ class ExperimentResultsModel:
                  experiments_results_files=None,
                  experiment_result_config=None):
         self.experiment_results_directory = experiment_results_directory
+        self.data_stores = {}
+        # the ResultsJournal the files added to this result are recorded in, and the name of the result in it
+        self.journal = None
+        self.name = None
         if experiment_result_config is None:
             if experiment_config_location is not None:
                 self.experiment_config_location = json.load(open(experiment_config_location, "r"))
@@ -80,6 +88,26 @@ class ExperimentResultsModel:
         with open(filename, 'w') as config_file:
             json.dump(config_dict, config_file, indent=4 if pretty_print else None, default=str)
 
+    def attach_journal(self, journal, name):
+        """
+        Record this result as started in a journal, along with every result file added to it from now on
+        :param journal: the ResultsJournal
+        :param name: the name of this result
+        """
+        self.journal = journal
+        self.name = name
+        journal.record("experiment_start", experiment=name, directory=self.experiment_results_directory,
+                       config=getattr(self, "experiment_config_location", None), start=str(self.start_datetime))
+
+    def record_result_file(self, file_path):
+        """
+        Add a file to the list of files of this result
+        :param file_path: the path of a file (or folder) in the results directory
+        """
+        self.experiments_results_files.append(file_path)
+        if self.journal is not None:
+            self.journal.record("result_file", experiment=self.name, file=file_path)
+
     def add_result_file(self, file_path):
         """
         If the file given is not already in that experiment result's folder, then
@@ -90,12 +118,13 @@ class ExperimentResultsModel:
         if dirname != self.experiment_results_directory:
             new_file_path = os.path.join(self.experiment_results_directory, os.path.basename(file_path))
             copyfile(file_path, new_file_path)
-            self.experiments_results_files.append(new_file_path)
+            self.record_result_file(new_file_path)
         else:
-            self.experiments_results_files.append(file_path)
+            self.record_result_file(file_path)
 
     def add_scatter_chart(self, file_name, x_axis, y_axis, autoscale=True, x_lim=(-10, 10), y_lim=(-10, 10),
                           x_label="", y_label="", title=""):
+        import matplotlib.pyplot as plt
         return_dir = os.getcwd()
         figure = plt.figure()
         axes = figure.add_axes((0.1, 0.2, 0.8, 0.7))
@@ -110,7 +139,7 @@ class ExperimentResultsModel:
         os.chdir(self.experiment_results_directory)
         text = os.path.join(os.getcwd(), file_name + ".png")
 
-        self.experiments_results_files.append(text)
+        self.record_result_file(text)
 
         figure.text(0.0, 0.06, text[:(len(text) // 2)], ha='left')
         figure.text(0.0, 0.02, text[(len(text) // 2):], ha='left')
@@ -144,6 +173,7 @@ class ExperimentResultsModel:
         :param vmax: max value for colorbar
         :return: None
         """
+        import matplotlib.pyplot as plt
         return_dir = os.getcwd()
         os.chdir(self.experiment_results_directory)
 
@@ -163,28 +193,46 @@ class ExperimentResultsModel:
         plt.savefig(path.replace(' ', "_"))
         os.chdir(return_dir)
 
+    def open_csv(self, file_name, column_labels=None, separator=",", surround_character="\"", new_line="\n"):
+        """
+        Start a csv file in this experiment's results directory that rows can be appended to while data is still
+        being collected. The file is tracked as a result as soon as it is opened.
+        :param file_name: the file name (without spaces and without a .csv) to save the file to
+        :param column_labels: the labels to write as the first row, if any
+        :param separator: the character put between cells
+        :param surround_character: the character every cell is quoted with, empty to only quote when needed
+        :param new_line: the character sequence ending every row
+        :return: a CsvResultWriter, close it (or use it in a with statement) when done writing
+        """
+        out_file_name = os.path.join(self.experiment_results_directory, file_name + ".csv")
+        writer = CsvResultWriter(out_file_name, column_labels=column_labels, separator=separator,
+                                 surround_character=surround_character, new_line=new_line)
+        self.record_result_file(out_file_name)
+        return writer
+
     def add_csv(self, file_name, data, column_labels=None, row_labels=None, title="",
                 separator=",", surround_character="\"", new_line="\n"):
-        out_data = ""
+        """
+        :param file_name: the file name (without spaces and without a .csv) to save the file to
+        :param data: a list of rows, each row is either a list of cells or a single value
+        :param column_labels: the labels to write as the first row, if any
+        :param row_labels: labels to put in front of each row, if any
+        :param title: put in the top left cell when there are both row and column labels
+        :param separator:
+        :param surround_character:
+        :param new_line:
+        """
+        if row_labels is None:
+            row_labels = []
+        header = None
         if column_labels is not None:
-            if row_labels is not None:
-                out_data += surround_character + title + surround_character + separator
-            out_data = separator.join([surround_character + str(s) + surround_character for s in column_labels])
-            out_data += new_line
-        for i in range(max(len(row_labels), len(data))):
-            if row_labels is not None and len(row_labels) > i:
-                out_data += surround_character + row_labels[i] + surround_character + separator
-            if len(data) > i:
-                if type(data[i]) is list:
-                    out_data += separator.join([surround_character + str(s) + surround_character for s in data[i]])
-                else:
-                    out_data += surround_character + str(data[i]) + surround_character
-                # out_data += separator.join(map(lambda s: surround_character + str(s) + surround_character, data[i]))
-                out_data += new_line
-        out_file_name = os.path.join(self.experiment_results_directory, file_name + ".csv")
-        with open(out_file_name, "w") as out_file:
-            out_file.write(out_data)
-        self.experiments_results_files.append(out_file_name)
+            header = ([title] if row_labels else []) + list(column_labels)
+        with self.open_csv(file_name, header, separator, surround_character, new_line) as writer:
+            for i in range(max(len(row_labels), len(data))):
+                row = [row_labels[i]] if len(row_labels) > i else []
+                if len(data) > i:
+                    row.extend(csv_cells(data[i]))
+                writer.write_row(row)
 
     def add_csv_dict(self, file_name, data_dict, row_labels, column_labels=None, title="",
                      separator=",", surround_character="\"", new_line="\n"):
@@ -198,54 +246,141 @@ class ExperimentResultsModel:
         :param surround_character:
         :param new_line:
         """
-        out_data = ""
+        header = None
         if column_labels is not None:
-            out_data += surround_character + title + surround_character + separator
-            out_data = separator.join([surround_character + str(s) + surround_character for s in column_labels])
-            out_data += new_line
-        for key in row_labels:
-            out_data += surround_character + key + surround_character + separator
-            if key in data_dict:
-                if type(data_dict[key]) is list:
-                    out_data += separator.join([surround_character + str(s) + surround_character for s in data_dict[key]])
-                else:
-                    out_data += surround_character + str(data_dict[key]) + surround_character
-                out_data += new_line
-        out_file_name = os.path.join(self.experiment_results_directory, file_name + ".csv")
-        with open(out_file_name, "w") as out_file:
-            out_file.write(out_data)
-        self.experiments_results_files.append(out_file_name)
+            header = [title] + list(column_labels)
+        with self.open_csv(file_name, header, separator, surround_character, new_line) as writer:
+            for key in row_labels:
+                row = [key]
+                if key in data_dict:
+                    row.extend(csv_cells(data_dict[key]))
+                writer.write_row(row)
+
+    def add_array(self, file_name, array):
+        """
+        Save a NumPy array (or anything that can be turned into one) in the binary .npy format, which keeps the
+        dtype and shape and can be memory-mapped back in without parsing
+        :param file_name: the file name (without spaces and without a .npy) to save the file to
+        :param array: the array to save
+        """
+        import numpy as np
+        out_file_name = os.path.join(self.experiment_results_directory, file_name + ".npy")
+        np.save(out_file_name, np.asarray(array))
+        self.record_result_file(out_file_name)
+
+    def add_table(self, file_name, columns, file_format="npz", compressed=True):
+        """
+        Save a table of named columns in a compact binary format
+        :param file_name: the file name (without spaces and without an extension) to save the file to
+        :param columns: a dictionary of column name to the values in that column
+        :param file_format: "npz" to save a NumPy archive with one array per column, or "parquet" to save a
+        Parquet file. Parquet needs pyarrow to be installed, if it is not, the table is saved as npz instead
+        :param compressed: compress the columns when saving as npz
+        """
+        import numpy as np
+        if file_format == "parquet":
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                print("pyarrow is not installed, saving " + file_name + " as npz instead of parquet")
+            else:
+                out_file_name = os.path.join(self.experiment_results_directory, file_name + ".parquet")
+                table = pyarrow.table({str(name): np.asarray(values) for name, values in columns.items()})
+                pyarrow.parquet.write_table(table, out_file_name)
+                self.record_result_file(out_file_name)
+                return
+
+        out_file_name = os.path.join(self.experiment_results_directory, file_name + ".npz")
+        arrays = {str(name): np.asarray(values) for name, values in columns.items()}
+        if compressed:
+            np.savez_compressed(out_file_name, **arrays)
+        else:
+            np.savez(out_file_name, **arrays)
+        self.record_result_file(out_file_name)
+
+    def open_data_store(self, name="Data_Store", checkpoint_interval=30.0):
+        """
+        Open the chunked data store of this experiment that scripts can append to while collecting, and read back
+        from lazily while reducing and exporting. Opening the same name again returns the store that is already open.
+        :param name: the folder name (without spaces) of the store in this experiment's results directory
+        :param checkpoint_interval: seconds between the automatic checkpoints made while appending
+        :return: the ResultDataStore
+        """
+        if name not in self.data_stores:
+            from src.GUI.Model.ResultDataStore import ResultDataStore
+            store_directory = os.path.join(self.experiment_results_directory, name)
+            self.data_stores[name] = ResultDataStore(store_directory, checkpoint_interval)
+            self.record_result_file(store_directory)
+        return self.data_stores[name]
+
+    def close_data_stores(self):
+        """
+        Checkpoint and close every data store opened for this experiment
+        """
+        for store in self.data_stores.values():
+            store.close()
+        self.data_stores = {}
+
+    def add_io_traces(self, devices, full_trace=False):
+        """
+        Save the I/O latency summary of every device that had tracing enabled, and optionally every recorded call
+        :param devices: a dictionary of device name to driver, like data_map['Devices']
+        :param full_trace: also save one csv per device with every call still in its trace buffer
+        """
+        summaries = {}
+        for device_name, driver in devices.items():
+            io_trace = getattr(driver, "io_trace", None)
+            if io_trace is None:
+                continue
+            summaries[device_name] = io_trace.summary()
+            if full_trace:
+                file_name = "IO_Trace_" + device_name.replace(" ", "_")
+                with self.open_csv(file_name, ["Time", "Operation", "Command", "Latency", "Bytes Out", "Bytes In",
+                                               "Error"]) as writer:
+                    writer.write_rows(io_trace.iter_records())
+        if summaries:
+            self.add_json_file_dict("IO_Trace_Summary", summaries)
+
+    def add_profile(self, file_name, profile):
+        """
+        :param file_name: the file name (without spaces and without a .prof) to save the file to
+        :param profile: the cProfile.Profile to save, the file can be opened with pstats or snakeviz
+        """
+        out_file_name = os.path.join(self.experiment_results_directory, file_name + ".prof")
+        profile.dump_stats(out_file_name)
+        self.record_result_file(out_file_name)
 
     def add_text_file(self, file_name, data):
         out_file_name = os.path.join(self.experiment_results_directory, file_name + ".txt")
         with open(out_file_name, "w") as out_file:
             out_file.write(data)
-        self.experiments_results_files.append(out_file_name)
+        self.record_result_file(out_file_name)
 
     def add_json_file(self, file_name, data):
         out_file_name = os.path.join(self.experiment_results_directory, file_name + ".json")
         with open(out_file_name, "w") as out_file:
             out_file.write(data)
-        self.experiments_results_files.append(out_file_name)
+        self.record_result_file(out_file_name)
 
     def add_json_file_dict(self, file_name, config):
         out_file_name = os.path.join(self.experiment_results_directory, file_name + ".json")
 
         with open(out_file_name, 'w') as out_file:
-            json.dump(config, out_file, separators=(',', ": "), indent=4)
-        self.experiments_results_files.append(out_file_name)
+            json.dump(config, out_file, separators=(',', ": "), indent=4, default=json_default)
+        self.record_result_file(out_file_name)
 
     def add_binary_data_file(self, data, file_name):
         out_file_name = os.path.join(self.experiment_results_directory, file_name + ".data")
         with open(out_file_name, "wb") as out_file:
             out_file.write(data)
-        self.experiments_results_files.append(out_file_name)
+        self.record_result_file(out_file_name)
 
     def add_image_file(self, data, file_name):
         out_file_name = os.path.join(self.experiment_results_directory, file_name)
         with open(out_file_name, "wb") as out_file:
             out_file.write(data)
-        self.experiments_results_files.append(out_file_name)
+        self.record_result_file(out_file_name)
 
     def start_experiment(self):
         self.start_datetime = Timestamp()
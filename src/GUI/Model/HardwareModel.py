@@ -1,11 +1,23 @@
+from src.GUI.Util.CONSTANTS import DEVICE_CONNECT_TIMEOUT
+
+
 class HardwareModel:
     """
     Class which represents the configuration of a hardware device
     """
-    def __init__(self, Driver, Type, Default):
+    def __init__(self, Driver, Type, Default, Simulation=None, Settle=None, Shadow_Registers=False,
+                 Connect_Timeout=DEVICE_CONNECT_TIMEOUT):
         self.driver = Driver
         self.type = Type
         self.default = Default
+        # the latency, jitter and throughput of the simulated connection when self.type == "SIM"
+        self.simulation = Simulation
+        # operation to the settle profile settings the driver waits for the operation with, see Settling
+        self.settle = Settle
+        # True if the driver remembers the settings it wrote and skips writing them again, see ShadowRegisters
+        self.shadow_registers = Shadow_Registers
+        # the most seconds each call to the device may take while it is connected to and checked
+        self.connect_timeout = Connect_Timeout
 
     def uses_pyvisa(self):
         """
@@ -13,3 +25,9 @@ class HardwareModel:
         :return:
         """
         return self.type == "VISA"
+
+    def uses_simulation(self):
+        """
+        :return: True if the device is played by a simulated instrument instead of being connected to
+        """
+        return self.type == "SIM"
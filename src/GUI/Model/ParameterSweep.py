@@ -0,0 +1,335 @@
+import json
+import math
+import re
+
+# The names of the experiments in a queue that sweep the experiment before them
+PARAMETER_SWEEP_NAME = "Parameter Sweep"
+REPEAT_EXPERIMENT_NAME = "Repeat Experiment"
+
+SWEEP_MODES = ("grid", "zip")
+
+# "logical" runs the points in the order they are listed, "serpentine" reverses the direction of each parameter every
+# time the one outside it changes so only one parameter changes between points, "cost" also moves the parameters that
+# are the most expensive to change outside and sorts their values, using the transition costs of the sweep
+SWEEP_ORDERS = ("logical", "serpentine", "cost")
+
+# The data value every point of a sweep gets with its position in the logical order of the sweep, so results run in
+# another order can be put back in order
+SWEEP_INDEX = "Sweep_Index"
+
+# "name=function(arguments)" or "name=[values]"
+AXIS_SPEC = re.compile(r'^\s*(?P<name>[^=]+?)\s*=\s*(?:(?P<function>\w+)\s*\((?P<arguments>[^)]*)\)|\[(?P<values>.*)\])\s*$')
+
+
+def _number(value):
+    """
+    :return: the value as an int if it is a whole number, as a float otherwise, like the Repeat Experiment did
+    """
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _parse_value(text):
+    text = text.strip()
+    try:
+        return _number(text)
+    except ValueError:
+        pass
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text.strip("\"'")
+
+
+class SweepAxis:
+    """
+    One parameter of a sweep and the values it takes. The values are computed when asked for, so an axis of any length
+    costs the same to make
+    """
+
+    def __init__(self, parameter, kind, arguments):
+        """
+        :param parameter: the name of the data value to sweep
+        :param kind: "list", "lin", "log" or "step", see ParameterSweep.parse
+        :param arguments: the values for "list", (start, stop, count) for "lin" and "log", (start, step, count) for
+        "step"
+        """
+        self.parameter = parameter
+        self.kind = kind
+        self.arguments = arguments
+        if kind == "list":
+            self._count = len(arguments)
+        elif kind in ("lin", "log", "step"):
+            if len(arguments) != 3:
+                raise ValueError(kind + "() of " + parameter + " needs 3 arguments, not " + str(len(arguments)))
+            self._count = int(arguments[2])
+            if kind == "log" and (arguments[0] <= 0 or arguments[1] <= 0):
+                raise ValueError("log() of " + parameter + " needs a start and stop above 0")
+        else:
+            raise ValueError("Unknown sweep function " + kind + "() for " + parameter)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        if self.kind == "list":
+            return self.arguments[index]
+        if self.kind == "step":
+            start, step, _ = self.arguments
+            return _number(start + step * index)
+        start, stop, count = self.arguments
+        fraction = index / (count - 1) if count > 1 else 0.0
+        if self.kind == "lin":
+            value = start + (stop - start) * fraction
+        else:
+            value = math.exp(math.log(start) + (math.log(stop) - math.log(start)) * fraction)
+        # rounded to 12 significant digits so 1 to 1000 in 4 steps gives 10 and 100, not 9.999999999999998
+        return _number(float("{:.12g}".format(value)))
+
+    def __iter__(self):
+        return (self[i] for i in range(self._count))
+
+
+class TransitionCosts:
+    """
+    How long it takes an instrument to go from one value of each swept parameter to another, for example the seconds
+    a laser needs to settle after its wavelength changes
+    """
+
+    def __init__(self, costs=None):
+        """
+        :param costs: a dictionary of parameter name to (seconds every time it changes, seconds per unit it changes by)
+        """
+        self.costs = costs if costs is not None else {}
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        :param spec: the costs separated by semicolons, each "name=seconds" or "name=seconds, seconds per unit",
+        for example "Laser_On=3.5; Wavelength=0.2, 0.05"
+        :return: a TransitionCosts
+        """
+        costs = {}
+        for cost_spec in (spec or "").split(";"):
+            if not cost_spec.strip():
+                continue
+            name, _, values = cost_spec.partition("=")
+            values = [float(value) for value in values.split(",")]
+            if not 1 <= len(values) <= 2:
+                raise ValueError("Could not read the transition cost \"" + cost_spec.strip() + "\"")
+            costs[name.strip()] = (values[0], values[1] if len(values) == 2 else 0.0)
+        return cls(costs)
+
+    def change_cost(self, parameter, old_value, new_value):
+        """
+        :return: the seconds it takes to change parameter from old_value to new_value
+        """
+        if old_value == new_value or parameter not in self.costs:
+            return 0.0
+        fixed, per_unit = self.costs[parameter]
+        try:
+            return fixed + per_unit * abs(float(new_value) - float(old_value))
+        except (TypeError, ValueError):
+            return fixed
+
+    def cost(self, old_point, new_point):
+        """
+        :return: the seconds it takes to go from one point of a sweep to the next
+        """
+        return sum(self.change_cost(parameter, old_point.get(parameter), value)
+                   for parameter, value in new_point.items())
+
+    def axis_cost(self, axis):
+        """
+        :return: the seconds it takes to go through every value of an axis once, in sorted order if they are numbers
+        """
+        values = list(axis)
+        try:
+            values = sorted(values)
+        except TypeError:
+            pass
+        return sum(self.change_cost(axis.parameter, old, new) for old, new in zip(values, values[1:]))
+
+
+class ParameterSweep:
+    """
+    The points of a sweep over one or more data values of an experiment. Points are made one at a time as they are
+    asked for, so a sweep of any size costs nothing until it runs
+    """
+
+    def __init__(self, axes, mode="grid", order="logical", costs=None):
+        """
+        :param axes: the SweepAxis of every swept parameter
+        :param mode: "grid" to run every combination of the values of the axes, the last axis changing fastest, or
+        "zip" to step all of the axes together
+        :param order: the order to run the points of a grid in, one of SWEEP_ORDERS. Zip sweeps always run in order,
+        since every parameter changes at every point anyway
+        :param costs: the TransitionCosts used by the "cost" order
+        """
+        if mode not in SWEEP_MODES:
+            raise ValueError("Unknown sweep mode " + str(mode) + ", use one of " + ", ".join(SWEEP_MODES))
+        if order not in SWEEP_ORDERS:
+            raise ValueError("Unknown sweep order " + str(order) + ", use one of " + ", ".join(SWEEP_ORDERS))
+        if mode == "zip" and len(set(len(axis) for axis in axes)) > 1:
+            raise ValueError("Every parameter of a zip sweep needs the same number of values")
+        self.axes = axes
+        self.mode = mode
+        self.order = order
+        self.costs = costs if costs is not None else TransitionCosts()
+        self._run_axes = self._plan_run_axes()
+        # the distance between the logical indexes of two points next to each other on each axis
+        self._strides = [1] * len(axes)
+        for number in range(len(axes) - 2, -1, -1):
+            self._strides[number] = self._strides[number + 1] * len(axes[number + 1])
+
+    @classmethod
+    def parse(cls, spec, mode="grid", order="logical", costs=None):
+        """
+        :param spec: the axes separated by semicolons, each one of:
+            name=[value, value, ...]        the listed values
+            name=lin(start, stop, count)    count values evenly spaced from start to stop
+            name=log(start, stop, count)    count values evenly spaced on a log scale from start to stop
+            name=step(start, step, count)   count values from start, step apart
+        for example "Voltage=lin(0, 5, 11); Wavelength=[1530, 1550]"
+        :param mode: "grid" or "zip"
+        :param order: one of SWEEP_ORDERS
+        :param costs: the TransitionCosts used by the "cost" order
+        :return: a ParameterSweep
+        """
+        axes = []
+        for axis_spec in spec.split(";"):
+            if not axis_spec.strip():
+                continue
+            match = AXIS_SPEC.match(axis_spec)
+            if match is None:
+                raise ValueError("Could not read the sweep \"" + axis_spec.strip() + "\"")
+            if match.group("function") is not None:
+                arguments = [_number(argument) for argument in match.group("arguments").split(",")]
+                axes.append(SweepAxis(match.group("name"), match.group("function").lower(), arguments))
+            else:
+                values = [_parse_value(value) for value in match.group("values").split(",") if value.strip()]
+                axes.append(SweepAxis(match.group("name"), "list", values))
+        return cls(axes, str(mode).strip().lower(), str(order).strip().lower(), costs)
+
+    @classmethod
+    def from_experiment(cls, experiment):
+        """
+        :param experiment: a "Parameter Sweep" or a "Repeat Experiment" experiment
+        :return: the ParameterSweep it describes
+        """
+        data = experiment.config.data
+        if experiment.get_name() == REPEAT_EXPERIMENT_NAME:
+            axis = SweepAxis(data['Parameter'], "step",
+                             [_number(data['Start']), _number(data['Step']), _number(data['Count'])])
+            return cls([axis])
+        return cls.parse(data['Sweep'], data.get('Mode', "grid"), data.get('Order', "logical"),
+                         TransitionCosts.parse(data.get('Costs', "")))
+
+    @staticmethod
+    def is_sweep(experiment):
+        """
+        :return: True if the experiment sweeps the experiment before it in the queue instead of running on its own
+        """
+        return experiment.get_name() in (PARAMETER_SWEEP_NAME, REPEAT_EXPERIMENT_NAME)
+
+    def __len__(self):
+        if not self.axes:
+            return 0
+        if self.mode == "zip":
+            return len(self.axes[0])
+        count = 1
+        for axis in self.axes:
+            count *= len(axis)
+        return count
+
+    def point(self, index):
+        """
+        :param index: the position of the point in the sweep
+        :return: a dictionary of parameter name to value at that point
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if self.mode == "zip":
+            return {axis.parameter: axis[index] for axis in self.axes}
+        positions = []
+        for axis in reversed(self.axes):
+            index, position = divmod(index, len(axis))
+            positions.append(position)
+        return {axis.parameter: axis[position] for axis, position in zip(self.axes, reversed(positions))}
+
+    def __iter__(self):
+        return (self.point(i) for i in range(len(self)))
+
+    def _plan_run_axes(self):
+        """
+        :return: (axis number, positions of its values in the order they are run) of every axis from the one changing
+        slowest to the one changing fastest, or None to run the points in order
+        """
+        if self.mode == "zip" or self.order == "logical":
+            return None
+        run_axes = []
+        for number, axis in enumerate(self.axes):
+            positions = list(range(len(axis)))
+            if self.order == "cost":
+                try:
+                    positions.sort(key=lambda position: axis[position])
+                except TypeError:
+                    pass
+            run_axes.append((number, positions))
+        if self.order == "cost":
+            # the most expensive parameter to change goes outside, so it changes the fewest times. sorted is stable, so
+            # parameters without a cost keep their order
+            run_axes.sort(key=lambda run_axis: -self.costs.axis_cost(self.axes[run_axis[0]]))
+        return run_axes
+
+    def run_index(self, position):
+        """
+        :param position: the position of a point in the order the sweep is run in
+        :return: the index of the point in the logical order of the sweep
+        """
+        if self._run_axes is None:
+            return position
+        index = 0
+        # run positions inside the current axis, the axis reverses direction when the combined position of the axes
+        # outside it is odd
+        inner = len(self)
+        for number, positions in self._run_axes:
+            inner //= len(positions)
+            outer_position, digit = divmod(position // inner, len(positions))
+            if outer_position % 2:
+                digit = len(positions) - 1 - digit
+            index += positions[digit] * self._strides[number]
+        return index
+
+    def run_order(self):
+        """
+        :return: a generator of the logical indexes of the points in the order they are run
+        """
+        return (self.run_index(position) for position in range(len(self)))
+
+    def estimated_transition_time(self, indexes=None):
+        """
+        :param indexes: the logical indexes of the points in the order they would be run, the run order by default
+        :return: the seconds the transition costs add up to going through the points in that order
+        """
+        total = 0.0
+        previous = None
+        for index in (self.run_order() if indexes is None else indexes):
+            point = self.point(index)
+            if previous is not None:
+                total += self.costs.cost(previous, point)
+            previous = point
+        return total
+
+    def variants(self, experiment):
+        """
+        :param experiment: the experiment to sweep
+        :return: a generator of one Experiment per point in the order they are run, each sharing everything but its
+        data with experiment. Each gets its logical position as SWEEP_INDEX
+        """
+        for index in self.run_order():
+            point = self.point(index)
+            point[SWEEP_INDEX] = index
+            yield experiment.derive(point)
@@ -0,0 +1,117 @@
+import json
+import os
+
+from src.GUI.Model.ExperimentModel import Experiment
+from src.GUI.Model.ExperimentQueue import ExperimentQueue
+from src.GUI.Util.Functions import write_json_atomic
+from src.GUI.Util.CONSTANTS import CHECKPOINTS_DIR
+
+CHECKPOINT_VERSION = 1
+
+
+class QueueCheckpoint:
+    """
+    How far a run of a queue got, saved after every experiment so a run stopped by a reboot, a crash or a failed
+    experiment can be resumed at the first experiment that did not finish, into the same queue result
+    """
+
+    def __init__(self, queue_result_name, start_datetime, experiments, completed=None, results=None,
+                 sweep_positions=None, run_count=0):
+        """
+        :param queue_result_name: the name of the queue result the run saves into
+        :param start_datetime: when the run was first started, as a string
+        :param experiments: [config file name, data] of every experiment in the queue, in order
+        :param completed: the positions of the experiments that finished, counting every point of a sweep, in the
+        order QueueRunner.iter_experiments goes through them
+        :param results: the result folders the run made so far, in order
+        :param sweep_positions: [queue position of the sweep, logical index] of the point of a sweep each result
+        came from, [None, None] for results that did not come from a sweep
+        :param run_count: the number of experiments the run started so far, see QueueRunner.run_count. A resumed run
+        carries on counting from it, so the results it makes are not numbered like the ones made before
+        """
+        self.queue_result_name = queue_result_name
+        self.start_datetime = start_datetime
+        self.experiments = experiments
+        self.completed = set(completed or [])
+        self.results = results if results is not None else []
+        self.sweep_positions = sweep_positions if sweep_positions is not None else []
+        self.run_count = run_count
+
+    @classmethod
+    def for_run(cls, queue, queue_result):
+        """
+        :param queue: the ExperimentQueue being run
+        :param queue_result: the QueueResultsModel it runs into
+        :return: a QueueCheckpoint of a run that has not done anything yet
+        """
+        experiments = [[experiment.config_file_name, experiment.config.data] for experiment in queue.queue]
+        return cls(queue_result.get_name(), str(queue_result.start_datetime), experiments)
+
+    @staticmethod
+    def path_for(name):
+        """
+        :param name: the name of a queue result, or the path of a checkpoint file
+        :return: the path of the checkpoint file
+        """
+        if os.path.isfile(name):
+            return name
+        return os.path.join(CHECKPOINTS_DIR, name + ".json")
+
+    @classmethod
+    def load(cls, name):
+        """
+        :param name: the name of a queue result, or the path of a checkpoint file
+        :return: the QueueCheckpoint saved in it
+        """
+        with open(cls.path_for(name)) as f:
+            saved = json.load(f)
+        if saved.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(name + " is a checkpoint of an unsupported version " + str(saved.get("version")))
+        return cls(saved["queue_result_name"], saved["start_datetime"], saved["experiments"], saved["completed"],
+                   saved["results"], saved["sweep_positions"], saved.get("run_count", len(saved["completed"])))
+
+    @staticmethod
+    def list_checkpoints():
+        """
+        :return: the queue result names of every saved checkpoint, the most recent first
+        """
+        if not os.path.isdir(CHECKPOINTS_DIR):
+            return []
+        names = [file_name[:-5] for file_name in os.listdir(CHECKPOINTS_DIR) if file_name.endswith(".json")]
+        # the names end with the start time of the run, so they sort by time
+        return sorted(names, reverse=True)
+
+    def get_path(self):
+        return os.path.join(CHECKPOINTS_DIR, self.queue_result_name + ".json")
+
+    def save(self):
+        """
+        Write the checkpoint to the Checkpoints folder, replacing the previous one of the run in a single step
+        """
+        if not os.path.exists(CHECKPOINTS_DIR):
+            os.makedirs(CHECKPOINTS_DIR)
+        write_json_atomic(self.get_path(), {
+            "version": CHECKPOINT_VERSION,
+            "queue_result_name": self.queue_result_name,
+            "start_datetime": self.start_datetime,
+            "experiments": self.experiments,
+            "completed": sorted(self.completed),
+            "results": self.results,
+            "sweep_positions": self.sweep_positions,
+            "run_count": self.run_count,
+        })
+
+    def delete(self):
+        if os.path.exists(self.get_path()):
+            os.remove(self.get_path())
+
+    def make_queue(self):
+        """
+        :return: an ExperimentQueue of the experiments of the run, with the data they had when it started
+        """
+        queue = ExperimentQueue()
+        for config_file_name, data in self.experiments:
+            experiment = Experiment(config_file_name)
+            experiment.config.data = data
+            queue.add_to_queue(experiment)
+        return queue
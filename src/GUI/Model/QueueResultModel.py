@@ -9,6 +9,10 @@ from src.GUI.Util.CONSTANTS import RESULTS_CONFIG_DIR
 class QueueResultsModel:
     def __init__(self, experiments_results_locations=None, queue_result_config=None):
         self.time = None
+        # the ResultsJournal the queue is recorded in, and the order of its results as last recorded there, None if the
+        # queue has not been recorded as started yet
+        self.journal = None
+        self._journaled_locations = None
         if queue_result_config is None:
             if experiments_results_locations is None:
                 experiments_results_locations = []
@@ -46,8 +50,32 @@ class QueueResultsModel:
         with open(filename, 'w') as config_file:
             json.dump(config_dict, config_file, indent=4 if pretty_print else None, default=str)
 
+    def attach_journal(self, journal):
+        """
+        Record this queue result in a journal from now on, instead of saving it to its own file
+        :param journal: the ResultsJournal
+        """
+        self.journal = journal
+        self._journaled_locations = None
+
+    def record_start(self):
+        """
+        Record in the journal that the queue started, or was resumed
+        """
+        self.journal.record("queue_start", queue=self.get_name(), start=str(self.start_datetime))
+        self._journaled_locations = []
+        if self.experiments_results_locations:
+            self.save()
+
     def save(self):
-        self.export_to_json(os.path.join(RESULTS_CONFIG_DIR, self.get_name() + ".json"))
+        if self.journal is None:
+            self.export_to_json(os.path.join(RESULTS_CONFIG_DIR, self.get_name() + ".json"))
+            return
+        # the results were recorded as they were added, only a new order of them has to be
+        if self._journaled_locations != self.experiments_results_locations:
+            self.journal.record("queue_order", queue=self.get_name(), experiments=self.experiments_results_locations)
+            self._journaled_locations = list(self.experiments_results_locations)
+        self.journal.sync()
 
     def get_name(self):
         now = self.start_datetime
@@ -55,13 +83,22 @@ class QueueResultsModel:
         return name
 
     def add_experiment_result(self, experiment_result_location):
+        if self.journal is not None and self._journaled_locations is None:
+            self.record_start()
         self.experiments_results_locations.append(experiment_result_location)
+        if self.journal is not None:
+            self.journal.record("queue_result", queue=self.get_name(), experiment=experiment_result_location)
+            self._journaled_locations.append(experiment_result_location)
 
     def start_queue(self):
         self.start_datetime = Timestamp()
+        if self.journal is not None:
+            self.record_start()
 
     def end_queue(self):
         self.end_datetime = Timestamp()
+        if self.journal is not None:
+            self.journal.record("queue_end", queue=self.get_name(), end=str(self.end_datetime))
 
     def set_start(self, start_datetime: str):
         self.start_datetime = Timestamp.from_str(start_datetime)
@@ -0,0 +1,275 @@
+import json
+import os
+import time
+
+import numpy as np
+
+MANIFEST_FILE_NAME = "manifest.json"
+CHUNK_FILE_FORMAT = "chunk_{:06d}"
+
+
+class StoreDataset:
+    """
+    One growable table of rows inside a ResultDataStore. Every row has the same dtype and shape.
+    Rows are buffered in memory until a full chunk has been collected, and every chunk is saved to its own file,
+    so memory use is bounded by the chunk size no matter how long the acquisition runs.
+    """
+
+    def __init__(self, directory, name, dtype, row_shape=(), chunk_rows=4096, compression=None, attrs=None,
+                 chunks=None):
+        """
+        :param directory: the folder the chunk files of this dataset are saved in
+        :param name: the name of the dataset in the store
+        :param dtype: the NumPy dtype of every value in the dataset
+        :param row_shape: the shape of one row, () for a dataset of single values
+        :param chunk_rows: how many rows are collected before they are written out as one chunk file
+        :param compression: None to save chunks as .npy files, which can be memory-mapped back in,
+        or "zlib" to save them compressed as .npz files
+        :param attrs: a dictionary of json serializable information to keep with the dataset (units, labels...)
+        :param chunks: the chunks already saved for this dataset, as they are listed in the store manifest
+        """
+        if compression not in (None, "zlib"):
+            raise Exception("Unknown compression '{}' for dataset {}".format(compression, name))
+        self.directory = directory
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.chunk_rows = int(chunk_rows)
+        self.compression = compression
+        self.attrs = attrs if attrs is not None else {}
+        self.chunks = chunks if chunks is not None else []
+
+        self._pending = np.empty((self.chunk_rows,) + self.row_shape, dtype=self.dtype)
+        self._pending_rows = 0
+        self._tail = None
+        # A chunk that was saved at a checkpoint before it was full is loaded back into the buffer so it can be
+        # finished, and is rewritten in place when it is next saved
+        if self.chunks and self.chunks[-1]["rows"] < self.chunk_rows:
+            tail = self._load_chunk(self.chunks[-1])
+            self._pending[:len(tail)] = tail
+            self._pending_rows = len(tail)
+            self._tail = self.chunks.pop()
+
+    def __len__(self):
+        return sum(chunk["rows"] for chunk in self.chunks) + self._pending_rows
+
+    @property
+    def shape(self):
+        return (len(self),) + self.row_shape
+
+    def append(self, rows):
+        """
+        Add rows to the end of the dataset
+        :param rows: a single row, or an array of rows with the row shape of this dataset
+        """
+        rows = np.asarray(rows, dtype=self.dtype)
+        if rows.shape == self.row_shape:
+            rows = rows.reshape((1,) + self.row_shape)
+        if rows.shape[1:] != self.row_shape:
+            raise Exception("Rows of shape {} can not be added to dataset {} with rows of shape {}".format(
+                rows.shape[1:], self.name, self.row_shape))
+        start = 0
+        while start < len(rows):
+            count = min(len(rows) - start, self.chunk_rows - self._pending_rows)
+            self._pending[self._pending_rows:self._pending_rows + count] = rows[start:start + count]
+            self._pending_rows += count
+            start += count
+            if self._pending_rows == self.chunk_rows:
+                self._save_pending()
+                self._pending_rows = 0
+
+    def flush(self):
+        """
+        Save the rows that have not filled a chunk yet, so they are on disk if the program stops
+        """
+        if self._pending_rows > 0:
+            self._save_pending()
+
+    def _save_pending(self):
+        index = len(self.chunks)
+        file_name = CHUNK_FILE_FORMAT.format(index) + (".npy" if self.compression is None else ".npz")
+        path = os.path.join(self.directory, file_name)
+        data = self._pending[:self._pending_rows]
+        # a partial chunk is saved again over the file the manifest already lists, so it is written next to it and
+        # renamed over it, as write_json_atomic does, and a stop part way through leaves the last checkpoint readable
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            if self.compression is None:
+                np.save(f, data)
+            else:
+                np.savez_compressed(f, data=data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+        entry = {"file": file_name, "rows": int(self._pending_rows)}
+        if self._pending_rows == self.chunk_rows:
+            self.chunks.append(entry)
+            self._tail = None
+        else:
+            # the partial chunk stays in the buffer, it is only listed so a checkpoint can record it
+            self._tail = entry
+
+    def _load_chunk(self, chunk, memory_map=False):
+        path = os.path.join(self.directory, chunk["file"])
+        if chunk["file"].endswith(".npz"):
+            with np.load(path) as archive:
+                return archive["data"]
+        return np.load(path, mmap_mode="r" if memory_map else None)
+
+    def iter_chunks(self):
+        """
+        Go through the dataset one chunk at a time without loading the rest of it
+        :return: a generator of arrays of rows, saved chunks are memory-mapped where the format allows it
+        """
+        for chunk in self.chunks:
+            yield self._load_chunk(chunk, memory_map=True)
+        if self._pending_rows > 0:
+            yield self._pending[:self._pending_rows]
+
+    def read(self, start=0, stop=None):
+        """
+        :param start: the index of the first row to read
+        :param stop: the index after the last row to read, None to read to the end
+        :return: an array with the rows from start to stop, only the chunks holding those rows are loaded
+        """
+        length = len(self)
+        start, stop, _ = slice(start, stop).indices(length)
+        parts = []
+        offset = 0
+        for chunk in self.iter_chunks():
+            chunk_end = offset + len(chunk)
+            if chunk_end > start and offset < stop:
+                parts.append(np.array(chunk[max(start - offset, 0):min(stop, chunk_end) - offset]))
+            offset = chunk_end
+            if offset >= stop:
+                break
+        if not parts:
+            return np.empty((0,) + self.row_shape, dtype=self.dtype)
+        return np.concatenate(parts)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice) and item.step in (None, 1):
+            return self.read(item.start if item.start is not None else 0, item.stop)
+        if isinstance(item, (int, np.integer)):
+            index = item + len(self) if item < 0 else item
+            return self.read(index, index + 1)[0]
+        return self.read()[item]
+
+    def to_manifest(self):
+        """
+        :return: the description of this dataset saved in the store manifest
+        """
+        chunks = list(self.chunks)
+        if self._tail is not None and self._pending_rows > 0:
+            chunks.append(self._tail)
+        return {
+            "dtype": self.dtype.str,
+            "row_shape": list(self.row_shape),
+            "chunk_rows": self.chunk_rows,
+            "compression": self.compression,
+            "attrs": self.attrs,
+            "chunks": chunks
+        }
+
+
+class ResultDataStore:
+    """
+    A folder of chunked, growable datasets that an experiment can append to while it collects data.
+    Everything appended is written out in chunks and a manifest listing the saved chunks is rewritten at every
+    checkpoint, so a crash loses at most what was collected since the last checkpoint. The datasets can be read
+    back a chunk at a time, so Reduce and Export scripts do not need to load a whole acquisition to work on it.
+    """
+
+    def __init__(self, directory, checkpoint_interval=30.0):
+        """
+        Open the store in the given folder, creating it if it does not exist yet
+        :param directory: the folder to keep the store in
+        :param checkpoint_interval: the number of seconds between the automatic checkpoints made while appending,
+        None to only checkpoint when checkpoint or close is called
+        """
+        self.directory = directory
+        self.checkpoint_interval = checkpoint_interval
+        self.datasets = {}
+        self._last_checkpoint = time.time()
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        manifest_path = os.path.join(directory, MANIFEST_FILE_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            for name, description in manifest["datasets"].items():
+                self.datasets[name] = StoreDataset(os.path.join(directory, name), name, description["dtype"],
+                                                   description["row_shape"], description["chunk_rows"],
+                                                   description["compression"], description["attrs"],
+                                                   description["chunks"])
+
+    def __enter__(self):
+        """
+        Enter method for ability to use "with open" statements
+        :return: Class Object
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Checkpoint what was collected when leaving the with block, even if the collection failed
+        """
+        self.close()
+
+    def create_dataset(self, name, dtype="float64", row_shape=(), chunk_rows=4096, compression=None, attrs=None):
+        """
+        Add a dataset to the store. If a dataset with this name already exists it is returned instead
+        :param name: the name of the dataset, it is also used as a folder name so keep it file name safe
+        :param dtype: the NumPy dtype of every value in the dataset
+        :param row_shape: the shape of one row, () for a dataset of single values
+        :param chunk_rows: how many rows make up a chunk file
+        :param compression: None for memory-mappable .npy chunks, "zlib" for compressed .npz chunks
+        :param attrs: a dictionary of json serializable information to keep with the dataset
+        :return: the StoreDataset
+        """
+        if name in self.datasets:
+            return self.datasets[name]
+        dataset_directory = os.path.join(self.directory, name)
+        if not os.path.exists(dataset_directory):
+            os.mkdir(dataset_directory)
+        self.datasets[name] = StoreDataset(dataset_directory, name, dtype, row_shape, chunk_rows, compression, attrs)
+        return self.datasets[name]
+
+    def __getitem__(self, name):
+        return self.datasets[name]
+
+    def __contains__(self, name):
+        return name in self.datasets
+
+    def get_dataset_names(self):
+        return list(self.datasets.keys())
+
+    def append(self, name, rows):
+        """
+        Add rows to the end of a dataset, checkpointing the store if the checkpoint interval has passed
+        :param name: the name of a dataset made with create_dataset
+        :param rows: a single row, or an array of rows
+        """
+        self.datasets[name].append(rows)
+        if self.checkpoint_interval is not None and time.time() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Save every buffered row and rewrite the manifest. The manifest is replaced in one step, so the store on disk
+        always describes a complete set of chunks
+        """
+        for dataset in self.datasets.values():
+            dataset.flush()
+        manifest = {"datasets": {name: dataset.to_manifest() for name, dataset in self.datasets.items()}}
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE_NAME)
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(manifest_path + ".tmp", manifest_path)
+        self._last_checkpoint = time.time()
+
+    def close(self):
+        self.checkpoint()
@@ -0,0 +1,200 @@
+import csv
+import mmap
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+# Files with these extensions can be opened by open_result_file
+VIEWABLE_EXTENSIONS = (".npy", ".data", ".csv")
+
+# Row offsets of the csv files indexed most recently, keyed by (path, modification time, size) and least recently used
+# first, so reopening a file is instant. Only CSV_INDEX_CACHE_SIZE are kept, as the index of a big file is big too
+_csv_index_cache = OrderedDict()
+CSV_INDEX_CACHE_SIZE = 8
+
+# The samples read at a time to draw a preview, every sample is looked at but only this many are in memory at once
+PREVIEW_BLOCK_SAMPLES = 1 << 17
+
+INDEX_BLOCK_SIZE = 1 << 22
+
+
+def open_result_file(path):
+    """
+    Open a result file for viewing without reading all of it into memory
+    :param path: the path of a .npy, .data or .csv file
+    :return: a reader object for the file
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return ArrayResultReader(path, np.load(path, mmap_mode="r"))
+    if extension == ".data":
+        return ArrayResultReader(path, np.memmap(path, dtype=np.uint8, mode="r"))
+    if extension == ".csv":
+        return CsvResultReader(path)
+    raise Exception("Can not view result file " + path)
+
+
+def min_max_envelope(values, max_points):
+    """
+    Decimate a series for plotting by keeping the smallest and biggest value of each bucket, so spikes stay visible.
+    Every value is looked at, the series is read in contiguous blocks of PREVIEW_BLOCK_SAMPLES and each block is reduced
+    into the buckets it covers
+    :param values: a 1D array, it may be memory-mapped
+    :param max_points: the number of buckets to reduce the series to
+    :return: (x, low, high) the index of the start of each bucket and the min and max of the bucket, NaN values are
+    left out and a bucket of only NaN values is NaN
+    """
+    length = len(values)
+    if length == 0:
+        return np.empty(0), np.empty(0), np.empty(0)
+    buckets = min(max_points, length)
+    x = np.arange(buckets, dtype=np.int64) * length // buckets
+    low = np.full(buckets, np.inf)
+    high = np.full(buckets, -np.inf)
+    for block_start in range(0, length, PREVIEW_BLOCK_SAMPLES):
+        block_stop = min(block_start + PREVIEW_BLOCK_SAMPLES, length)
+        block = np.asarray(values[block_start:block_stop], dtype=np.float64)
+        # the buckets from the one the block starts in to the last one starting before the block ends
+        first = np.searchsorted(x, block_start, side="right") - 1
+        last = np.searchsorted(x, block_stop, side="left")
+        offsets = np.maximum(x[first:last] - block_start, 0)
+        # fmin and fmax skip NaN values
+        low[first:last] = np.fmin(low[first:last], np.fmin.reduceat(block, offsets))
+        high[first:last] = np.fmax(high[first:last], np.fmax.reduceat(block, offsets))
+    only_nan = (low == np.inf) & (high == -np.inf)
+    low[only_nan] = np.nan
+    high[only_nan] = np.nan
+    return x, low, high
+
+
+class ArrayResultReader:
+    """
+    Reads a memory-mapped array. Only the pages of the file that are looked at are read from disk.
+    1D arrays are shown as a single column, anything with more dimensions is shown with one row per first index.
+    """
+
+    def __init__(self, path, array):
+        self.path = path
+        if array.ndim == 0:
+            array = array.reshape(1)
+        if array.ndim > 2:
+            array = array.reshape(array.shape[0], -1)
+        self.array = array
+
+    def get_row_count(self):
+        return self.array.shape[0]
+
+    def get_column_labels(self):
+        if self.array.ndim == 1:
+            return ["Index", "Value"]
+        return ["Index"] + [str(i) for i in range(self.array.shape[1])]
+
+    def get_rows(self, start, stop):
+        """
+        :return: the rows from start to stop as lists of strings, with the row index as the first cell
+        """
+        rows = []
+        for index, row in enumerate(self.array[start:stop], start):
+            if self.array.ndim == 1:
+                rows.append([str(index), str(row)])
+            else:
+                rows.append([str(index)] + [str(value) for value in row])
+        return rows
+
+    def get_preview(self, max_points=2000, max_series=8):
+        """
+        :return: a list of (label, x, low, high) series to plot, one for each column up to max_series
+        """
+        if self.array.dtype.kind not in "biuf":
+            return []
+        if self.array.ndim == 1:
+            return [("Value",) + min_max_envelope(self.array, max_points)]
+        return [(str(column),) + min_max_envelope(self.array[:, column], max_points)
+                for column in range(min(self.array.shape[1], max_series))]
+
+    def close(self):
+        self.array = None
+
+
+class CsvResultReader:
+    """
+    Reads rows of a csv file on demand. The byte offset of every row is found the first time the file is opened,
+    so any page of the table can be read straight out of the memory-mapped file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b""
+        self.offsets = self._get_row_offsets(size)
+        self.column_count = len(self._read_row(0)) if self.get_row_count() > 0 else 0
+
+    def _get_row_offsets(self, size):
+        stat = os.stat(self.path)
+        key = (self.path, stat.st_mtime, stat.st_size)
+        cached = _csv_index_cache.get(key)
+        if cached is not None:
+            _csv_index_cache.move_to_end(key)
+            return cached
+
+        # find every new line a block at a time, the offsets are the starts of the rows plus the end of the file
+        newlines = []
+        for start in range(0, size, INDEX_BLOCK_SIZE):
+            block = np.frombuffer(self._map[start:start + INDEX_BLOCK_SIZE], dtype=np.uint8)
+            newlines.append(np.flatnonzero(block == ord("\n")) + start + 1)
+        offsets = np.concatenate([np.zeros(1, dtype=np.int64)] + newlines).astype(np.int64)
+        if offsets[-1] != size:
+            offsets = np.append(offsets, size)
+        _csv_index_cache[key] = offsets
+        while len(_csv_index_cache) > CSV_INDEX_CACHE_SIZE:
+            _csv_index_cache.popitem(last=False)
+        return offsets
+
+    def get_row_count(self):
+        return len(self.offsets) - 1
+
+    def get_column_labels(self):
+        return ["Row"] + [str(i) for i in range(self.column_count)]
+
+    def _read_row(self, index):
+        line = bytes(self._map[self.offsets[index]:self.offsets[index + 1]]).decode(errors="replace")
+        return next(csv.reader([line.rstrip("\r\n")]), [])
+
+    def get_rows(self, start, stop):
+        """
+        :return: the rows from start to stop as lists of strings, with the row number as the first cell
+        """
+        stop = min(stop, self.get_row_count())
+        return [[str(index)] + self._read_row(index) for index in range(start, stop)]
+
+    def get_preview(self, max_points=2000, max_series=8):
+        """
+        Plot every numeric column of the file from evenly spaced rows, only max_points rows are parsed
+        :return: a list of (label, x, low, high) series to plot
+        """
+        count = self.get_row_count()
+        if count == 0:
+            return []
+        indexes = np.unique(np.linspace(0, count - 1, min(count, max_points)).astype(np.int64))
+        rows = [self._read_row(index) for index in indexes]
+        width = max(len(row) for row in rows)
+        series = []
+        for column in range(width):
+            values = np.full(len(rows), np.nan)
+            for i, row in enumerate(rows):
+                try:
+                    values[i] = float(row[column])
+                except (IndexError, ValueError):
+                    pass
+            if np.count_nonzero(~np.isnan(values)) > 1:
+                series.append((str(column), indexes, values, values))
+            if len(series) == max_series:
+                break
+        return series
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
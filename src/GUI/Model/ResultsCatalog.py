@@ -0,0 +1,304 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+CATALOG_FILE_NAME = "Results_Catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    experiment TEXT,
+    experiment_key TEXT,
+    queue TEXT,
+    directory TEXT,
+    start TEXT,
+    end TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_experiment_key ON runs (experiment_key, start);
+CREATE INDEX IF NOT EXISTS runs_start ON runs (start);
+CREATE INDEX IF NOT EXISTS runs_queue ON runs (queue);
+CREATE TABLE IF NOT EXISTS parameters (
+    run_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    number REAL
+);
+CREATE INDEX IF NOT EXISTS parameters_value ON parameters (key, value);
+CREATE INDEX IF NOT EXISTS parameters_number ON parameters (key, number);
+CREATE INDEX IF NOT EXISTS parameters_run ON parameters (run_id);
+CREATE TABLE IF NOT EXISTS devices (
+    run_id INTEGER NOT NULL,
+    device TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS devices_device ON devices (device);
+CREATE INDEX IF NOT EXISTS devices_run ON devices (run_id);
+CREATE TABLE IF NOT EXISTS files (
+    run_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_run ON files (run_id);
+"""
+
+# field, operator and value of one condition of a search, the value can be quoted to hold spaces
+CONDITION = re.compile(r'^\s*(?P<field>[^=!<>~\s]+)\s*(?P<operator>!=|<=|>=|=|<|>|~)\s*(?P<value>.*?)\s*$')
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "~")
+
+# a quoted value, which is kept whole, or the AND between two conditions of a search
+SEARCH_SEPARATOR = re.compile(r'(?P<quoted>"[^"]*"|\'[^\']*\')|\s+AND\s+', re.IGNORECASE)
+
+# the run columns holding times, a value given for them is a prefix, so "2020-02-01" is the whole of that day
+TIME_COLUMNS = ("start", "end")
+# sorts after every character a time can have, so value + PREFIX_END is after every time starting with value
+PREFIX_END = "\U0010ffff"
+
+# the fields of a run that are searched directly, every other field is a data parameter
+RUN_FIELDS = {"name": "experiment_key", "queue": "queue", "date": "start", "start": "start", "end": "end",
+              "result": "name", "directory": "directory"}
+
+
+def experiment_key(name):
+    """
+    :return: the name of an experiment with only its letters and digits, lower case, so "Eyescan (Tcl)" and the
+    Eyescan_Tcl of its config file match
+    """
+    return re.sub(r'[^0-9a-z]', "", str(name).lower())
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultsCatalog:
+    """
+    An index of every experiment that was run, in an SQLite database next to the results configuration: its name,
+    queue, start and end, the data parameters and devices it ran with, and its result files and their sizes. Searching
+    it takes milliseconds however many results there are, unlike going through the results one by one.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: the database file, made if it does not exist
+        """
+        self.path = path
+        # used from the queue thread while experiments run, and from the GUI thread to search
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def names(self):
+        """
+        :return: the set of the names of every experiment result in the catalog
+        """
+        with self._lock:
+            return {row[0] for row in self._connection.execute("SELECT name FROM runs")}
+
+    def add_run(self, name, config, directory, start, queue=None):
+        """
+        Add an experiment result as it starts, or replace the one with the same name
+        :param name: the name of the experiment result
+        :param config: the config the experiment ran with, as a dictionary
+        :param directory: the results directory of the experiment
+        :param start: when the experiment started, as a string
+        :param queue: the name of the queue result it is part of
+        """
+        with self._lock, self._connection:
+            self._insert_run(name, config, directory, start, queue)
+
+    def _insert_run(self, name, config, directory, start, queue):
+        config = config or {}
+        self._delete_run(name)
+        run_id = self._connection.execute(
+            "INSERT INTO runs (name, experiment, experiment_key, queue, directory, start) VALUES (?, ?, ?, ?, ?, ?)",
+            (name, config.get("name"), experiment_key(config.get("name", "")), queue, directory, start)).lastrowid
+        parameters = []
+        for key, value in (config.get("data") or {}).items():
+            text = value if isinstance(value, str) else json.dumps(value, default=str)
+            parameters.append((run_id, key, text, _number(value)))
+        self._connection.executemany("INSERT INTO parameters (run_id, key, value, number) VALUES (?, ?, ?, ?)",
+                                     parameters)
+        self._connection.executemany("INSERT INTO devices (run_id, device) VALUES (?, ?)",
+                                     [(run_id, device) for device in config.get("devices") or []])
+        return run_id
+
+    def _delete_run(self, name):
+        row = self._connection.execute("SELECT id FROM runs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return
+        for table in ("parameters", "devices", "files"):
+            self._connection.execute("DELETE FROM " + table + " WHERE run_id = ?", (row[0],))
+        self._connection.execute("DELETE FROM runs WHERE id = ?", (row[0],))
+
+    def finish_run(self, name, end, files):
+        """
+        Record the end of an experiment and the result files it made
+        :param name: the name of the experiment result
+        :param end: when the experiment ended, as a string
+        :param files: the paths of its result files, their sizes are read now
+        """
+        with self._lock, self._connection:
+            self._update_run(name, end, files)
+
+    def _update_run(self, name, end, files):
+        row = self._connection.execute("SELECT id FROM runs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return
+        self._connection.execute("UPDATE runs SET end = ? WHERE id = ?", (end, row[0]))
+        self._connection.execute("DELETE FROM files WHERE run_id = ?", (row[0],))
+        sizes = []
+        for path in files:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = None
+            sizes.append((row[0], path, size))
+        self._connection.executemany("INSERT INTO files (run_id, path, size) VALUES (?, ?, ?)", sizes)
+
+    def add_finished_runs(self, runs):
+        """
+        Add many experiment results that have already finished, in one transaction
+        :param runs: an iterable of (name, config, directory, start, end, files, queue)
+        """
+        with self._lock, self._connection:
+            for name, config, directory, start, end, files, queue in runs:
+                self._insert_run(name, config, directory, start, queue)
+                self._update_run(name, end, files)
+
+    @staticmethod
+    def parse_search(text):
+        """
+        :param text: conditions joined by AND, each "field operator value" with an operator of =, !=, <, <=, >, >=
+        or ~ (contains). The fields are name, queue, date (or start), end, result, directory, device, file, or the
+        name of a data parameter. A word on its own is searched for in the experiment name. A value can be quoted to
+        hold spaces or the word AND. For example "name=Eyescan_Tcl AND Vertical_Step=2 AND date>2020-02-01"
+        :return: a list of (field, operator, value)
+        """
+        text = text.strip()
+        parts = []
+        start = 0
+        for match in SEARCH_SEPARATOR.finditer(text):
+            if match.group("quoted") is None:
+                parts.append(text[start:match.start()])
+                start = match.end()
+        parts.append(text[start:])
+        conditions = []
+        for part in parts:
+            if not part.strip():
+                continue
+            match = CONDITION.match(part)
+            if match is None:
+                conditions.append(("name", "~", part.strip()))
+                continue
+            value = match.group("value")
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            conditions.append((match.group("field"), match.group("operator"), value))
+        return conditions
+
+    def search(self, text, limit=1000):
+        """
+        :param text: the search, see parse_search
+        :param limit: the most results to return
+        :return: the matching runs, the most recent first, see find
+        """
+        return self.find(self.parse_search(text), limit)
+
+    def find(self, conditions, limit=1000):
+        """
+        :param conditions: a list of (field, operator, value), see parse_search
+        :param limit: the most results to return
+        :return: a list of dictionaries with the name, experiment, queue, directory, start and end of every matching
+        run, the most recent first
+        """
+        clauses = []
+        arguments = []
+        for field, operator, value in conditions:
+            if operator not in OPERATORS:
+                raise ValueError("Unknown operator " + operator)
+            clause, clause_arguments = self._condition(field, operator, value)
+            clauses.append(clause)
+            arguments.extend(clause_arguments)
+        sql = "SELECT name, experiment, queue, directory, start, end FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY start DESC LIMIT ?"
+        with self._lock:
+            return [dict(row) for row in self._connection.execute(sql, arguments + [limit])]
+
+    @staticmethod
+    def _compare(column, operator, value):
+        if operator == "~":
+            return column + " LIKE ?", ["%" + value + "%"]
+        return column + " " + operator + " ?", [value]
+
+    @classmethod
+    def _compare_time(cls, column, operator, value):
+        """
+        Compare a time column with a value that may be only the start of a time, so date=2020-02-01 is every run that
+        day, date>2020-02-01 every run after it and date<=2020-02-01 every run up to the end of it
+        """
+        end = value + PREFIX_END
+        if operator == "=":
+            return "(" + column + " >= ? AND " + column + " < ?)", [value, end]
+        if operator == "!=":
+            return "NOT (" + column + " >= ? AND " + column + " < ?)", [value, end]
+        if operator == ">":
+            return column + " >= ?", [end]
+        if operator == "<=":
+            return column + " < ?", [end]
+        return cls._compare(column, operator, value)
+
+    def _condition(self, field, operator, value):
+        """
+        :return: the SQL of one condition on the runs table, and its arguments
+        """
+        key = field.lower()
+        if key in RUN_FIELDS:
+            column = RUN_FIELDS[key]
+            if column == "experiment_key" and operator in ("=", "!=", "~"):
+                value = experiment_key(value)
+            if column in TIME_COLUMNS:
+                return self._compare_time(column, operator, value)
+            return self._compare(column, operator, value)
+        if key == "device":
+            clause, arguments = self._compare("device", operator, value)
+            return "id IN (SELECT run_id FROM devices WHERE " + clause + ")", arguments
+        if key == "file":
+            clause, arguments = self._compare("path", operator, value)
+            return "id IN (SELECT run_id FROM files WHERE " + clause + ")", arguments
+        number = _number(value)
+        if number is not None and operator != "~":
+            clause, arguments = self._compare("number", operator, number)
+        else:
+            clause, arguments = self._compare("value", operator, value)
+        return "id IN (SELECT run_id FROM parameters WHERE key = ? AND " + clause + ")", [field] + arguments
+
+    def get_parameters(self, name):
+        """
+        :return: a dictionary of the data parameters an experiment result ran with, as text
+        """
+        with self._lock:
+            return {row["key"]: row["value"] for row in self._connection.execute(
+                "SELECT key, value FROM parameters JOIN runs ON runs.id = run_id WHERE runs.name = ?", (name,))}
+
+    def get_files(self, name):
+        """
+        :return: a list of (path, size in bytes or None if it is missing) of the result files of an experiment result
+        """
+        with self._lock:
+            return [(row["path"], row["size"]) for row in self._connection.execute(
+                "SELECT path, size FROM files JOIN runs ON runs.id = run_id WHERE runs.name = ?", (name,))]
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+
+from src.GUI.Util.Timestamp import Timestamp
+
+JOURNAL_FILE_NAME = "Results_Journal.jsonl"
+
+# Events that are synced to disk as soon as they are written, so finished experiments and queues are never lost.
+# Other events are synced with the next one of these, or once JOURNAL_SYNC_INTERVAL seconds have passed
+SYNCED_EVENTS = ("experiment_end", "queue_end")
+JOURNAL_SYNC_INTERVAL = 1.0
+
+
+class ResultsJournal:
+    """
+    An append-only log of what happens to results, one JSON object per line: queues starting and ending, experiments
+    starting and ending, result files being added to experiments and experiment results being added to queues. Saving
+    an event costs the same however many results there are, and the queue and experiment results are rebuilt from the
+    journal when PTCS starts.
+    """
+
+    def __init__(self, path, sync_interval=JOURNAL_SYNC_INTERVAL):
+        """
+        :param path: the journal file, made if it does not exist
+        :param sync_interval: the most seconds an event waits before it is synced to disk
+        """
+        self.path = path
+        self.sync_interval = sync_interval
+        self._file = None
+        self._lock = threading.Lock()
+        self._last_sync = time.monotonic()
+        self._unsynced = 0
+
+    def record(self, event, sync=None, **fields):
+        """
+        Append an event to the journal
+        :param event: the name of the event, see replay for the events and their fields
+        :param sync: True to sync the journal to disk now, False to leave it to the next sync, None to sync if the
+        event is one of SYNCED_EVENTS or the last sync was long enough ago
+        :param fields: the values of the event, anything JSON cannot hold is written as a string
+        """
+        line = json.dumps(dict(event=event, time=str(Timestamp()), **fields), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a")
+            self._file.write(line)
+            # in the operating system from here on, so a crash of PTCS alone does not lose it
+            self._file.flush()
+            self._unsynced += 1
+            if sync is None:
+                sync = event in SYNCED_EVENTS or time.monotonic() - self._last_sync >= self.sync_interval
+            if sync:
+                self._sync()
+
+    def sync(self):
+        """
+        Make sure every event recorded so far is on disk
+        """
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def events(self):
+        """
+        :return: a generator of every event in the journal as a dictionary, in the order they were recorded. A line
+        cut short by a crash is skipped
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def replay(self, make_queue_result, make_experiment_result):
+        """
+        Rebuild the queue and experiment results from the journal. The events are:
+            queue_start         queue, start
+            queue_result        queue, experiment       an experiment result was added to the queue
+            queue_order         queue, experiments      the experiment results of the queue were put in a new order
+            queue_end           queue, end
+            experiment_start    experiment, directory, config, start
+            result_file         experiment, file
+            experiment_end      experiment, end
+        :param make_queue_result: called with the start of a queue to make its QueueResultsModel
+        :param make_experiment_result: called with the directory, config and start of an experiment to make its
+        ExperimentResultsModel
+        :return: a dictionary of name to QueueResultsModel, and one of name to ExperimentResultsModel, both in the order
+        they were started
+        """
+        queue_results = {}
+        experiment_results = {}
+        for event in self.events():
+            kind = event.get("event")
+            if kind == "queue_start":
+                # a resumed queue starts again under the same name, and keeps the results it already had
+                if event["queue"] not in queue_results:
+                    queue_results[event["queue"]] = make_queue_result(event["start"])
+            elif kind == "experiment_start":
+                experiment_results[event["experiment"]] = make_experiment_result(event["directory"], event["config"],
+                                                                                 event["start"])
+            elif kind == "result_file" and event["experiment"] in experiment_results:
+                experiment_results[event["experiment"]].experiments_results_files.append(event["file"])
+            elif kind == "experiment_end" and event["experiment"] in experiment_results:
+                experiment_results[event["experiment"]].set_end(event["end"])
+            elif kind == "queue_result" and event["queue"] in queue_results:
+                queue_results[event["queue"]].experiments_results_locations.append(event["experiment"])
+            elif kind == "queue_order" and event["queue"] in queue_results:
+                queue_results[event["queue"]].experiments_results_locations = list(event["experiments"])
+            elif kind == "queue_end" and event["queue"] in queue_results:
+                queue_results[event["queue"]].set_end(event["end"])
+        return queue_results, experiment_results
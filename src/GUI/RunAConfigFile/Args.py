@@ -106,8 +106,8 @@ class Args:
     def add_parameters(self, data_map):
         for item in self.parameters:
             # The config data is stored in two places in the data map
-            data_map['Config']["data"][item[0]] = item[1]
-            data_map['Data']['Initial'][item[0]] = item[1]
+            data_map['Config'].setdefault("data", {})[item[0]] = item[1]
+            data_map['Data'].setdefault('Initial', {})[item[0]] = item[1]
 
     def obtain_config_file(self):
         """
@@ -1,18 +1,48 @@
-import pyvisa
 import os
 import inspect
 import imp
+import re
+import threading
+import time
 import types
 from src.GUI.Util import CONSTANTS
+from src.GUI.Util import Globals
 
 from src.GUI.Application.HardwareManager import HardwareManager
+from src.GUI.RunAConfigFile.ResourceDiscovery import resource_discovery
+from src.GUI.RunAConfigFile.SessionPool import session_pool
+from src.Instruments.ReconnectingResource import ReconnectingResource
+from src.Instruments.Settling import settle_times
+from src.Instruments.ShadowRegisters import enable_shadow_registers, disable_shadow_registers, \
+    invalidate_shadow_registers
+from src.Simulation.SimulatedBackend import open_simulated_connection
 
 
 class DeviceSetup:
 
     def __init__(self):
-        self.visa_rm = pyvisa.ResourceManager()
-        self.available_instruments = list(self.visa_rm.list_resources_info().values())
+        # device key to the ReconnectingResource of every device connected through one
+        self.resources = {}
+
+    @property
+    def visa_rm(self):
+        # shared by the whole process, and only loaded once a real VISA device is connected, so simulated runs do not
+        # need it
+        return resource_discovery.resource_manager
+
+    @property
+    def available_instruments(self):
+        return resource_discovery.resources()
+
+    @staticmethod
+    def is_available(default):
+        """
+        :param default: the default address of a VISA device
+        :return: True if it can be connected to without asking which address to use. A full VISA resource string is
+        opened as it is, without looking through the resources
+        """
+        return default[-6:] == "SOCKET" or resource_discovery.is_resource_name(default) or \
+            resource_discovery.is_known(default)
 
     def attach_VISA(self, name, default):
         """
@@ -23,9 +53,11 @@ class DeviceSetup:
         :return: A pyVISA device
         """
         if default:
-            if default in [i.resource_name for i in self.available_instruments] + \
-                          [i.alias for i in self.available_instruments if i.alias is not None] or \
-                    default[-6:] == "SOCKET":
+            if self.is_available(default):
+                return self.visa_rm.open_resource(default)
+            # it may have been plugged in since the resources were last looked for
+            resource_discovery.refresh()
+            if self.is_available(default):
                 return self.visa_rm.open_resource(default)
             print("'Default' connection string: " + default + " for " + name + " is invalid.", end=' ')
         else:
@@ -42,69 +74,249 @@ class DeviceSetup:
         instr = input("Choose instrument to connect to: ")
         return self.visa_rm.open_resource(instr)
 
+    @staticmethod
+    def bus_of(device_config):
+        """
+        :param device_config: the HardwareModel of a device
+        :return: the physical bus the device is on, the GPIB board of a GPIB address or else the address itself (the
+        instruments behind a GPIB to USB adapter all have its port). Devices on the same bus are connected one after
+        the other, devices on different buses at the same time
+        """
+        address = str(device_config.default).upper()
+        match = re.match(r'^(GPIB\d*)::', address)
+        return match.group(1) if match else address
+
+    @staticmethod
+    def load_driver_class(driver_file_name, drivers):
+        """
+        :param driver_file_name: the name of the driver file, which is also the name of its class
+        :param drivers: the names of the driver files in the Driver Root directory
+        :return: the driver class, or None if there is no such driver file
+        """
+        if driver_file_name not in drivers:
+            return None
+        if driver_file_name not in [i[0] for i in list(globals().items()) if isinstance(i[1], types.ModuleType)]:
+            globals()[driver_file_name] = imp.load_source(
+                    driver_file_name, os.path.join(CONSTANTS.DRIVERS_DIR, driver_file_name + '.py'))
+        return [i for i in inspect.getmembers(globals()[driver_file_name], inspect.isclass)
+                if i[0] == driver_file_name][0][1]
+
+    def connect_device(self, device_key, device_config, driver_class):
+        """
+        Connect to one device and check it answers, giving each call to it at most its connect timeout
+        :param device_key: the name of the device in Devices.json
+        :param device_config: its HardwareModel
+        :param driver_class: the class of its driver, None if its driver file was not found
+        :return: (the driver object, None) if it connected, (None, the reason) if it did not
+        """
+        driver_file_name = device_config.driver
+        if driver_class is None:
+            return None, "Driver file '{}' not found in the Driver Root directory '{}'".format(
+                driver_file_name, CONSTANTS.DRIVERS_DIR)
+
+        simulated = device_config.uses_simulation() or Globals.simulate_all_devices
+        if simulated:
+            connection = open_simulated_connection(driver_file_name, device_config.default, device_config.simulation)
+        elif device_config.uses_pyvisa():
+            try:
+                connection = self.attach_VISA(device_key, device_config.default)
+            except Exception as e:
+                # it may have been turned off, so the settings it had are not known any more
+                invalidate_shadow_registers(driver_file_name)
+                return None, "did not reciprocate connection ({}). Is the device on and/or physically " \
+                             "connected?".format(e)
+        else:
+            connection = device_config.default
+
+        resource = None
+        if hasattr(connection, "resource_name"):
+            # opened again the same way if the connection breaks, but without asking which address to use
+            if simulated:
+                def reopen():
+                    return open_simulated_connection(driver_file_name, device_config.default,
+                                                     device_config.simulation)
+            else:
+                resource_name = connection.resource_name
+
+                def reopen():
+                    return self.visa_rm.open_resource(resource_name)
+            resource = connection = ReconnectingResource(connection, reopen, device_key)
+
+        # the instrument may have been power cycled or reset from its front panel since it was last connected to, so
+        # none of the settings it was known to have are trusted, and the driver sends all of its setup
+        invalidate_shadow_registers(driver_file_name, connection)
+
+        # PyVisa resources time out in milliseconds
+        timeout = getattr(connection, "timeout", None) if not isinstance(connection, str) else None
+        if timeout is not None:
+            connection.timeout = device_config.connect_timeout * 1000
+        try:
+            driver_object = driver_class(connection)
+            # turned on once the driver is made, as the GPIB address of an instrument behind a GPIB to USB adapter is
+            # part of what its registers are kept under
+            gpib_address = driver_object.shadow_address() if hasattr(driver_object, "shadow_address") else None
+            if device_config.shadow_registers:
+                enable_shadow_registers(driver_file_name, connection, gpib_address)
+            else:
+                disable_shadow_registers(driver_file_name, connection, gpib_address)
+            driver_object.set_settle_settings(device_config.settle)
+            # check_connected should query the device and verify it gets a response back
+            connected = driver_object.check_connected()
+        except Exception as e:
+            driver_object = None
+            connected = False
+            reason = "failed to connect: {}: {}".format(type(e).__name__, e)
+        else:
+            reason = "did not reciprocate connection. Is the device on and/or physically connected?"
+        finally:
+            if timeout is not None:
+                connection.timeout = timeout
+        if not connected:
+            invalidate_shadow_registers(driver_file_name, connection)
+            if hasattr(connection, "close"):
+                connection.close()
+            return None, reason
+        if resource is not None:
+            # only once it answered, so a device that is not there fails to connect instead of being retried
+            resource.enable_reconnect(driver_object.reinitialize)
+            self.resources[device_key] = resource
+        return driver_object, None
+
+    def connect_bus(self, devices, driver_classes, bus_state):
+        """
+        Connect the devices of one bus one after the other
+        :param devices: a list of (device key, HardwareModel)
+        :param driver_classes: the driver class of each driver file name, see load_driver_class
+        :param bus_state: a dictionary shared with connect_devices, with a lock, and abandoned set once
+        connect_devices stopped waiting for the bus, in which case the devices that connect are closed again. The
+        results are put in it under "results" once finished is set
+        :return: a list of (device key, driver object or None, the reason it did not connect or None)
+        """
+        results = []
+        for device_key, device_config in devices:
+            if bus_state["abandoned"]:
+                break
+            try:
+                driver_object, reason = self.connect_device(device_key, device_config,
+                                                            driver_classes[device_config.driver])
+            except Exception as e:
+                driver_object, reason = None, "failed to connect: {}: {}".format(type(e).__name__, e)
+            results.append((device_key, driver_object, reason))
+        with bus_state["lock"]:
+            bus_state["results"] = results
+            bus_state["finished"] = True
+            if bus_state["abandoned"]:
+                for device_key, driver_object, reason in results:
+                    if driver_object is not None:
+                        driver_object.__exit__(None, None, None)
+        return results
+
     def connect_devices(self, config_file_devices, exit_stack):
         """
         Creates connections with all the instruments specified in the incoming devices object. If a driver to an
         instrument was not already imported, it will dynamically import the driver. It also does a final check to query
         the device and verify it returns a value. This means it is actually connected.
-        specified if one hasn't been imported already
+        Devices on different buses are connected at the same time, the ones sharing a bus one after the other, and
+        each gets its "Connect_Timeout" in Devices.json to answer. While a queue runs, the devices are taken from, and
+        kept in, its SessionPool instead of being closed by the exit stack
         :param config_file_devices: The list of devices to be used
         :param exit_stack: A Exit Stack that will close all devices when the program exits
-        :return: A dict of device names mapping to their objects
+        :return: A dict of device names mapping to their objects, None if any of them could not be connected
         """
         print("Connecting devices...")
-        errors = False
+        started = time.perf_counter()
         drivers = os.listdir(CONSTANTS.DRIVERS_DIR)
         drivers = [i[:-3] for i in drivers if not (i == '__init__.py' or i[-3:] != '.py')]
-        connected_devices = {}
 
         hardware_manager = HardwareManager(CONSTANTS.DEVICES_CONFIG)
+        # the settle times the drivers observe are kept between runs, so the profiles with Auto_Tighten keep tightening
+        settle_times.load(CONSTANTS.SETTLE_TIMES_FILE)
+        exit_stack.callback(settle_times.save, CONSTANTS.SETTLE_TIMES_FILE)
+
+        devices = []
         for device_key in config_file_devices:
             if device_key not in hardware_manager.get_all_hardware_names():
                 print("    Device not found in Devices.json: " + device_key)
             else:
-                print("    Connecting to " + device_key + "...", end="")
-                connection = None
-                device_config = hardware_manager.get_hardware_object(device_key)
-                if device_config.uses_pyvisa():
-                    try:
-                        connection = self.attach_VISA(device_key, device_config.default)
-                    except Exception:
-                        errors = True
-                        print("\n         " + device_key +
-                              " did not reciprocate connection. Is the device on and/or physically connected?")
-                        continue
-                else:
-                    connection = device_config.default
-
-                driver_file_name = device_config.driver
-
-                # instantiate a class based on the name of the file it is in.
-                if driver_file_name in drivers:
-                    if driver_file_name not in [i[0] for i in list(globals().items()) if isinstance(i[1], types.ModuleType)]:
-                        globals()[driver_file_name] = imp.load_source(
-                                driver_file_name, os.path.join(CONSTANTS.DRIVERS_DIR, driver_file_name + '.py'))
-
-                    DriverClass = [i for i in inspect.getmembers(globals()[driver_file_name], inspect.isclass)
-                                   if i[0] == driver_file_name][0][1]
-
-                    driver_object = DriverClass(connection)
-
-                    # check_connected should query the device and verify it gets a response back
-                    if not driver_object.check_connected():
-                        errors = True
-                        print("\n         " + device_key +
-                              " did not reciprocate connection. Is the device on and/or physically connected?")
-                        continue
-
-                    connected_devices[device_key] = exit_stack.enter_context(driver_object)
-                else:
-                    errors = True
-                    print("\n        Driver file '{}' for '{}' not found in the Driver Root directory '{}'".format(
-                            driver_file_name, device_key, CONSTANTS.DRIVERS_DIR))
+                devices.append((device_key, hardware_manager.get_hardware_object(device_key)))
+
+        # drivers are loaded and the VISA library is opened before any device connects, as neither is safe to do from
+        # two threads at once
+        driver_classes = {}
+        for device_key, device_config in devices:
+            if device_config.driver not in driver_classes:
+                driver_classes[device_config.driver] = self.load_driver_class(device_config.driver, drivers)
+        results = {}
+        buses = {}
+        # the devices still connected from an earlier experiment of the queue
+        pooled = set()
+        for device_key, device_config in devices:
+            simulated = device_config.uses_simulation() or Globals.simulate_all_devices
+            if session_pool.active:
+                driver_object = session_pool.checkout(device_key, session_pool.signature(device_config, simulated))
+                if driver_object is not None:
+                    results[device_key] = (driver_object, None)
+                    pooled.add(device_key)
+                    continue
+            if not simulated and device_config.uses_pyvisa() and driver_classes[device_config.driver] is not None \
+                    and not (device_config.default and self.is_available(device_config.default)):
+                # asks which address to use, so it is connected on its own before the rest
+                results[device_key] = self.connect_device(device_key, device_config,
+                                                          driver_classes[device_config.driver])
+            else:
+                buses.setdefault(self.bus_of(device_config), []).append((device_key, device_config))
+
+        if buses:
+            connecting = []
+            for bus, bus_devices in buses.items():
+                bus_state = {"lock": threading.Lock(), "abandoned": False, "finished": False, "results": []}
+                budget = sum(device_config.connect_timeout for device_key, device_config in bus_devices)
+                # a daemon thread, as a bus stuck opening a resource after it was given up on must not keep the
+                # program from exiting. If it does finish, it closes what it connected
+                thread = threading.Thread(target=self.connect_bus, args=(bus_devices, driver_classes, bus_state),
+                                          name="Connect bus " + str(bus), daemon=True)
+                thread.start()
+                connecting.append((time.monotonic() + budget, budget, bus_devices, bus_state, thread))
+            for deadline, budget, bus_devices, bus_state, thread in sorted(connecting, key=lambda c: c[0]):
+                thread.join(max(0.0, deadline - time.monotonic()))
+                with bus_state["lock"]:
+                    if not bus_state["finished"]:
+                        bus_state["abandoned"] = True
+                if bus_state["abandoned"]:
+                    for device_key, device_config in bus_devices:
+                        results[device_key] = (None, "did not connect within {:g} s, the connect timeouts of the "
+                                                     "devices on its bus".format(budget))
                     continue
-            print("done.")
-        if errors:
+                for device_key, driver_object, reason in bus_state["results"]:
+                    results[device_key] = (driver_object, reason)
+
+        connected_devices = {}
+        failures = []
+        for device_key, device_config in devices:
+            driver_object, reason = results[device_key]
+            if driver_object is None:
+                failures.append((device_key, reason))
+            elif device_key in pooled:
+                connected_devices[device_key] = driver_object
+                exit_stack.callback(session_pool.release, device_key)
+                print("    Still connected to " + device_key)
+            elif session_pool.active:
+                # kept connected for the next experiment, the pool closes it once the queue is done
+                simulated = device_config.uses_simulation() or Globals.simulate_all_devices
+                driver_object = driver_object.__enter__()
+                session_pool.add(device_key, session_pool.signature(device_config, simulated), driver_object,
+                                 self.resources.get(device_key), self.bus_of(device_config))
+                connected_devices[device_key] = driver_object
+                exit_stack.callback(session_pool.release, device_key)
+                print("    Connected to " + device_key)
+            else:
+                connected_devices[device_key] = exit_stack.enter_context(driver_object)
+                print("    Connected to " + device_key)
+        print("Connected {} of {} devices in {:.2f} s".format(len(connected_devices), len(devices),
+                                                              time.perf_counter() - started))
+        if failures:
+            print("Could not connect to:")
+            for device_key, reason in failures:
+                print("    " + device_key + ": " + reason)
             return None
-        else:
-            return connected_devices
+        return connected_devices
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from src.GUI.Util.CONSTANTS import VISA_DISCOVERY_TTL
+
+
+class ResourceDiscovery:
+    """
+    The PyVisa ResourceManager of the process, and the VISA resources it found, which are only looked for again once
+    they are older than the TTL or were refreshed. Looking through the GPIB and serial ports can take seconds, so it is
+    done at most once per queue rather than for every experiment, and not at all when every device has a full VISA
+    resource string as its address.
+    """
+
+    def __init__(self, ttl=VISA_DISCOVERY_TTL):
+        """
+        :param ttl: the seconds the resources found stay valid
+        """
+        self.ttl = ttl
+        self._resource_manager = None
+        self._resources = None
+        self._found_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def resource_manager(self):
+        """
+        :return: the PyVisa ResourceManager, opened the first time it is needed so simulated runs do not need VISA
+        """
+        with self._lock:
+            if self._resource_manager is None:
+                import pyvisa
+                self._resource_manager = pyvisa.ResourceManager()
+            return self._resource_manager
+
+    def resources(self):
+        """
+        :return: a list of the ResourceInfo of every VISA resource found, looked for again if they are older than the
+        TTL
+        """
+        resource_manager = self.resource_manager
+        with self._lock:
+            if self._resources is None or time.monotonic() - self._found_at > self.ttl:
+                self._resources = list(resource_manager.list_resources_info().values())
+                self._found_at = time.monotonic()
+            return self._resources
+
+    def refresh(self):
+        """
+        Forget the resources found, so they are looked for again the next time they are needed
+        """
+        with self._lock:
+            self._resources = None
+
+    def is_known(self, address):
+        """
+        :param address: the address of a device
+        :return: True if it is the name or alias of a resource that was found
+        """
+        resources = self.resources()
+        return address in [i.resource_name for i in resources] + [i.alias for i in resources if i.alias is not None]
+
+    @staticmethod
+    def is_resource_name(address):
+        """
+        :param address: the address of a device
+        :return: True if it is a full VISA resource string ("GPIB0::2::INSTR" for example) that can be opened without
+        looking for it first. An alias ("COM3") is not
+        """
+        from pyvisa import rname
+        try:
+            rname.parse_resource_name(address)
+            return True
+        except rname.InvalidResourceName:
+            return False
+
+
+# The resource discovery shared by every DeviceSetup
+resource_discovery = ResourceDiscovery()
@@ -0,0 +1,231 @@
+import threading
+import time
+
+from src.GUI.Util.CONSTANTS import DEVICE_KEEPALIVE_INTERVAL
+from src.Instruments.ReconnectingResource import ReconnectFailed
+
+
+class PooledSession:
+    """
+    A connected device kept in the SessionPool
+    """
+
+    def __init__(self, device_key, signature, driver, resource, bus):
+        """
+        :param device_key: the name of the device in Devices.json
+        :param signature: what the device was connected with, see SessionPool.signature
+        :param driver: the driver object
+        :param resource: the ReconnectingResource the driver talks through, None if it does not use one
+        :param bus: the physical bus the device is on, see DeviceSetup.bus_of
+        """
+        self.device_key = device_key
+        self.signature = signature
+        self.driver = driver
+        self.resource = resource
+        self.bus = bus
+        # held while an experiment uses the device, so the health monitor leaves it alone
+        self.lease = threading.Lock()
+
+    def keepalive(self):
+        """
+        Ask the device if it is still there, and reconnect it if not
+        :return: True if it is connected
+        """
+        # check_connected may drop the device of a driver when its session is invalid, the driver still needs it
+        device = self.driver.device
+        try:
+            alive = self.driver.check_connected()
+        except Exception:
+            alive = False
+        if alive or self.resource is None:
+            return alive
+        self.driver.device = device
+        try:
+            self.resource.reconnect()
+            return True
+        except ReconnectFailed as e:
+            print("Health monitor: " + str(e))
+            return False
+
+
+class HealthMonitor(threading.Thread):
+    """
+    Checks the idle sessions of a SessionPool every interval seconds
+    """
+
+    def __init__(self, pool, interval=DEVICE_KEEPALIVE_INTERVAL):
+        threading.Thread.__init__(self, name="Device health monitor", daemon=True)
+        self.pool = pool
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.pool.check_idle_sessions(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+
+
+class SessionPool:
+    """
+    The devices connected while a queue runs, kept connected from one experiment to the next instead of being connected
+    and set up again for every one. While the pool is open a HealthMonitor asks the idle devices if they are still
+    there, so a dropped socket or serial port is opened again between experiments rather than failing the next one.
+    """
+
+    def __init__(self):
+        # device key to its PooledSession
+        self._sessions = {}
+        # bus to the lock every resource on it holds for each call, and the health monitor holds for a keepalive
+        self._bus_locks = {}
+        self._lock = threading.Lock()
+        self._monitor = None
+        self.active = False
+
+    def open(self, keepalive_interval=DEVICE_KEEPALIVE_INTERVAL):
+        """
+        Start keeping the devices connected, and checking the idle ones every keepalive_interval seconds
+        """
+        with self._lock:
+            if self.active:
+                return
+            self.active = True
+            self._monitor = HealthMonitor(self, keepalive_interval)
+            self._monitor.start()
+
+    def close(self):
+        """
+        Stop the health monitor and close every device in the pool
+        """
+        with self._lock:
+            self.active = False
+            if self._monitor is not None:
+                self._monitor.stop()
+                self._monitor = None
+            sessions = list(self._sessions.values())
+            self._sessions = {}
+        for session in sessions:
+            self._close(session)
+
+    @staticmethod
+    def signature(device_config, simulated):
+        """
+        :param device_config: the HardwareModel of a device
+        :param simulated: True if the device is simulated
+        :return: what the device is connected with, a session is only reused for the same one
+        """
+        return device_config.driver, device_config.type, device_config.default, simulated
+
+    def checkout(self, device_key, signature):
+        """
+        :param device_key: the name of the device in Devices.json
+        :param signature: see signature
+        :return: the driver object of the device if it is in the pool, it is then in use until release is called. None
+        if it is not, or it is broken and could not be reconnected
+        """
+        with self._lock:
+            session = self._sessions.get(device_key)
+        if session is None:
+            return None
+        if session.signature != signature:
+            self.discard(device_key)
+            return None
+        session.lease.acquire()
+        if session.resource is not None and session.resource.broken:
+            try:
+                session.resource.reconnect()
+            except ReconnectFailed as e:
+                print("    " + str(e))
+                session.lease.release()
+                self.discard(device_key)
+                return None
+        return session.driver
+
+    def add(self, device_key, signature, driver, resource=None, bus=None):
+        """
+        Keep a device that was just connected, it is in use until release is called
+        :param device_key: the name of the device in Devices.json
+        :param signature: see signature
+        :param driver: its driver object
+        :param resource: the ReconnectingResource the driver talks through, None if it does not use one
+        :param bus: the physical bus the device is on (see DeviceSetup.bus_of), None if it shares it with nothing
+        """
+        if bus is None:
+            bus = ("device", device_key)
+        session = PooledSession(device_key, signature, driver, resource, bus)
+        if resource is not None:
+            resource.share_lock(self._bus_lock(bus))
+        session.lease.acquire()
+        with self._lock:
+            replaced = self._sessions.get(device_key)
+            self._sessions[device_key] = session
+        if replaced is not None:
+            self._close(replaced)
+
+    def release(self, device_key):
+        """
+        Mark a device as no longer in use by the experiment. Its I/O trace is turned off, as the next experiment may
+        not want one
+        """
+        with self._lock:
+            session = self._sessions.get(device_key)
+        if session is not None and session.lease.locked():
+            if hasattr(session.driver, "disable_io_trace"):
+                session.driver.disable_io_trace()
+            session.lease.release()
+
+    def discard(self, device_key):
+        """
+        Close a device and remove it from the pool
+        """
+        with self._lock:
+            session = self._sessions.pop(device_key, None)
+        if session is not None:
+            self._close(session)
+
+    def check_idle_sessions(self, idle_for):
+        """
+        Ask every device that was not used for idle_for seconds if it is still there, unless a device on its bus is
+        in use. Instruments behind one GPIB to USB adapter share it, and an experiment talking to one of them may be
+        part way through setting the adapter's GPIB address and then asking something, which a keepalive to another
+        would come in between
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            bus_lock = self._bus_lock(session.bus)
+            if not bus_lock.acquire(blocking=False):
+                continue
+            try:
+                if self._bus_in_use(session.bus) or not session.lease.acquire(blocking=False):
+                    continue
+                try:
+                    if session.resource is None or time.monotonic() - session.resource.last_used >= idle_for:
+                        session.keepalive()
+                finally:
+                    session.lease.release()
+            finally:
+                bus_lock.release()
+
+    def _bus_lock(self, bus):
+        with self._lock:
+            return self._bus_locks.setdefault(bus, threading.RLock())
+
+    def _bus_in_use(self, bus):
+        """
+        :return: True if an experiment has any device on the bus
+        """
+        with self._lock:
+            return any(session.lease.locked() for session in self._sessions.values() if session.bus == bus)
+
+    @staticmethod
+    def _close(session):
+        try:
+            session.driver.__exit__(None, None, None)
+        except Exception as e:
+            print("Could not close " + session.device_key + ": " + str(e))
+
+
+# The pool of the queue that is running
+session_pool = SessionPool()
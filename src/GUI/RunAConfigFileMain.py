@@ -6,15 +6,17 @@ from src.GUI.RunAConfigFile.Args import Args
 from src.GUI.RunAConfigFile.DeviceSetup import DeviceSetup
 from src.GUI.Model.ConfigFile import ConfigFile
 from src.GUI.Util.CONSTANTS import CONFIG_SCHEMA_FILE_NAME
+from src.GUI.Util.ScriptProfiler import ScriptProfiler
 
 
-def spawn_scripts(scripts, data_map, experiment_result):
+def spawn_scripts(scripts, data_map, experiment_result, profiler=None):
     """
     Runs the scripts defined in the JSON config. The tasks are called based on the order specified in the config,
         two different tasks can have the same order, meaning they should be spawned at the same time.
     :param scripts: The scripts pulled from the config
     :param data_map: The dictionary to store data between tasks
     :param experiment_result: The experiment result object to pass into the main class of the script(s) when called
+    :param profiler: a ScriptProfiler to run each script under, or None to run them as is
     :return: None
     """
     for script in scripts:
@@ -26,7 +28,10 @@ def spawn_scripts(scripts, data_map, experiment_result):
             script_module = importlib.reload(script_module)
 
         script_main_func = getattr(script_module, "main")
-        script_main_func(data_map, experiment_result)
+        if profiler is None:
+            script_main_func(data_map, experiment_result)
+        else:
+            profiler.run(script.source, script_main_func, data_map, experiment_result)
 
     print("Scripts Completed")
     return
@@ -61,7 +66,7 @@ def main(args, config_manager=None, queue_result=None):
 
     config = ConfigFile.from_json_file(file_name, CONFIG_SCHEMA_FILE_NAME)
 
-    data_map = {'Data': {}, 'Config': config.to_dict()}
+    data_map = {'Data': {}, 'Config': config.view()}
 
     """
     Argument location precedence:
@@ -73,6 +78,11 @@ def main(args, config_manager=None, queue_result=None):
     config.initialize_data(data_map)
     arguments.add_parameters(data_map)
 
+    # "IO_Trace": true (or "summary") saves the I/O latency summary of the devices, "full" also saves every call
+    io_trace = data_map['Data'].get('Initial', {}).get('IO_Trace')
+    # "Profile": "cprofile", "sampling" or "both" (or true) runs the scripts under the profiler(s)
+    profiler = ScriptProfiler.from_setting(data_map['Data'].get('Initial', {}).get('Profile'))
+
     print(("Running Experiment: " + config.name + "\n\n"))
     experiment_result, experiment_result_name = \
         results_manager.make_new_experiment_result(file_name, queue_result)
@@ -82,12 +92,24 @@ def main(args, config_manager=None, queue_result=None):
         if config.devices:
             device_setup = DeviceSetup()
             data_map['Devices'] = device_setup.connect_devices(config.devices, stack)
+            if io_trace and data_map['Devices']:
+                for device in data_map['Devices'].values():
+                    if hasattr(device, "enable_io_trace"):
+                        device.enable_io_trace()
 
         # save the config and the param file to the results directory
         experiment_result.add_json_file_dict("Config", data_map['Config'])
         if arguments.get_param_file():
             experiment_result.add_result_file(arguments.get_param_file())
-        spawn_scripts(config.experiment, data_map, experiment_result)
+        try:
+            spawn_scripts(config.experiment, data_map, experiment_result, profiler)
+        finally:
+            experiment_result.close_data_stores()
+            if profiler is not None:
+                profiler.save(experiment_result)
+                print(profiler.summary())
+            if io_trace and data_map.get('Devices'):
+                experiment_result.add_io_traces(data_map['Devices'], full_trace=io_trace == "full")
 
     experiment_result.end_experiment()
     results_manager.save_experiment_result(experiment_result_name, experiment_result)
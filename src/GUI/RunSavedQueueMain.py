@@ -0,0 +1,201 @@
+"""
+Runs saved queues from the command line, without a window and without importing wx, for unattended runs:
+
+    python -m src.GUI.RunSavedQueueMain Device_Test Eyescan_Series --log overnight.log --continue-on-error
+
+A run that stopped part way through (a reboot, a crash, or failed experiments) is resumed from its checkpoint with:
+
+    python -m src.GUI.RunSavedQueueMain --resume queue_result_y2020_m02_d18_h15_m05_s20_us511574
+
+Exit codes: 0 every experiment finished, 1 an experiment failed, 2 a queue could not be loaded, 3 the devices of a
+queue could not be connected
+"""
+import argparse
+import os
+import sys
+
+# plots are saved to files from the queue thread, so there is no need for an interactive matplotlib backend
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from src.GUI.Util import Globals
+from src.GUI.Util.CONSTANTS import SAVED_QUEUES_DIR
+from src.GUI.Util.Timestamp import Timestamp
+
+EXIT_SUCCESS = 0
+EXIT_EXPERIMENT_FAILED = 1
+EXIT_QUEUE_NOT_LOADED = 2
+EXIT_DEVICES_NOT_CONNECTED = 3
+
+
+class Tee:
+    """
+    Writes everything written to it to both a stream and a log file, so progress shows on the console and is kept
+    """
+
+    def __init__(self, stream, log_file):
+        self.stream = stream
+        self.log_file = log_file
+
+    def write(self, text):
+        self.stream.write(text)
+        self.log_file.write(text)
+        # flushed every line so the log is complete up to the moment a run stops, even if the process is killed
+        if "\n" in text:
+            self.log_file.flush()
+
+    def flush(self):
+        self.stream.flush()
+        self.log_file.flush()
+
+
+def saved_queue_path(name):
+    """
+    :param name: a path to a saved queue file, or the name of one in Saved_Queues, with or without "Saved_Queue_"
+    :return: the path of the saved queue file
+    """
+    if os.path.isfile(name):
+        return name
+    name = name.replace(" ", "_")
+    if not name.startswith("Saved_Queue_"):
+        name = "Saved_Queue_" + name
+    return os.path.join(SAVED_QUEUES_DIR, name)
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description="Run saved queues without the GUI")
+    parser.add_argument("queues", nargs="*",
+                        help="saved queue files, or names of queues in the Saved_Queues folder, run in order")
+    parser.add_argument("--resume", action="append", default=[], metavar="QUEUE_RESULT",
+                        help="run the experiments a stopped run did not finish, given the name of its queue result or "
+                             "its checkpoint file, or \"last\" for the most recent. Run before the queues")
+    parser.add_argument("-l", "--log", help="also write all output to this file")
+    parser.add_argument("-r", "--results", help="save results in this directory instead of Results")
+    parser.add_argument("-k", "--continue-on-error", action="store_true",
+                        help="keep running the rest of a queue after an experiment fails")
+    parser.add_argument("--stop-on-failure", action="store_true",
+                        help="do not run the remaining queues once one has failed")
+    parser.add_argument("--simulate", action="store_true",
+                        help="connect every device to a simulated instrument")
+    parser.add_argument("--profile", choices=["cprofile", "sampling", "both"],
+                        help="profile the scripts of every experiment")
+    arguments = parser.parse_args(args)
+    if not arguments.queues and not arguments.resume:
+        parser.error("give at least one queue to run or one run to --resume")
+    return arguments
+
+
+def run_saved_queue(file_path, queue_manager, arguments):
+    """
+    :param file_path: the saved queue file to run
+    :param queue_manager: the QueueManager to run it with
+    :param arguments: the parsed command line arguments
+    :return: the exit code of the queue
+    """
+    try:
+        experiments = queue_manager.read_queue_from_file(file_path)
+    except Exception as e:
+        print("Could not load " + file_path + ": " + "{}: {}".format(type(e).__name__, e))
+        return EXIT_QUEUE_NOT_LOADED
+    if not experiments:
+        print("Could not load " + file_path + ": the file does not exist or is empty")
+        return EXIT_QUEUE_NOT_LOADED
+
+    queue_manager.clear_queue()
+    for experiment in experiments:
+        queue_manager.add_to_queue(experiment)
+
+    print("Running " + os.path.basename(file_path) + " (" + str(len(experiments)) + " experiments)")
+    try:
+        runner = queue_manager.run_queue(queue_manager.experiment_queue, profile=arguments.profile,
+                                         continue_on_error=arguments.continue_on_error, wait=True)
+    except Exception as e:
+        print(os.path.basename(file_path) + " stopped: " + "{}: {}".format(type(e).__name__, e))
+        return EXIT_EXPERIMENT_FAILED
+    finally:
+        queue_manager.clear_queue()
+    return runner_exit_code(runner)
+
+
+def resume_run(name, queue_manager, arguments):
+    """
+    :param name: the queue result name or checkpoint file of the run to resume, or "last"
+    :param queue_manager: the QueueManager to run it with
+    :param arguments: the parsed command line arguments
+    :return: the exit code of the run
+    """
+    from src.GUI.Model.QueueCheckpoint import QueueCheckpoint
+    if name == "last":
+        checkpoints = QueueCheckpoint.list_checkpoints()
+        if not checkpoints:
+            print("There is no stopped run to resume")
+            return EXIT_QUEUE_NOT_LOADED
+        name = checkpoints[0]
+    print("Resuming " + name)
+    try:
+        runner = queue_manager.resume_queue(name, profile=arguments.profile,
+                                            continue_on_error=arguments.continue_on_error, wait=True)
+    except (OSError, ValueError) as e:
+        print("Could not load the checkpoint of " + name + ": " + "{}: {}".format(type(e).__name__, e))
+        return EXIT_QUEUE_NOT_LOADED
+    except Exception as e:
+        print(name + " stopped: " + "{}: {}".format(type(e).__name__, e))
+        return EXIT_EXPERIMENT_FAILED
+    return runner_exit_code(runner)
+
+
+def runner_exit_code(runner):
+    """
+    :param runner: a QueueRunner that finished
+    :return: the exit code of its queue
+    """
+    if ("Queue", "not all devices were connected") in runner.failures:
+        return EXIT_DEVICES_NOT_CONNECTED
+    for name, error in runner.failures:
+        print("FAILED " + name + ": " + error)
+    return EXIT_EXPERIMENT_FAILED if runner.failures else EXIT_SUCCESS
+
+
+def main(args=None):
+    """
+    :param args: the command line arguments, without the program name, run with --help to see them
+    :return: the exit code, the worst of the exit codes of the queues that were run
+    """
+    arguments = parse_args(sys.argv[1:] if args is None else args)
+
+    log_file = None
+    stdout, stderr = sys.stdout, sys.stderr
+    if arguments.log:
+        log_file = open(arguments.log, "a")
+        sys.stdout = Tee(stdout, log_file)
+        sys.stderr = Tee(stderr, log_file)
+
+    from src.GUI.Application.SystemConfigManager import SystemConfigManager
+    Globals.systemConfigManager = SystemConfigManager()
+    Globals.simulate_all_devices = arguments.simulate
+    if arguments.results:
+        if not os.path.isdir(arguments.results):
+            os.makedirs(arguments.results)
+        Globals.systemConfigManager.get_results_manager().results_directory = arguments.results
+    queue_manager = Globals.systemConfigManager.get_queue_manager()
+
+    exit_code = EXIT_SUCCESS
+    runs = [(name, resume_run) for name in arguments.resume] + \
+           [(saved_queue_path(name), run_saved_queue) for name in arguments.queues]
+    try:
+        for name, run in runs:
+            print("[" + str(Timestamp()) + "] " + name)
+            queue_exit_code = run(name, queue_manager, arguments)
+            print("[" + str(Timestamp()) + "] " + name + (" finished" if queue_exit_code == EXIT_SUCCESS else
+                                                           " failed with exit code " + str(queue_exit_code)))
+            exit_code = max(exit_code, queue_exit_code)
+            if exit_code != EXIT_SUCCESS and arguments.stop_on_failure:
+                break
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+        if log_file is not None:
+            log_file.close()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,6 +16,13 @@ class ExperimentListPanel(DisplayPanel):
         """
         DisplayPanel.__init__(self, parent)
         self.root = None
+        # True while the tree shows the results of a search instead of the queues
+        self.searching = False
+
+        # searches the results catalog, for example "name=Eyescan_Tcl AND Vertical_Step=2 AND date>2020-02-01"
+        self.search_box = wx.SearchCtrl(self, style=wx.TE_PROCESS_ENTER)
+        self.search_box.SetDescriptiveText("Search results, e.g. name=Eyescan_Tcl AND link=12 AND date>2020-02-01")
+        self.search_box.ShowCancelButton(True)
 
         self.tree_box = wx.TreeCtrl(self)
         # self.list_box_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -39,11 +46,15 @@ class ExperimentListPanel(DisplayPanel):
 
         self.sizer = wx.BoxSizer(wx.VERTICAL)
         self.SetSizer(self.sizer)
+        self.sizer.Add(self.search_box, 0, wx.EXPAND | wx.ALL)
         self.sizer.Add(self.tree_box, 5, wx.EXPAND | wx.ALL)
         # self.sizer.Add(self.run_button, 1, wx.EXPAND | wx.ALL)
 
         # Runs the selected function when an experiment is selected
         self.Bind(wx.EVT_TREE_SEL_CHANGED, self.selected)
+        self.search_box.Bind(wx.EVT_TEXT_ENTER, self.search)
+        self.search_box.Bind(wx.EVT_SEARCHCTRL_SEARCH_BTN, self.search)
+        self.search_box.Bind(wx.EVT_SEARCHCTRL_CANCEL_BTN, self.clear_search)
         # self.Bind(wx.EVT_BUTTON, self.reload)
         # self.Bind(wx.EVT_TIMER, self.reload, self.Parent.Parent.Parent.Parent.timer)
 
@@ -73,11 +84,47 @@ class ExperimentListPanel(DisplayPanel):
             self.add_queue_to_view(que_result)
         self.tree_box.ExpandAll()
 
+    def search(self, event):
+        """
+        Replaces the queues in the tree with the experiment results that match the search box, the most recent first
+        :param event: The event that caused the call
+        """
+        text = self.search_box.GetValue().strip()
+        if not text:
+            self.clear_search(event)
+            return
+        catalog = Globals.systemConfigManager.get_results_manager().catalog
+        self.tree_box.DeleteAllItems()
+        self.searching = True
+        try:
+            runs = catalog.search(text)
+        except Exception as e:
+            self.root = self.tree_box.AddRoot("Could not search for " + text + ": " + str(e))
+            return
+        self.root = self.tree_box.AddRoot(str(len(runs)) + " results for " + text)
+        for run in runs:
+            self.tree_box.AppendItem(self.root, run["name"])
+        self.tree_box.ExpandAll()
+
+    def clear_search(self, event):
+        """
+        Shows every queue in the tree again
+        :param event: The event that caused the call
+        """
+        self.search_box.SetValue("")
+        self.searching = False
+        self.tree_box.DeleteAllItems()
+        self.load_queues()
+
     def append_just_run_queue(self):
         """
         Will be called when a queue has just been finished running
         Expands the control to make it visible to a user who does not know how to use tree views
         """
+        if self.searching:
+            # the tree holds search results, not queues, so the queues are shown again, the one just run with them
+            self.clear_search(None)
+            return
         queue_result = Globals.systemConfigManager.get_results_manager().get_queue_results()[-1]
         result_root = self.add_queue_to_view(queue_result)
         self.tree_box.Expand(result_root)
@@ -0,0 +1,79 @@
+import os
+import wx
+from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg
+from matplotlib.figure import Figure
+
+from src.GUI.Model.ResultFileReader import open_result_file
+from src.GUI.Util import CONSTANTS
+
+
+class ResultTable(wx.ListCtrl):
+    """
+    A virtual list that asks the reader for rows one page at a time as they are scrolled into view
+    """
+
+    def __init__(self, parent, reader):
+        wx.ListCtrl.__init__(self, parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_HRULES | wx.LC_VRULES)
+        self.reader = reader
+        self.page_start = -1
+        self.page = []
+
+        for column, label in enumerate(reader.get_column_labels()[:CONSTANTS.RESULT_VIEWER_MAX_COLUMNS]):
+            self.InsertColumn(column, label)
+        self.SetItemCount(reader.get_row_count())
+
+    def OnGetItemText(self, item, column):
+        page_size = CONSTANTS.RESULT_VIEWER_PAGE_SIZE
+        if not self.page_start <= item < self.page_start + len(self.page):
+            self.page_start = item - item % page_size
+            self.page = self.reader.get_rows(self.page_start, self.page_start + page_size)
+        row = self.page[item - self.page_start]
+        return row[column] if column < len(row) else ""
+
+
+class ResultFileViewer(wx.Frame):
+    """
+    A window showing a decimated plot and a paged table of a result file. The file is memory-mapped (or indexed if it
+    is a csv file), so only the parts of it that are shown are ever read.
+    """
+
+    def __init__(self, parent, path):
+        """
+        :param parent: the window that opened the viewer
+        :param path: the result file to show
+        """
+        wx.Frame.__init__(self, parent, title=os.path.basename(path), size=CONSTANTS.RESULT_VIEWER_SIZE)
+        self.reader = open_result_file(path)
+
+        notebook = wx.Notebook(self)
+        self.figure = Figure()
+        self.canvas = FigureCanvasWxAgg(notebook, -1, self.figure)
+        self.table = ResultTable(notebook, self.reader)
+        notebook.AddPage(self.canvas, "Preview")
+        notebook.AddPage(self.table, "Table ({} rows)".format(self.reader.get_row_count()))
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(notebook, 1, wx.EXPAND | wx.ALL)
+        self.SetSizer(sizer)
+
+        self.draw_preview()
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+
+    def draw_preview(self):
+        """
+        Plot the min/max envelope of each series so peaks survive the decimation
+        """
+        axes = self.figure.add_subplot(111)
+        for label, x, low, high in self.reader.get_preview(CONSTANTS.RESULT_VIEWER_PREVIEW_POINTS):
+            line, = axes.plot(x, high, label=label, linewidth=0.8)
+            if high is not low:
+                axes.fill_between(x, low, high, color=line.get_color(), alpha=0.3, linewidth=0)
+        if axes.lines:
+            axes.legend(loc="upper right", fontsize="small")
+        else:
+            axes.text(0.5, 0.5, "No numeric data to plot", ha="center", va="center", transform=axes.transAxes)
+        self.canvas.draw()
+
+    def on_close(self, event):
+        self.reader.close()
+        event.Skip()
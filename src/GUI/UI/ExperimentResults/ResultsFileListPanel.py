@@ -48,10 +48,18 @@ class ResultsFileListPanel(wx.StaticBox):
 
     def on_result_select(self, event):
         """
-        Opens the file selected using the operating system, then deselects the selection
+        Opens the file selected in the result viewer if it is a data file the viewer can show, otherwise opens it
+        using the operating system, then deselects the selection
         :param event: The event that caused the call
         """
         clicked_label_position = self.list_box.GetSelection()
+        path = self.displayed_files[clicked_label_position]
 
-        os.startfile("\"{}\"".format(self.displayed_files[clicked_label_position]))
+        # imported here so numpy and the matplotlib wx backend only load once a result is opened
+        from src.GUI.Model.ResultFileReader import VIEWABLE_EXTENSIONS
+        from src.GUI.UI.ExperimentResults.ResultFileViewer import ResultFileViewer
+        if os.path.isfile(path) and os.path.splitext(path)[1].lower() in VIEWABLE_EXTENSIONS:
+            ResultFileViewer(self, path).Show()
+        else:
+            os.startfile("\"{}\"".format(path))
         self.list_box.Deselect(self.list_box.GetSelection())
@@ -2,6 +2,7 @@ import wx
 import os
 
 from src.GUI.UI.DisplayPanel import DisplayPanel
+from src.GUI.Model.QueueCheckpoint import QueueCheckpoint
 from src.GUI.Util.CONSTANTS import LIST_PANEL_COLOR, LIST_PANEL_FOREGROUND_COLOR, SAVED_QUEUES_DIR
 import src.GUI.Util.Globals as Globals
 
@@ -29,6 +30,10 @@ class QueuePanel(DisplayPanel):
         self.clear_button.SetLabelText("Clear Queue")
         self.clear_button.Disable()
 
+        self.resume_button = wx.Button(self)
+        self.resume_button.SetLabelText("Resume Stopped Queue")
+        self.resume_button.Enable(len(QueueCheckpoint.list_checkpoints()) > 0)
+
         self.save_button = wx.Button(self)
         self.save_button.SetLabelText("Save Queue")
         self.save_button.Disable()
@@ -48,6 +53,7 @@ class QueuePanel(DisplayPanel):
 
         self.midbar = wx.BoxSizer(wx.HORIZONTAL)
         self.midbar.Add(self.clear_button, 1, wx.EXPAND | wx.ALL)
+        self.midbar.Add(self.resume_button, 1, wx.EXPAND | wx.ALL)
 
         self.btn_sizer = wx.BoxSizer(wx.VERTICAL)
         self.btn_sizer.Add(self.save_button, 1, wx.EXPAND | wx.ALL)
@@ -85,6 +91,7 @@ class QueuePanel(DisplayPanel):
         self.save_button.Bind(wx.EVT_BUTTON, self.save_queue)
         self.load_button.Bind(wx.EVT_BUTTON, self.load_queue)
         self.clear_button.Bind(wx.EVT_BUTTON, self.clear_queue)
+        self.resume_button.Bind(wx.EVT_BUTTON, self.resume_queue)
 
     def reload(self):
         """
@@ -135,9 +142,34 @@ class QueuePanel(DisplayPanel):
         :param event: The triggering event.
         """
         ui_control = Globals.systemConfigManager.get_ui_controller()
+        log_sink = None
+        if ui_control is not None:
+            ui_control.switch_queue_to_running()
+            log_sink = ui_control.log_sink
+        Globals.systemConfigManager.get_queue_manager().run(log_sink=log_sink)
+
+    def resume_queue(self, event):
+        """
+        Runs the rest of the most recent queue that stopped before it finished, after asking to confirm
+        :param event: The triggering event.
+        """
+        checkpoints = QueueCheckpoint.list_checkpoints()
+        if not checkpoints:
+            self.resume_button.Disable()
+            return
+        checkpoint = QueueCheckpoint.load(checkpoints[0])
+        dialog = wx.MessageDialog(None, "Resume " + checkpoint.queue_result_name + " started " +
+                                  checkpoint.start_datetime + "? " + str(len(checkpoint.completed)) +
+                                  " experiments were already completed.", "Resume Queue", wx.YES_NO | wx.NO_DEFAULT)
+        if dialog.ShowModal() != wx.ID_YES:
+            return
+        self.resume_button.Disable()
+        ui_control = Globals.systemConfigManager.get_ui_controller()
+        log_sink = None
         if ui_control is not None:
             ui_control.switch_queue_to_running()
-        Globals.systemConfigManager.get_queue_manager().run()
+            log_sink = ui_control.log_sink
+        Globals.systemConfigManager.get_queue_manager().resume_queue(checkpoint.queue_result_name, log_sink=log_sink)
 
     def clear_queue(self, event):
         """
@@ -1,4 +1,3 @@
-import wx
 from os.path import dirname, join, abspath
 
 
@@ -26,17 +25,37 @@ RESULTS_FILE_PANEL_PROPORTION = 1
 TEST_BUILD_PANEL_PROPORTION = 1
 TEST_BUTTON_PANEL_PROPORTION = 3
 
-TEST_BUILD_PANEL_COLOR = wx.Colour(255, 200, 100)
-TEST_BUILD_PANEL_FOREGROUND_COLOR = wx.Colour(0, 0, 0)
+# The colours are made the first time they are used, so the parts of PTCS without a window can import this module
+# on a machine that does not have wx
+_COLORS = {
+    "TEST_BUILD_PANEL_COLOR": lambda wx: wx.Colour(255, 200, 100),
+    "TEST_BUILD_PANEL_FOREGROUND_COLOR": lambda wx: wx.Colour(0, 0, 0),
 
-LIST_PANEL_COLOR = wx.Colour(50, 50, 50)
-LIST_PANEL_FOREGROUND_COLOR = wx.WHITE#wx.Colour(100, 100, 100)
+    "LIST_PANEL_COLOR": lambda wx: wx.Colour(50, 50, 50),
+    "LIST_PANEL_FOREGROUND_COLOR": lambda wx: wx.WHITE,  # wx.Colour(100, 100, 100)
 
-CONTROL_PANEL_COLOR = wx.WHITE
-CONTROL_PANEL_FOREGROUND_COLOR = wx.BLACK#wx.Colour(100, 100, 100)
+    "CONTROL_PANEL_COLOR": lambda wx: wx.WHITE,
+    "CONTROL_PANEL_FOREGROUND_COLOR": lambda wx: wx.BLACK,  # wx.Colour(100, 100, 100)
+}
+
+
+def __getattr__(name):
+    if name in _COLORS:
+        import wx
+        globals()[name] = _COLORS[name](wx)
+        return globals()[name]
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
 
 LABEL_PROPORTION = .1
 
+RESULT_VIEWER_SIZE = (900, 600)
+RESULT_VIEWER_PREVIEW_POINTS = 2000
+RESULT_VIEWER_PAGE_SIZE = 200
+RESULT_VIEWER_MAX_COLUMNS = 64
+
+# the queue output panel only keeps the last this many characters
+QUEUE_OUTPUT_MAX_CHARACTERS = 1000000
+
 # directories of interest
 PROJ_DIR = dirname(dirname(dirname(dirname(abspath(__file__)))))
 TEMP_DIR = join(join(PROJ_DIR, "System"), "temp")
@@ -47,11 +66,29 @@ DRIVERS_DIR = join(join(PROJ_DIR, "src"), "Instruments")
 RESULTS_DIR = join(PROJ_DIR, "Results")
 DEVICES_CONFIG = join(join(PROJ_DIR, "System"), "Devices.json")
 RESULTS_CONFIG_DIR = join(join(PROJ_DIR, "System"), "ResultsConfiguration")
+CHECKPOINTS_DIR = join(join(PROJ_DIR, "System"), "Checkpoints")
+SETTLE_TIMES_FILE = join(join(PROJ_DIR, "System"), "Settle_Times.json")
+
+# The seconds a device has to answer each call while it is connected to, unless its "Connect_Timeout" in Devices.json
+# says otherwise
+DEVICE_CONNECT_TIMEOUT = 10
+
+# The seconds the VISA resources found are used for before they are looked for again
+VISA_DISCOVERY_TTL = 300
+
+# If true, the devices a queue connects to stay connected from one experiment to the next, and the ones that are idle
+# are asked if they are still there every DEVICE_KEEPALIVE_INTERVAL seconds, so a broken connection is opened again
+# before the experiment that needs it
+POOL_DEVICE_SESSIONS = True
+DEVICE_KEEPALIVE_INTERVAL = 30
 CONFIG_SCHEMA_FILE_NAME = join(join(PROJ_DIR, "System"), "ConfigFileValidationSchema.json")
 DEVICES_SCHEMA_FILE_NAME = join(join(PROJ_DIR, "System"), "DevicesFileValidationSchema.json")
 CUSTOM_TESTS_DIR = join(PROJ_DIR, "Custom_Tests")
 
 VIVADO_LOCATION = "C:/Xilinx/Vivado/2017.4/bin/vivado"
+# The command that starts the Vivado Tcl session the Tcl experiments run in. It reads Tcl from its standard input, so
+# tclsh can stand in for it when there is no hardware
+VIVADO_TCL_COMMAND = VIVADO_LOCATION + " -mode tcl -nojournal -nolog"
 
 EXPERIMENT_QUEUE_RESULT_ROOT = "Experiment Queues"
 
@@ -1,3 +1,5 @@
+import json
+import os
 
 
 def clean_name_for_file(name):
@@ -9,3 +11,19 @@ def clean_name_for_file(name):
         else:
             name_new += letter
     return name_new
+
+
+def write_json_atomic(path, data):
+    """
+    Write data to a JSON file so that the file always holds either the old or the new data in full, even if the
+    process or the PC stops part way through. The data is written to a temporary file next to it, flushed to disk,
+    then renamed over it
+    :param path: the JSON file to write
+    :param data: what to write, values that JSON does not support are written as strings
+    """
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(data, f, indent=4, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_path, path)
@@ -1 +1,3 @@
 systemConfigManager = None
+# when True every device is connected to a simulated instrument, whatever its Type in Devices.json is
+simulate_all_devices = False
@@ -0,0 +1,111 @@
+import threading
+from collections import deque
+
+# The number of writes kept waiting for the next flush, older ones are dropped if the output cannot keep up
+LOG_SINK_CAPACITY = 20000
+
+# Seconds between flushes to the output
+LOG_SINK_INTERVAL = 0.1
+
+
+class LogSink:
+    """
+    A file-like object that sys.stdout can be set to, so worker threads can print without touching the GUI.
+    Writes only append to a bounded ring buffer, a background thread hands what was written to on_flush in batches
+    every interval seconds. Everything written is also teed to a log file while one is open.
+    """
+
+    def __init__(self, on_flush=None, capacity=LOG_SINK_CAPACITY, interval=LOG_SINK_INTERVAL):
+        """
+        :param on_flush: called from the flush thread with the text written since the last flush. For a widget, this
+        should hand the text over to the GUI thread with wx.CallAfter
+        :param capacity: the number of writes kept waiting for a flush
+        :param interval: the seconds between flushes
+        """
+        self.on_flush = on_flush
+        self.interval = interval
+        self._pending = deque(maxlen=capacity)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._log_file = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def write(self, text):
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(text)
+            if self._log_file is not None:
+                self._log_file.write(text)
+        return len(text)
+
+    def flush(self):
+        """
+        Nothing to do, the flush thread sends the text on. This is here so the sink can stand in for sys.stdout
+        """
+        pass
+
+    def isatty(self):
+        return False
+
+    def drain(self):
+        """
+        :return: everything written since the last drain, with a note of how many writes were dropped if the ring
+        buffer overflowed
+        """
+        with self._lock:
+            chunks = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+            if self._log_file is not None:
+                self._log_file.flush()
+        text = "".join(chunks)
+        if dropped:
+            text = "[" + str(dropped) + " writes were dropped, see the log file for all of the output]\n" + text
+        return text
+
+    def _flush_to_output(self):
+        text = self.drain()
+        if text and self.on_flush is not None:
+            self.on_flush(text)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self._flush_to_output()
+        self._flush_to_output()
+
+    def start(self):
+        """
+        Start the thread that flushes to on_flush
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="LogSink", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Flush what is left, then stop the flush thread and close the log file
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.close_log_file()
+
+    def open_log_file(self, path):
+        """
+        Tee everything written from now on to a file, closing the one that was open
+        :param path: the file to append the output to
+        """
+        log_file = open(path, "a")
+        with self._lock:
+            previous, self._log_file = self._log_file, log_file
+        if previous is not None:
+            previous.close()
+
+    def close_log_file(self):
+        with self._lock:
+            log_file, self._log_file = self._log_file, None
+        if log_file is not None:
+            log_file.close()
@@ -0,0 +1,162 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+from src.GUI.Util.Functions import clean_name_for_file
+
+# The values of the "Profile" setting and the profilers they turn on
+PROFILE_MODES = {
+    "cprofile": (True, False),
+    "sampling": (False, True),
+    "both": (True, True),
+}
+
+
+class StackSampler(threading.Thread):
+    """
+    Looks at the stack of one thread every interval seconds and counts how often each stack was seen. Unlike cProfile
+    this does not slow down every function call of the profiled thread, so it shows where time goes in scripts that
+    make many small calls.
+    """
+
+    def __init__(self, thread_id, interval=0.005, root_code=None):
+        """
+        :param thread_id: the threading.get_ident() of the thread to sample
+        :param interval: the seconds between samples
+        :param root_code: the code object of the function the stacks start under, the frames of it and its callers are
+        left out of every stack
+        """
+        threading.Thread.__init__(self, daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        return code.co_name + " (" + os.path.basename(code.co_filename) + ":" + str(code.co_firstlineno) + ")"
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.root_code:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self):
+        """
+        :return: the samples in the collapsed stack format read by flamegraph.pl and speedscope, one
+        "outer;...;inner count" line per stack
+        """
+        return "".join(stack + " " + str(count) + "\n" for stack, count in self.stacks.most_common())
+
+    def hotspots(self, count):
+        """
+        :return: (function, samples) of the count functions that were most often at the top of the stack
+        """
+        leaves = Counter()
+        for stack, samples in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += samples
+        return leaves.most_common(count)
+
+
+class ScriptProfiler:
+    """
+    Runs the scripts of an experiment under cProfile, the stack sampler, or both, and saves what they found into the
+    experiment's results
+    """
+
+    def __init__(self, use_cprofile=True, use_sampling=True, sample_interval=0.005, top_count=15):
+        """
+        :param use_cprofile: record every call made by the scripts with cProfile
+        :param use_sampling: sample the stack of the scripts every sample_interval seconds
+        :param sample_interval: the seconds between stack samples
+        :param top_count: the number of hotspots printed for each script
+        """
+        self.use_cprofile = use_cprofile
+        self.use_sampling = use_sampling
+        self.sample_interval = sample_interval
+        self.top_count = top_count
+        # (script source, cProfile.Profile or None, StackSampler or None) of every script run so far
+        self.runs = []
+
+    @classmethod
+    def from_setting(cls, setting):
+        """
+        :param setting: the "Profile" value of an experiment's data: "cprofile", "sampling", "both" or true for both
+        :return: a ScriptProfiler, or None if profiling is off
+        """
+        if not setting:
+            return None
+        if isinstance(setting, str) and setting.lower() in PROFILE_MODES:
+            use_cprofile, use_sampling = PROFILE_MODES[setting.lower()]
+        else:
+            use_cprofile, use_sampling = PROFILE_MODES["both"]
+        return cls(use_cprofile, use_sampling)
+
+    def run(self, source, function, *args):
+        """
+        Call function(*args) under the profilers
+        :param source: the file name of the script the function is from
+        :return: what function returned
+        """
+        profile = cProfile.Profile() if self.use_cprofile else None
+        sampler = None
+        if self.use_sampling:
+            sampler = StackSampler(threading.get_ident(), self.sample_interval, ScriptProfiler.run.__code__)
+        self.runs.append((source, profile, sampler))
+        if sampler is not None:
+            sampler.start()
+        if profile is not None:
+            profile.enable()
+        try:
+            return function(*args)
+        finally:
+            if profile is not None:
+                profile.disable()
+            if sampler is not None:
+                sampler.stop()
+
+    def save(self, experiment_result):
+        """
+        Save a Profile_<script>.prof (readable by pstats and snakeviz) and a Profile_<script>_Stacks.txt of collapsed
+        stacks for every script that was run
+        :param experiment_result: the ExperimentResultsModel to save into
+        """
+        for source, profile, sampler in self.runs:
+            file_name = "Profile_" + clean_name_for_file(source[:-3])
+            if profile is not None:
+                experiment_result.add_profile(file_name, profile)
+            if sampler is not None:
+                experiment_result.add_text_file(file_name + "_Stacks", sampler.collapsed())
+
+    def summary(self):
+        """
+        :return: the top_count hotspots of every script that was run, as text
+        """
+        text = ""
+        for source, profile, sampler in self.runs:
+            text += "Profile of " + source + "\n"
+            if profile is not None:
+                stream = io.StringIO()
+                pstats.Stats(profile, stream=stream).sort_stats("tottime").print_stats(self.top_count)
+                text += stream.getvalue()
+            if sampler is not None:
+                total = sum(sampler.stacks.values())
+                text += "    " + str(total) + " stack samples, most often running:\n"
+                for function, samples in sampler.hotspots(self.top_count):
+                    text += "    {:6.1%}  {}\n".format(samples / total, function)
+        return text
@@ -1,7 +1,3 @@
-import win32com.client
-import win32com
-import matplotlib.pyplot as plt
-
 from src.Instruments.IPDriver import IPDriver
 
 
@@ -11,11 +7,21 @@ class Agilent_16802A(IPDriver):
     """
 
     def __init__(self, IP):
+        """
+        :param IP: the address of the logic analyzer, or an object already standing in for the COM instrument
+        (a simulated logic analyzer for example), which is used as it is
+        """
+        if isinstance(IP, str):
+            import win32com.client
+            self.connect = win32com.client.Dispatch("AgtLA.Connect")
+            device = self.connect.GetInstrument(IP)
+        else:
+            self.connect = None
+            device = IP
+            IP = device.IP
         IPDriver.__init__(self, IP)
         self.name += "Agilent 16802A Logic Analyzer"
 
-        self.connect = win32com.client.Dispatch("AgtLA.Connect")
-        device = self.connect.GetInstrument(IP)
         self.device = device
         self.module = None
         self.busSignals = None
@@ -64,6 +70,16 @@ class Agilent_16802A(IPDriver):
             if self.busSignals.Item(index).Name == bus_name:
                 return self.busSignals.Item(index)
 
+    def _cast_to_sample_data(self, bus_data):
+        """
+        :param bus_data: the BusSignalData of a bus
+        :return: the data as an ISampleBusSignalData. Objects that are not COM objects already have its methods
+        """
+        if self.connect is None:
+            return bus_data
+        import win32com.client
+        return win32com.client.CastTo(bus_data, "ISampleBusSignalData")
+
     def get_bus_data(self, bus, output_chars=True):
         """
         Gets the data associated with a bus from the last sample
@@ -77,7 +93,7 @@ class Agilent_16802A(IPDriver):
         bus_data = inner_bus.BusSignalData
         bus_type = inner_bus.BusSignalType
         if bus_data.Type == "Sample":
-            sample_data = win32com.client.CastTo(bus_data, "ISampleBusSignalData")
+            sample_data = self._cast_to_sample_data(bus_data)
             result = sample_data.GetDataByTime(-float("inf"), float("inf"), bus_type)[0]
             if not output_chars:
                 result = [ord(i) for i in result]
@@ -94,7 +110,7 @@ class Agilent_16802A(IPDriver):
             inner_bus = self.get_bus(bus)
         bus_data = inner_bus.BusSignalData
         if bus_data.Type == "Sample":
-            sample_data = win32com.client.CastTo(bus_data, "ISampleBusSignalData")
+            sample_data = self._cast_to_sample_data(bus_data)
             bus_start_time = sample_data.StartTime
             bus_end_time = sample_data.EndTime
             bus_sample_count = (abs(sample_data.StartSample) + abs(sample_data.EndSample))
@@ -150,6 +166,7 @@ class Agilent_16802A(IPDriver):
             inner_bus = self.get_bus(bus)
         points = self.attach_time_to_sample(inner_bus, False)
 
+        import matplotlib.pyplot as plt
         plt.plot(points[0], points[1])
 
         plt.show()
@@ -1,5 +1,4 @@
 from src.Instruments.Prologix_GPIBtoUSBController import Prologix_GPIBtoUSBController
-import time
 
 MIN_POWER = -20.0
 MAX_POWER = 10.0
@@ -21,6 +20,10 @@ TENTHS = .1
 
 class Ando_AQ4321D(Prologix_GPIBtoUSBController):
 
+    # apparently the instrument freezes for some seconds right after the laser is turned on in an indeterminate number
+    # of cases, so it is asked again after a short while until it answers
+    SETTLE_PROFILES = {"laser_on": {"Timeout": 10.0, "Initial_Delay": 0.2, "Interval": 0.2, "Max_Interval": 1.0}}
+
     def __init__(self, device):
         Prologix_GPIBtoUSBController.__init__(self)
         self.device = device
@@ -50,13 +53,13 @@ class Ando_AQ4321D(Prologix_GPIBtoUSBController):
         """
         If run, every message read from the instrument will have a guaranteed \r\n on the end of it
         """
-        self._send_to_device("DELIM1")
+        self._set_register("DELIM", 1, lambda: self._send_to_device("DELIM1"))
 
     def turn_message_delimiters_off(self):
         """
         If run, there will not be a termination sequence of commands coming from the instrument
         """
-        self._send_to_device("DELIM0")
+        self._set_register("DELIM", 0, lambda: self._send_to_device("DELIM0"))
 
     def enter_password(self):
         """
@@ -74,20 +77,20 @@ class Ando_AQ4321D(Prologix_GPIBtoUSBController):
         """
         :return: The current wavelength setting in nm.
         """
-        return float(self._query_device("TWL?"))
+        return self._get_register("TWL", lambda: float(self._query_device("TWL?")))
 
     def set_wavelength(self, wavelength):
         """
         :param wavelength: The wavelength to set. 1520.000 to 1620.000 inclusive, up to the thousandths place.
         """
         self._check_float(wavelength, MIN_WAVELENGTH, MAX_WAVELENGTH, THOUSANDTHS)
-        self._send_to_device("TWL{}".format(wavelength))
+        self._set_register("TWL", float(wavelength), lambda: self._send_to_device("TWL{}".format(wavelength)))
 
     def get_optical_power(self):
         """
         :return: The current power setting in dBm
         """
-        return float(self._query_device("TPDB?"))
+        return self._get_register("TPDB", lambda: float(self._query_device("TPDB?")))
 
     def set_optical_power(self, optical_power):
         """
@@ -95,7 +98,7 @@ class Ando_AQ4321D(Prologix_GPIBtoUSBController):
         I had issues setting the power to 10 remotely though.
         """
         self._check_float(optical_power, MIN_POWER, MAX_POWER, TENTHS)
-        self._send_to_device("TPDB{}".format(optical_power))
+        self._set_register("TPDB", float(optical_power), lambda: self._send_to_device("TPDB{}".format(optical_power)))
 
     def _set_start_sweep_wavelength(self, wavelength):
         """
@@ -176,6 +179,8 @@ class Ando_AQ4321D(Prologix_GPIBtoUSBController):
         """
         starts the currently selected and configured sweep
         """
+        # the wavelength moves through the sweep, so it is no longer known
+        self.invalidate_shadow_registers("TWL")
         self._send_to_device("TSGL")
 
     def stop_sweep(self):
@@ -197,6 +202,7 @@ class Ando_AQ4321D(Prologix_GPIBtoUSBController):
         self._send_to_device("TCONT")
 
     def start_repeat_sweep(self):
+        self.invalidate_shadow_registers("TWL")
         self._send_to_device("TRET")
 
     def turn_laser_on(self):
@@ -205,9 +211,7 @@ class Ando_AQ4321D(Prologix_GPIBtoUSBController):
         """
         self._print("turning laser on")
         self._send_to_device("L1")
-        # apparently the instrument freezes for some seconds right after the laser is
-        # turned on in an indeterminate number of cases
-        time.sleep(3.5)
+        self.wait_until(self.check_connected, operation="laser_on")
 
     def turn_laser_off(self):
         """
@@ -1,4 +1,3 @@
-import time
 import numpy
 
 from src.Instruments.PyVisaDriver import PyVisaDriver
@@ -14,6 +13,9 @@ class Ando_AQ6317(PyVisaDriver):
     work only with the AQ4321 Laser.
     """
 
+    # a sweep can take minutes, so it is waited for without a timeout
+    SETTLE_PROFILES = {"sweep": {"Timeout": None, "Interval": 0.1, "Backoff": 1.5, "Max_Interval": 0.5}}
+
     def __init__(self, device):
         """
         Constructor method.
@@ -87,8 +89,11 @@ class Ando_AQ6317(PyVisaDriver):
         status = int(self.device.read_stb())
         print(('Status: %d' % status))
         print(('Scanning.'), end=' ')
-        while status == 0:
-            time.sleep(0.5)
-            status = int(self.device.read_stb())
+
+        def sweep_done():
             print(('.'), end=' ')
+            return int(self.device.read_stb()) != 0
+
+        if status == 0:
+            self.wait_until(sweep_done, operation="sweep")
         return True
@@ -311,7 +311,7 @@ class Anritsu_MP2100A(IEEE_488_2):
         last_character = self.device.read_bytes(1)
 
         self.device.read_termination = TERMINATION_CHARACTER
-        if last_character == TERMINATION_CHARACTER:
+        if last_character == TERMINATION_CHARACTER.encode():
             # it all went well
             return photo_bytes
         else:
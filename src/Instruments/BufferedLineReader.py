@@ -0,0 +1,110 @@
+import time
+
+# Used when the device does not say what its own timeout is, in seconds
+DEFAULT_TIMEOUT = 2.0
+
+
+class BufferedLineReader:
+    """
+    Reads the replies of a line based console (like the VCU108's UART) in large chunks.
+    Whatever is waiting in the device's buffer is taken in one read and split into lines in memory, so the time a
+    command takes depends on how fast the board answers rather than on one VISA read call per line.
+    """
+
+    def __init__(self, device, idle_timeout=0.05, poll_interval=0.002, termination="\n", encoding="ascii"):
+        """
+        :param device: an open PyVISA resource that has bytes_in_buffer and read_bytes (a serial resource)
+        :param idle_timeout: seconds without new data after which a reply with no end sentinel is considered done
+        :param poll_interval: seconds to wait before checking the buffer again when it is empty
+        :param termination: the character sequence ending each line
+        :param encoding: how to decode the bytes read from the device
+        """
+        self.device = device
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.termination = termination.encode(encoding)
+        self.encoding = encoding
+        self._buffer = bytearray()
+
+    def _get_device_timeout(self):
+        """
+        :return: the VISA timeout of the device in seconds
+        """
+        timeout = getattr(self.device, "timeout", None)
+        if isinstance(timeout, (int, float)):
+            return timeout / 1000.0
+        return DEFAULT_TIMEOUT
+
+    def _read_available(self):
+        """
+        :return: every byte waiting in the device's buffer, or an empty bytes object if there are none
+        """
+        waiting = self.device.bytes_in_buffer
+        if waiting > 0:
+            return self.device.read_bytes(waiting)
+        return b""
+
+    def iter_lines(self, sentinel=None, timeout=None, idle_timeout=None):
+        """
+        Yield the lines of a reply as they arrive.
+        If a sentinel is given, the reply ends with the line that contains it, which is yielded last. Otherwise the
+        reply ends once the device has been quiet for idle_timeout seconds after sending something.
+        VISA errors (an unplugged board for example) are not caught, so they end the read right away.
+        :param sentinel: text that marks the last line of the reply
+        :param timeout: the most seconds to wait for the first byte, or between bytes when a sentinel is given.
+        Defaults to the VISA timeout of the device
+        :param idle_timeout: overrides the idle timeout given to the constructor for this reply
+        :return: a generator of lines with the termination characters removed
+        """
+        if timeout is None:
+            timeout = self._get_device_timeout()
+        if idle_timeout is None:
+            idle_timeout = self.idle_timeout
+        received_any = len(self._buffer) > 0
+        last_data = time.time()
+
+        while True:
+            # hand out every complete line already in the buffer before going back to the device
+            end = self._buffer.find(self.termination)
+            while end >= 0:
+                line = bytes(self._buffer[:end]).decode(self.encoding, errors="replace").rstrip("\r")
+                del self._buffer[:end + len(self.termination)]
+                yield line
+                if sentinel is not None and sentinel in line:
+                    return
+                end = self._buffer.find(self.termination)
+
+            chunk = self._read_available()
+            if chunk:
+                self._buffer.extend(chunk)
+                received_any = True
+                last_data = time.time()
+                continue
+
+            quiet_for = time.time() - last_data
+            if sentinel is None and received_any and quiet_for >= idle_timeout:
+                if self._buffer:
+                    # the last line of the reply came without a termination character
+                    line = bytes(self._buffer).decode(self.encoding, errors="replace").rstrip("\r")
+                    self._buffer.clear()
+                    yield line
+                return
+            if quiet_for >= timeout:
+                raise TimeoutError("No reply from the device for {} seconds".format(timeout) +
+                                   ("" if sentinel is None else " while waiting for '{}'".format(sentinel)))
+            time.sleep(self.poll_interval)
+
+    def read_lines(self, sentinel=None, timeout=None, idle_timeout=None):
+        """
+        Read a whole reply, see iter_lines
+        :return: a list of the lines of the reply
+        """
+        return list(self.iter_lines(sentinel, timeout, idle_timeout))
+
+    def clear(self):
+        """
+        Throw away anything left over from a previous reply
+        """
+        self._buffer.clear()
+        while self._read_available():
+            pass
@@ -2,15 +2,24 @@ import re
 import inspect
 import abc
 
+from src.Instruments.Settling import SettleProfile, settle_times, wait_until
+from src.Instruments.ShadowRegisters import get_shadow_registers
+
 
 class EVTDriver(metaclass=abc.ABCMeta):
     """
     The base level abstract class for a driver used in this EVT project
     """
 
+    # The settings (see Settling.SETTLE_DEFAULTS) of the settle profile of each operation a driver waits on, used for
+    # any setting the "Settle" of its device in Devices.json does not have
+    SETTLE_PROFILES = {}
+
     def __init__(self):
         self.device = None  # your driver should set self.device after calling the super class constructor(s)
         self.name = ""
+        # operation to the settings of its settle profile, from the "Settle" of the device in Devices.json
+        self.settle_settings = {}
 
     @abc.abstractmethod
     def __enter__(self):
@@ -24,6 +33,128 @@ class EVTDriver(metaclass=abc.ABCMeta):
     def check_connected(self):
         pass
 
+    def set_settle_settings(self, settle_settings):
+        """
+        :param settle_settings: operation to the settings of its settle profile, from the "Settle" of the device in
+        Devices.json. They override the ones in SETTLE_PROFILES
+        """
+        self.settle_settings = settle_settings or {}
+
+    def settle_profile(self, operation):
+        """
+        :param operation: the name of the operation waited on, "laser_on" for example
+        :return: the SettleProfile to wait for the operation with
+        """
+        settings = dict(self.SETTLE_PROFILES.get(operation, {}), **self.settle_settings.get(operation, {}))
+        profile = SettleProfile.from_settings(settings)
+        if profile.auto_tighten:
+            profile = profile.tightened(settle_times.observed(type(self).__name__, operation))
+        return profile
+
+    def wait_until(self, predicate, timeout=None, backoff=None, operation=None):
+        """
+        Wait for the instrument to settle, asking it if it is ready less and less often, and returning as soon as it
+        is. The time it took is recorded, so a profile with Auto_Tighten waits less once enough waits were seen
+        :param predicate: a function with no arguments that asks the instrument and returns something true once it
+        is ready
+        :param timeout: the most seconds to wait, instead of the one of the settle profile
+        :param backoff: how many times longer each wait between asking is than the one before, instead of the one of
+        the settle profile
+        :param operation: the name of the operation waited on, for its settle profile and settle times
+        :return: what predicate returned
+        :raises SettleTimeout: if the instrument is not ready before the timeout
+        """
+        profile = self.settle_profile(operation)
+        if timeout is not None:
+            profile.timeout = timeout
+        if backoff is not None:
+            profile.backoff = backoff
+
+        def record(seconds):
+            if operation is not None:
+                settle_times.record(type(self).__name__, operation, seconds)
+
+        return wait_until(predicate, profile, record)
+
+    def shadow_registers(self):
+        """
+        :return: the ShadowRegisters of the instrument if they are turned on for it ("Shadow_Registers" of its device
+        in Devices.json), None if not
+        """
+        if self.device is None:
+            return None
+        return get_shadow_registers(type(self).__name__, self.device, self.shadow_address())
+
+    def shadow_address(self):
+        """
+        :return: the address that tells the instrument apart from the others on its connection, for its shadow
+        registers. None unless the connection is shared, like the one of a GPIB to USB adapter
+        """
+        return None
+
+    def invalidate_shadow_registers(self, register=None):
+        """
+        Forget a setting the instrument was known to have, or every one of them if register is None, after the
+        instrument changed it itself, was reset, or its state became unknown
+        """
+        registers = self.shadow_registers()
+        if registers is not None:
+            registers.invalidate(register)
+
+    def reinitialize(self):
+        """
+        Set the instrument up again the way the driver did when it was made, after the connection to it was opened
+        again. The settings it was known to have are forgotten first, so all of the setup is sent
+        """
+        self.invalidate_shadow_registers()
+        kept = {name: getattr(self, name) for name in ("settle_settings", "io_trace") if hasattr(self, name)}
+        type(self).__init__(self, self.device)
+        for name, value in kept.items():
+            setattr(self, name, value)
+
+    def _set_register(self, register, value, write):
+        """
+        Write a setting to the instrument, unless its shadow registers show it has the value already
+        :param register: the name of the setting, usually the header of the command that sets it
+        :param value: the value being set
+        :param write: a function with no arguments that writes the setting to the instrument
+        :return: True if the setting was written, False if it was skipped
+        """
+        registers = self.shadow_registers()
+        if registers is None:
+            write()
+            return True
+        if registers.matches(register, value):
+            return False
+        try:
+            write()
+        except Exception:
+            registers.invalidate()
+            raise
+        registers.set(register, value, written=True)
+        return True
+
+    def _get_register(self, register, read):
+        """
+        Get a setting of the instrument from its shadow registers, or ask the instrument if it is not known
+        :param register: the name of the setting, the same as the one it is set with
+        :param read: a function with no arguments that asks the instrument for the setting
+        :return: the value of the setting
+        """
+        registers = self.shadow_registers()
+        if registers is None:
+            return read()
+        known, value = registers.lookup(register)
+        if known:
+            return value
+        try:
+            value = read()
+        except Exception:
+            registers.invalidate()
+            raise
+        registers.set(register, value)
+        return value
+
     def what_can_i(self):
         """
         :return: all the methods that are able to be run by this class and all the classes that extend it that are not
@@ -26,6 +26,7 @@ class IEEE_488_2(PyVisaDriver):
         Restores the majority of the instrument's settings to their default values
         """
         self.device.write("*RST")
+        self.invalidate_shadow_registers()
 
     def clear_status(self):
         """
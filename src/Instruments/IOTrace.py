@@ -0,0 +1,178 @@
+import re
+import time
+
+import numpy as np
+
+# The number of calls kept for each device, older calls are overwritten once the buffer is full
+IO_TRACE_CAPACITY = 10000
+
+OPERATIONS = ("write", "query", "read", "read_bytes", "read_raw", "write_raw")
+
+# The header of a command, "MEAS:VOLT:DC" of "MEAS:VOLT:DC? CHAN1" or "TWL" of "TWL1550.000", so calls of the same
+# command with different values are summarized together
+COMMAND_HEADER = re.compile(r'^[^\s\d+\-,]*')
+
+
+def command_header(command):
+    if not command:
+        return ""
+    header = COMMAND_HEADER.match(command).group(0)
+    return header if header else command[:16]
+
+
+class IOTraceBuffer:
+    """
+    A ring buffer of the last capacity I/O calls made to one device. Every column is preallocated, so recording a call
+    only stores a few numbers and never allocates or grows anything while an experiment runs.
+    """
+
+    def __init__(self, device_name, capacity=IO_TRACE_CAPACITY):
+        """
+        :param device_name: the name of the device shown in the summary
+        :param capacity: the number of calls kept
+        """
+        self.device_name = device_name
+        self.capacity = capacity
+        # the number of calls recorded since the buffer was made, including the ones that were overwritten
+        self.count = 0
+        self._time = np.zeros(capacity)
+        self._latency = np.zeros(capacity)
+        self._operation = np.zeros(capacity, dtype=np.int8)
+        self._bytes_out = np.zeros(capacity, dtype=np.int64)
+        self._bytes_in = np.zeros(capacity, dtype=np.int64)
+        self._error = np.zeros(capacity, dtype=bool)
+        self._command = [None] * capacity
+
+    def record(self, operation, command, started, latency, bytes_out, bytes_in, error):
+        """
+        :param operation: the index of the operation in OPERATIONS
+        :param command: the text written to the device, None for reads
+        :param started: the time.time() the call started at
+        :param latency: the seconds the call took
+        :param bytes_out: the number of bytes written
+        :param bytes_in: the number of bytes read
+        :param error: True if the call raised an exception
+        """
+        index = self.count % self.capacity
+        self._time[index] = started
+        self._latency[index] = latency
+        self._operation[index] = operation
+        self._bytes_out[index] = bytes_out
+        self._bytes_in[index] = bytes_in
+        self._error[index] = error
+        self._command[index] = command
+        self.count += 1
+
+    def _order(self):
+        """
+        :return: the indexes of the recorded calls from oldest to newest
+        """
+        if self.count <= self.capacity:
+            return np.arange(self.count)
+        start = self.count % self.capacity
+        return np.concatenate((np.arange(start, self.capacity), np.arange(start)))
+
+    @staticmethod
+    def _latency_summary(latencies):
+        if len(latencies) == 0:
+            return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+        return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "mean": float(latencies.mean()),
+                "max": float(latencies.max())}
+
+    def summary(self):
+        """
+        :return: a JSON serializable dictionary with the latency percentiles (in seconds), byte counts and throughput of
+        the recorded calls of the device, in total and for each command header, slowest commands first
+        """
+        order = self._order()
+        latencies = self._latency[order]
+        total_bytes = int(self._bytes_out[order].sum() + self._bytes_in[order].sum())
+        busy = float(latencies.sum())
+
+        commands = {}
+        headers = [command_header(self._command[i]) or OPERATIONS[self._operation[i]] for i in order]
+        for header in set(headers):
+            mask = np.array([h == header for h in headers])
+            selected = order[mask]
+            command_summary = self._latency_summary(self._latency[selected])
+            command_summary["calls"] = int(mask.sum())
+            command_summary["seconds"] = float(self._latency[selected].sum())
+            command_summary["errors"] = int(self._error[selected].sum())
+            commands[header] = command_summary
+
+        summary = {
+            "device": self.device_name,
+            "calls": self.count,
+            "recorded": len(order),
+            "errors": int(self._error[order].sum()),
+            "seconds": busy,
+            "bytes_out": int(self._bytes_out[order].sum()),
+            "bytes_in": int(self._bytes_in[order].sum()),
+            "bytes_per_second": total_bytes / busy if busy > 0 else None,
+            "latency": self._latency_summary(latencies),
+            "commands": dict(sorted(commands.items(), key=lambda item: -item[1]["seconds"])),
+        }
+        return summary
+
+    def iter_records(self):
+        """
+        :return: a generator of [time, operation, command, latency, bytes out, bytes in, error] rows from oldest to
+        newest
+        """
+        for i in self._order():
+            yield [float(self._time[i]), OPERATIONS[self._operation[i]], self._command[i] or "",
+                   float(self._latency[i]), int(self._bytes_out[i]), int(self._bytes_in[i]), bool(self._error[i])]
+
+
+class TracedResource:
+    """
+    Stands in for a PyVISA resource and records every write, query and read made through it into an IOTraceBuffer.
+    Everything else, including setting attributes like read_termination, is passed straight to the resource.
+    """
+
+    def __init__(self, device, trace):
+        object.__setattr__(self, "_device", device)
+        object.__setattr__(self, "_trace", trace)
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._device, name, value)
+
+    def untraced(self):
+        """
+        :return: the resource the calls are passed to
+        """
+        return self._device
+
+    def _call(self, operation, command, bytes_out, function, *args, **kwargs):
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            self._trace.record(operation, command, started, time.perf_counter() - start, bytes_out, 0, True)
+            raise
+        bytes_in = len(result) if isinstance(result, (str, bytes, bytearray)) else 0
+        self._trace.record(operation, command, started, time.perf_counter() - start, bytes_out, bytes_in, False)
+        return result
+
+    def write(self, message, *args, **kwargs):
+        return self._call(0, message, len(message), self._device.write, message, *args, **kwargs)
+
+    def query(self, message, *args, **kwargs):
+        return self._call(1, message, len(message), self._device.query, message, *args, **kwargs)
+
+    def read(self, *args, **kwargs):
+        return self._call(2, None, 0, self._device.read, *args, **kwargs)
+
+    def read_bytes(self, *args, **kwargs):
+        return self._call(3, None, 0, self._device.read_bytes, *args, **kwargs)
+
+    def read_raw(self, *args, **kwargs):
+        return self._call(4, None, 0, self._device.read_raw, *args, **kwargs)
+
+    def write_raw(self, message, *args, **kwargs):
+        return self._call(5, None, len(message), self._device.write_raw, message, *args, **kwargs)
@@ -68,25 +68,25 @@ class Newport_835(Prologix_GPIBtoUSBController):
         return self._query_device("U1", TERM_SEQUENCE)
 
     def turn_off_attenuator(self):
-        self._send_to_device("A0", TERM_SEQUENCE)
+        self._set_register("A", 0, lambda: self._send_to_device("A0", TERM_SEQUENCE))
 
     def turn_on_attenuator(self):
         """
         Lets the instrument know that the attenuator cap is on the light sensor so readings are correct
         """
-        self._send_to_device("A1", TERM_SEQUENCE)
+        self._set_register("A", 1, lambda: self._send_to_device("A1", TERM_SEQUENCE))
 
     def set_wavelength(self, wavelength):
         """
         :param wavelength: the wavelength in nm. This value is rounded to the nearest power of 10
         """
-        self._send_to_device("W+{}".format(wavelength), TERM_SEQUENCE)
+        self._set_register("W", wavelength, lambda: self._send_to_device("W+{}".format(wavelength), TERM_SEQUENCE))
 
     def set_get_power_reading_on_x(self):
         """
         :return: Every time an "X" is sent alone to the instrument it will give back a power reading
         """
-        self._send_to_device("T4", TERM_SEQUENCE)
+        self._set_register("T", 4, lambda: self._send_to_device("T4", TERM_SEQUENCE))
 
     def get_power_reading(self):
         """
@@ -99,10 +99,11 @@ class Newport_835(Prologix_GPIBtoUSBController):
         :param how_many_watts: the amount of watts to set the unit to detect.
         This could be auto, (2, 20, 200) nW, (2, 20, 200) uW, (2, 20, 200) mW, (2, 20) W
         """
-        self._send_to_device(self.unit_switch[how_many_watts], TERM_SEQUENCE)
+        command = self.unit_switch[how_many_watts]
+        self._set_register("R", command, lambda: self._send_to_device(command, TERM_SEQUENCE))
 
     def make_outputs_verbose(self):
-        self._send_to_device("G0", TERM_SEQUENCE)
+        self._set_register("G", 0, lambda: self._send_to_device("G0", TERM_SEQUENCE))
 
     def make_outputs_unverbose(self):
-        self._send_to_device("G1", TERM_SEQUENCE)
+        self._set_register("G", 1, lambda: self._send_to_device("G1", TERM_SEQUENCE))
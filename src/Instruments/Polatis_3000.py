@@ -1,5 +1,4 @@
 import datetime
-import time
 import re
 
 from src.Instruments.PyVisaDriver import PyVisaDriver
@@ -10,6 +9,9 @@ class Polatis_3000(PyVisaDriver):
     This class models a Polatis 3000 Switch
     """
 
+    # the switch is asked if it finished the commands it was sent before it is sent more
+    SETTLE_PROFILES = {"ready": {"Timeout": 5.0, "Interval": 0.02, "Max_Interval": 0.2}}
+
     def __init__(self, device):
         PyVisaDriver.__init__(self)
         self.name += "Polatis 3000 Switch"
@@ -19,11 +21,11 @@ class Polatis_3000(PyVisaDriver):
         return str(self.device.query(':oxo:swit:conn:stat?'))[:-2]
 
     def get_port_stat(self, port_number):
-        time.sleep(0.1)
+        self.__wait_ready__()
         return str(self.device.query(':oxc:swit:conn:port? %d' % port_number))[:-2]
 
     def reset(self):
-        time.sleep(0.1)
+        self.__wait_ready__()
         self.device.write('*RST;')
 
     def quick_connect(self, ingress=0, egress=0):
@@ -40,8 +42,14 @@ class Polatis_3000(PyVisaDriver):
         if re.match('(only|add|sub)', explicit):
             self.device.write(':oxc:swit:conn:' + explicit + ' ' + formatted + ';')
 
+    def __wait_ready__(self):
+        """
+        Wait until the switch has finished the commands it was sent
+        """
+        self.wait_until(lambda: str(self.device.query('*OPC?')).strip().endswith('1'), operation="ready")
+
     def __make_connections__(self, ports):
-        time.sleep(0.1)
+        self.__wait_ready__()
         self.device.write(':oxc:swit:conn:only '+ports+';')
 
     @staticmethod
@@ -80,7 +88,7 @@ class Polatis_3000(PyVisaDriver):
     def write_pattern(self, name='newPattern.txt'):
         with open(name, 'w') as f:
             f.write(name+' '+str(datetime.datetime.now())+'\n')
-            time.sleep(0.1)
+            self.__wait_ready__()
             f.write(self.get_all_connections())
 
     def read_pattern(self, name='newPattern.txt', load=True):
@@ -21,12 +21,18 @@ class Prologix_GPIBtoUSBController(PyVisaDriver):
     Devices that extend this class may use them though.
     """
 
-    def __init__(self):
+    def __init__(self, device=None):
+        """
+        :param device: the PyVisa resource of the adapter when it is connected to on its own, drivers extending this
+        class set self.device themselves
+        """
         # the GPIB address the instrument extending this class is set to
         self.instrument_gpib_address = None
 
         PyVisaDriver.__init__(self)
         self.name += " that is connected using a GPIB to USB Adapter - "
+        if device is not None:
+            self.device = device
 
     def check_connected(self):
         """
@@ -39,6 +45,10 @@ class Prologix_GPIBtoUSBController(PyVisaDriver):
             return False
         return True
 
+    def shadow_address(self):
+        # every instrument behind the adapter has its port as its resource name
+        return self.instrument_gpib_address
+
     def _get_gpib_termination_string(self):
         """
         :return: the termination characters that will be added to every message sent to the instrument
@@ -1,4 +1,5 @@
 from src.Instruments.EVTDriver import EVTDriver
+from src.Instruments.IOTrace import IOTraceBuffer, TracedResource, IO_TRACE_CAPACITY
 import pyvisa
 
 
@@ -12,6 +13,7 @@ class PyVisaDriver(EVTDriver):
         EVTDriver.__init__(self)
         if "PyVisa" not in self.name:
             self.name = "A PyVisa Driver "
+        self.io_trace = None
 
     def __enter__(self):
         """
@@ -47,3 +49,25 @@ class PyVisaDriver(EVTDriver):
         except pyvisa.errors.InvalidSession:
             self.device = None
             return False
+
+    def enable_io_trace(self, capacity=IO_TRACE_CAPACITY):
+        """
+        Start recording the command, bytes and latency of every write, query and read made to the device. A trace
+        that was already being recorded is dropped, so a driver kept connected for many experiments starts a new one
+        for each of them
+        :param capacity: the number of calls kept, older calls are dropped once this many have been made
+        :return: the IOTraceBuffer the calls are recorded in
+        """
+        self.disable_io_trace()
+        if self.device is not None:
+            self.io_trace = IOTraceBuffer(self.name.strip(), capacity)
+            self.device = TracedResource(self.device, self.io_trace)
+        return self.io_trace
+
+    def disable_io_trace(self):
+        """
+        Stop recording the calls made to the device, and drop the ones recorded
+        """
+        if isinstance(self.device, TracedResource):
+            self.device = self.device.untraced()
+        self.io_trace = None
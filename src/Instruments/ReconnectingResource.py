@@ -0,0 +1,177 @@
+import re
+import threading
+import time
+
+# The seconds waited before each attempt to open a broken connection again, it is given up on after the last one
+RECONNECT_DELAYS = (0.5, 1.0, 2.0, 4.0, 8.0)
+
+# A call that only asks the instrument something, so it can safely be made again once the connection is back: a
+# query with a "?" ("*IDN?", "MEAS:VOLT? CHAN1") or a Prologix adapter setting asked for without a value ("++addr")
+IDEMPOTENT_QUERY = re.compile(r'\?|^\s*\+\+\w+\s*$')
+
+
+class ReconnectFailed(ConnectionError):
+    """
+    Raised when a broken connection to an instrument could not be opened again
+    """
+    pass
+
+
+def is_connection_error(error):
+    """
+    :param error: an exception raised by a call to an instrument
+    :return: True if it means the connection to the instrument is broken (a dropped socket, a USB to serial adapter
+    that went away), rather than the instrument being slow to answer or the command being wrong
+    """
+    try:
+        from pyvisa import errors
+        from pyvisa.constants import StatusCode
+    except ImportError:
+        errors = None
+    if errors is not None:
+        if isinstance(error, errors.InvalidSession):
+            return True
+        if isinstance(error, errors.VisaIOError):
+            return error.error_code in (StatusCode.error_connection_lost, StatusCode.error_invalid_object,
+                                        StatusCode.error_io, StatusCode.error_resource_not_found)
+    # raw sockets and serial ports raise OSError (serial.SerialException is one), but a timeout is not a broken link
+    return isinstance(error, OSError) and not isinstance(error, TimeoutError)
+
+
+class ReconnectingResource:
+    """
+    Stands in for a PyVISA resource and opens it again when the connection breaks, waiting longer before each attempt.
+    Once it is back the driver is set up again, and a query that only asks the instrument something is asked again, so
+    the experiment does not notice. Anything else raises the error it got, as sending it twice may not be safe, but
+    the next experiment finds the instrument connected. Attributes set on it, like read_termination, are set again on
+    the resource opened, everything else is passed straight to the resource.
+    """
+
+    def __init__(self, device, reopen, name="", delays=RECONNECT_DELAYS):
+        """
+        :param device: the PyVISA resource
+        :param reopen: a function with no arguments that opens the resource again and returns it
+        :param name: the name of the device shown when it reconnects
+        :param delays: the seconds waited before each attempt to reconnect
+        """
+        object.__setattr__(self, "_device", device)
+        object.__setattr__(self, "_reopen", reopen)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_delays", delays)
+        # the attributes set on the resource, to set them again on the one reopened
+        object.__setattr__(self, "_attributes", {})
+        # held for every call, so the health monitor and an experiment never talk to the instrument at the same time
+        object.__setattr__(self, "lock", threading.RLock())
+        # called with no arguments once the resource was reopened, to set the driver up again
+        object.__setattr__(self, "_on_reconnect", None)
+        # reconnecting is only turned on once the device was connected to and answered
+        object.__setattr__(self, "_auto_reconnect", False)
+        object.__setattr__(self, "_reconnecting", False)
+        # True if the last attempt to reconnect failed
+        object.__setattr__(self, "broken", False)
+        object.__setattr__(self, "reconnects", 0)
+        # the time.monotonic() of the last call that succeeded
+        object.__setattr__(self, "last_used", time.monotonic())
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._device, name, value)
+        self._attributes[name] = value
+
+    def share_lock(self, lock):
+        """
+        :param lock: an RLock to hold for every call instead of its own, shared by every resource on the same bus so
+        the calls to instruments behind one adapter never interleave
+        """
+        object.__setattr__(self, "lock", lock)
+
+    def enable_reconnect(self, on_reconnect=None):
+        """
+        Turn reconnecting on
+        :param on_reconnect: called with no arguments once the resource was reopened, before a query is asked again
+        """
+        object.__setattr__(self, "_on_reconnect", on_reconnect)
+        object.__setattr__(self, "_auto_reconnect", True)
+
+    def close(self):
+        object.__setattr__(self, "_auto_reconnect", False)
+        self._device.close()
+
+    def reconnect(self):
+        """
+        Close the resource and open it again, waiting the delays between attempts
+        :raises ReconnectFailed: if it could not be opened again after the last attempt
+        """
+        with self.lock:
+            object.__setattr__(self, "_reconnecting", True)
+            try:
+                try:
+                    self._device.close()
+                except Exception:
+                    pass
+                error = None
+                for attempt, delay in enumerate(self._delays):
+                    time.sleep(delay)
+                    device = None
+                    try:
+                        device = self._reopen()
+                        for name, value in self._attributes.items():
+                            setattr(device, name, value)
+                        object.__setattr__(self, "_device", device)
+                        if self._on_reconnect is not None:
+                            self._on_reconnect()
+                    except Exception as e:
+                        error = e
+                        print("    Could not reconnect to {} (attempt {} of {}): {}".format(
+                            self._name, attempt + 1, len(self._delays), e))
+                        if device is not None:
+                            try:
+                                device.close()
+                            except Exception:
+                                pass
+                        continue
+                    object.__setattr__(self, "broken", False)
+                    object.__setattr__(self, "reconnects", self.reconnects + 1)
+                    object.__setattr__(self, "last_used", time.monotonic())
+                    print("    Reconnected to " + self._name)
+                    return
+                object.__setattr__(self, "broken", True)
+                raise ReconnectFailed("Could not reconnect to {} after {} attempts".format(
+                    self._name, len(self._delays))) from error
+            finally:
+                object.__setattr__(self, "_reconnecting", False)
+
+    def _call(self, operation, retry, *args, **kwargs):
+        with self.lock:
+            try:
+                result = getattr(self._device, operation)(*args, **kwargs)
+            except Exception as e:
+                if not self._auto_reconnect or self._reconnecting or not is_connection_error(e):
+                    raise
+                print("    Lost the connection to {}: {}".format(self._name, e))
+                self.reconnect()
+                if not retry:
+                    raise
+                result = getattr(self._device, operation)(*args, **kwargs)
+            object.__setattr__(self, "last_used", time.monotonic())
+            return result
+
+    def write(self, message, *args, **kwargs):
+        return self._call("write", False, message, *args, **kwargs)
+
+    def query(self, message, *args, **kwargs):
+        return self._call("query", IDEMPOTENT_QUERY.search(message) is not None, message, *args, **kwargs)
+
+    def read(self, *args, **kwargs):
+        return self._call("read", False, *args, **kwargs)
+
+    def read_bytes(self, *args, **kwargs):
+        return self._call("read_bytes", False, *args, **kwargs)
+
+    def read_raw(self, *args, **kwargs):
+        return self._call("read_raw", False, *args, **kwargs)
+
+    def write_raw(self, message, *args, **kwargs):
+        return self._call("write_raw", False, message, *args, **kwargs)
@@ -1,6 +1,5 @@
-import time
-
 from src.Instruments.PyVisaDriver import PyVisaDriver
+from src.Instruments.Settling import SettleTimeout
 
 
 class Santec_TSL_210H(PyVisaDriver):
@@ -8,6 +7,10 @@ class Santec_TSL_210H(PyVisaDriver):
     This class models a Santec TSL-201H Laser
     """
 
+    # the laser takes around half a second to tune to a new wavelength
+    SETTLE_PROFILES = {"wavelength": {"Timeout": 30.0, "Initial_Delay": 0.1, "Interval": 0.1, "Max_Interval": 0.5},
+                       "status": {"Timeout": 10.0, "Interval": 0.02, "Max_Interval": 0.2}}
+
     def __init__(self, device):
         PyVisaDriver.__init__(self)
         self.name += "Santec TSL-201H Laser"
@@ -39,17 +42,17 @@ class Santec_TSL_210H(PyVisaDriver):
             print('Wavelength out of range')
         else:
             wavelength = "{0:.3f}".format(float(wavelength))
-            self.device.write('WA' + wavelength)
-            time.sleep(0.5)
-            self.device.write('WA')
             self.wavelength = wavelength
-            check = "0.000"
-            while check != wavelength:
-                while self.device.bytes_in_buffer == 0:
-                    time.sleep(0.1)
-                check = self.device.read()
+            self._set_register("WA", wavelength, lambda: self._tune(wavelength))
         return
 
+    def _tune(self, wavelength):
+        """
+        :param wavelength: the wavelength to tune to, as set_wavelength formats it
+        """
+        self.device.write('WA' + wavelength)
+        self.wait_until(lambda: "{0:.3f}".format(self.get_wavelength()) == wavelength, operation="wavelength")
+
     def sweep_setup(self, start, end, step):
         if start < self.min_wavelength or start > self.max_wavelength or \
                 end < self.min_wavelength or start > self.max_wavelength:
@@ -100,12 +103,11 @@ class Santec_TSL_210H(PyVisaDriver):
         # 	time.sleep(0.2)
         # 	return self.checkStatus()
         self.device.write('SU')
-        for x in range(0, 50, 1):
-            if self.device.bytes_in_buffer < 1:
-                time.sleep(0.2)
-                continue
-            return int(self.device.read()) > 0
-        return False
+        try:
+            self.wait_until(lambda: self.device.bytes_in_buffer >= 1, operation="status")
+        except SettleTimeout:
+            return False
+        return int(self.device.read()) > 0
 
     def turn_output_on(self):
         """
@@ -136,7 +138,7 @@ class Santec_TSL_210H(PyVisaDriver):
         :param power: power specified to set
         :type power: Float
         """
-        self.device.write('OP' + str(power))
+        self._set_register("OP", power, lambda: self.device.write('OP' + str(power)))
 
     def get_power(self):
         """
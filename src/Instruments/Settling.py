@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# The settings a settle profile can have, in the "Settle" of a device in Devices.json, and their defaults. Timeout is
+# the most seconds to wait (null waits forever), Initial_Delay the seconds before the instrument is first asked,
+# Interval the seconds between the first two polls, each one after is Backoff times longer up to Max_Interval, and
+# Auto_Tighten lowers the Timeout and raises the Initial_Delay to fit the settle times observed so far
+SETTLE_DEFAULTS = {"Timeout": 10.0, "Initial_Delay": 0.0, "Interval": 0.05, "Backoff": 1.5, "Max_Interval": 1.0,
+                   "Auto_Tighten": False}
+
+# The number of observed settle times kept for each operation of each driver
+SETTLE_HISTORY = 100
+
+# A tightened profile waits at most this many times the slowest settle time observed, and first asks the instrument
+# after this fraction of the quickest one, once at least TIGHTEN_MIN_SAMPLES settle times have been observed
+TIGHTEN_TIMEOUT_MARGIN = 3.0
+TIGHTEN_DELAY_FRACTION = 0.5
+TIGHTEN_MIN_SAMPLES = 10
+
+
+class SettleTimeout(TimeoutError):
+    """
+    Raised when an instrument does not report it is ready before the timeout of its settle profile
+    """
+    pass
+
+
+class SettleProfile:
+    """
+    How to wait for an instrument to settle: how long to wait at most and how often to ask it if it is ready
+    """
+
+    def __init__(self, timeout=SETTLE_DEFAULTS["Timeout"], initial_delay=SETTLE_DEFAULTS["Initial_Delay"],
+                 interval=SETTLE_DEFAULTS["Interval"], backoff=SETTLE_DEFAULTS["Backoff"],
+                 max_interval=SETTLE_DEFAULTS["Max_Interval"], auto_tighten=SETTLE_DEFAULTS["Auto_Tighten"]):
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.interval = interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.auto_tighten = auto_tighten
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        :param settings: a dictionary of some of the settings of SETTLE_DEFAULTS, the rest are the defaults
+        :return: the SettleProfile
+        """
+        unknown = set(settings) - set(SETTLE_DEFAULTS)
+        if unknown:
+            raise ValueError("Unknown settle profile settings " + ", ".join(sorted(unknown)))
+        settings = dict(SETTLE_DEFAULTS, **settings)
+        return cls(settings["Timeout"], settings["Initial_Delay"], settings["Interval"], settings["Backoff"],
+                   settings["Max_Interval"], settings["Auto_Tighten"])
+
+    def tightened(self, observed):
+        """
+        :param observed: the settle times observed for the operation the profile is for, in seconds
+        :return: a SettleProfile that waits less, fitted to the observed settle times, or this one if there are too
+        few of them
+        """
+        if len(observed) < TIGHTEN_MIN_SAMPLES:
+            return self
+        timeout = max(observed) * TIGHTEN_TIMEOUT_MARGIN
+        if self.timeout is not None:
+            timeout = min(self.timeout, timeout)
+        initial_delay = max(self.initial_delay, min(observed) * TIGHTEN_DELAY_FRACTION)
+        return SettleProfile(timeout, initial_delay, self.interval, self.backoff, self.max_interval, False)
+
+    def intervals(self):
+        """
+        :return: a generator of the seconds to wait between each poll
+        """
+        interval = self.interval
+        while True:
+            yield interval
+            interval = min(interval * self.backoff, self.max_interval)
+
+
+class SettleTimes:
+    """
+    The settle times observed for every operation of every driver, so the profiles can be tightened to fit them
+    """
+
+    def __init__(self):
+        # (driver, operation) to a deque of the last SETTLE_HISTORY settle times
+        self._times = {}
+        self._lock = threading.Lock()
+        # the files loaded already, so loading one again does not add its times twice
+        self._loaded = set()
+
+    def record(self, driver, operation, seconds):
+        with self._lock:
+            self._times.setdefault((driver, operation), deque(maxlen=SETTLE_HISTORY)).append(seconds)
+
+    def observed(self, driver, operation):
+        """
+        :return: a list of the settle times observed for the operation of the driver, oldest first
+        """
+        with self._lock:
+            return list(self._times.get((driver, operation), []))
+
+    def summary(self):
+        """
+        :return: a dictionary of driver to operation to the count, quickest, mean and slowest observed settle time
+        """
+        with self._lock:
+            summary = {}
+            for (driver, operation), times in self._times.items():
+                summary.setdefault(driver, {})[operation] = {
+                    "count": len(times), "min": min(times), "mean": sum(times) / len(times), "max": max(times)}
+            return summary
+
+    def load(self, path):
+        """
+        Add the settle times saved in a file by save, if it exists and was not loaded already
+        """
+        if path in self._loaded or not os.path.isfile(path):
+            return
+        self._loaded.add(path)
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except ValueError:
+            return
+        with self._lock:
+            for driver, operations in saved.items():
+                for operation, times in operations.items():
+                    # the saved times are older than any observed since, so they are dropped first
+                    observed = self._times.get((driver, operation), [])
+                    self._times[(driver, operation)] = deque(list(times) + list(observed), maxlen=SETTLE_HISTORY)
+
+    def save(self, path):
+        """
+        Write every settle time observed, and the ones loaded, to a file, if there are any
+        """
+        with self._lock:
+            saved = {}
+            for (driver, operation), times in self._times.items():
+                saved.setdefault(driver, {})[operation] = list(times)
+        if not saved:
+            return
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(saved, f, indent=4)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("Could not save the settle times to " + path + ": " + str(e))
+
+
+# The settle times observed by every driver in this process
+settle_times = SettleTimes()
+
+
+def wait_until(predicate, profile, on_settled=None):
+    """
+    Ask predicate until it returns something true, waiting longer between each time as set by the profile
+    :param predicate: a function with no arguments that returns something true once the instrument is ready
+    :param profile: the SettleProfile to wait with
+    :param on_settled: called with the seconds it took when predicate returned something true
+    :return: what predicate returned
+    """
+    start = time.monotonic()
+    deadline = None if profile.timeout is None else start + profile.timeout
+    if profile.initial_delay:
+        time.sleep(profile.initial_delay)
+    for interval in profile.intervals():
+        result = predicate()
+        now = time.monotonic()
+        if result:
+            if on_settled is not None:
+                on_settled(now - start)
+            return result
+        if deadline is not None:
+            if now >= deadline:
+                raise SettleTimeout("Not ready after {:.2f} s".format(now - start))
+            interval = min(interval, deadline - now)
+        time.sleep(interval)
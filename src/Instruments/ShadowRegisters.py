@@ -0,0 +1,108 @@
+import threading
+
+
+class ShadowRegisters:
+    """
+    The last value written to, or read from, each setting of one instrument. A driver skips writing a setting the
+    instrument already has, and can answer a query of a setting without asking the instrument. Only settings nothing
+    but the driver changes should be kept here, and everything is forgotten when the instrument is reset or an error
+    makes its state unknown.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+        # the number of writes skipped and made through the registers, to see how much they save
+        self.skipped = 0
+        self.written = 0
+
+    def lookup(self, register):
+        """
+        :param register: the name of the setting
+        :return: (True, its value) if it is known, (False, None) if not
+        """
+        with self._lock:
+            if register in self._values:
+                return True, self._values[register]
+            return False, None
+
+    def matches(self, register, value):
+        """
+        :return: True if the setting is known to have the value already, so writing it can be skipped
+        """
+        with self._lock:
+            if register in self._values and self._values[register] == value:
+                self.skipped += 1
+                return True
+            return False
+
+    def set(self, register, value, written=False):
+        """
+        :param register: the name of the setting
+        :param value: the value the instrument now has
+        :param written: True if the value was just written to the instrument, False if it was read from it
+        """
+        with self._lock:
+            self._values[register] = value
+            if written:
+                self.written += 1
+
+    def invalidate(self, register=None):
+        """
+        Forget the value of a setting, or of every setting if register is None
+        """
+        with self._lock:
+            if register is None:
+                self._values = {}
+            else:
+                self._values.pop(register, None)
+
+
+# (driver name, address, GPIB address) to the ShadowRegisters of every instrument that has them turned on. They are
+# forgotten every time the instrument is connected to, as it may have been power cycled or reset from its front panel
+# since, and kept while it stays connected
+_instruments = {}
+_instruments_lock = threading.Lock()
+
+
+def shadow_key(driver_name, connection, gpib_address=None):
+    """
+    :param driver_name: the name of the driver class of the instrument
+    :param connection: the PyVisa resource (or other connection) the driver talks to the instrument through
+    :param gpib_address: the GPIB address of an instrument behind a GPIB to USB adapter, None for any other
+    :return: the key of the instrument. The instruments behind a GPIB to USB adapter share its address, so they are
+    told apart by their driver and GPIB address
+    """
+    return driver_name, getattr(connection, "resource_name", None) or str(connection), gpib_address
+
+
+def enable_shadow_registers(driver_name, connection, gpib_address=None):
+    """
+    Turn the shadow registers of an instrument on, keeping the values they already have
+    :return: its ShadowRegisters
+    """
+    with _instruments_lock:
+        return _instruments.setdefault(shadow_key(driver_name, connection, gpib_address), ShadowRegisters())
+
+
+def disable_shadow_registers(driver_name, connection, gpib_address=None):
+    with _instruments_lock:
+        _instruments.pop(shadow_key(driver_name, connection, gpib_address), None)
+
+
+def get_shadow_registers(driver_name, connection, gpib_address=None):
+    """
+    :return: the ShadowRegisters of an instrument, or None if it does not have them turned on
+    """
+    return _instruments.get(shadow_key(driver_name, connection, gpib_address))
+
+
+def invalidate_shadow_registers(driver_name, connection=None):
+    """
+    Forget every setting of the instruments of a driver on a connection, whatever their GPIB address, or of every
+    instrument of the driver if connection is None
+    """
+    with _instruments_lock:
+        for key, registers in _instruments.items():
+            if key[0] == driver_name and (connection is None or key[:2] == shadow_key(driver_name, connection)[:2]):
+                registers.invalidate()
@@ -1,8 +1,13 @@
 import re
-import pyvisa
+import numpy as np
 
+from src.Instruments.BufferedLineReader import BufferedLineReader
+from src.Instruments.IOTrace import IO_TRACE_CAPACITY
 from src.Instruments.PyVisaDriver import PyVisaDriver
 
+# The rows of eyescan results look like "0,1,5,...,0;"
+EYESCAN_DATA_LINE = re.compile(r'^(?P<data>[0-9,]+);')
+
 
 class Xilinx_VCU108(PyVisaDriver):
     """
@@ -16,46 +21,82 @@ class Xilinx_VCU108(PyVisaDriver):
 
         self._locked = False
 
+        # seconds the board can be quiet before a command's reply is considered complete
+        self.response_idle_timeout = 0.05
+        # seconds to wait for the board to start replying to a command, None to use the VISA timeout of the device
+        self.response_timeout = None
+        # seconds the board can be quiet in the middle of an eyescan before it is considered disconnected
+        self.eyescan_timeout = 30.0
+        self.reader = BufferedLineReader(device, idle_timeout=self.response_idle_timeout)
+
     def read_data(self):
         """
-        Read data from self.device until nothing is left in the buffer
-        :return: data, all the data read from the buffer
-        """
-        data = []
-        line = self.device.read()
-        print(line)
-        data.append(line)
-        while self.device.bytes_in_buffer > 0:
-            line = self.device.read()
-            print(line)
-            data.append(line)
+        Read the reply to the last command. The reply is done once the board has been quiet for
+        response_idle_timeout seconds
+        :return: data, all the lines of the reply
+        """
+        data = self.reader.read_lines(timeout=self.response_timeout, idle_timeout=self.response_idle_timeout)
+        print("\n".join(data))
         return data
 
-    def eyescan(self, range_value=0, scale_factor=0, horizontal=127, vertical=512, drp=0, step=2):
+    def enable_io_trace(self, capacity=IO_TRACE_CAPACITY):
+        io_trace = PyVisaDriver.enable_io_trace(self, capacity)
+        self.reader.device = self.device
+        return io_trace
+
+    def disable_io_trace(self):
+        PyVisaDriver.disable_io_trace(self)
+        self.reader.device = self.device
+
+    def eyescan(self, range_value=0, scale_factor=0, horizontal=127, vertical=512, drp=0, step=2, progress=None):
         """
-        Eyescan test
+        Eyescan test. The "data;" rows the board sends back are parsed into a grid as they arrive, so nothing is
+        parsed or printed after the scan has finished. If the board stops sending for eyescan_timeout seconds before
+        the scan ends, a TimeoutError is raised instead of waiting forever, and if a row does not have as many values as
+        the first one, a ValueError is raised rather than padding or cutting it.
         :param range_value: range for eyescan
         :param scale_factor: scaling factor for eyescan
         :param horizontal: horizontal boundary
         :param vertical: vertical boundary
         :param drp: choice of drp
         :param step: step size of voltages
-        :return: data, all data from command, will need to be parsed later
+        :param progress: optional function called as progress(rows_done, rows_total) after every row is parsed
+        :return: grid, a 2D numpy integer array with one row for each data row of the scan, False if not connected
         """
-        data = []
-        line = ""
         if not self.check_connected():
             return False
-        else:
-            self.device.write("petb eyescan "+str(range_value)+" "+str(scale_factor)+" "+str(horizontal)+" "+str(vertical)+" "+str(drp)+" "+str(step))
-            while "END" not in line:
-                try:
-                    line = self.device.read()
-                    print(line)
-                    data.append(line)
-                except pyvisa.VisaIOError:
-                    continue
-            return data
+        rows_total = self._expected_eyescan_rows(vertical, step)
+        grid = None
+        rows_done = 0
+        self.reader.clear()
+        self.device.write("petb eyescan "+str(range_value)+" "+str(scale_factor)+" "+str(horizontal)+" "+str(vertical)+" "+str(drp)+" "+str(step))
+        for line in self.reader.iter_lines(sentinel="END", timeout=self.eyescan_timeout):
+            match = EYESCAN_DATA_LINE.match(line)
+            if match is None:
+                continue
+            row = np.array(match.group("data").split(","), dtype=np.int64)
+            if grid is None:
+                grid = np.zeros((rows_total, len(row)), dtype=np.int64)
+            elif rows_done == grid.shape[0]:
+                # the board sent more rows than the boundaries said it would, double the grid instead of failing
+                grid = np.concatenate((grid, np.zeros_like(grid)))
+            if len(row) != grid.shape[1]:
+                raise ValueError("Eyescan row {} has {} values, the rows before it have {}".format(
+                    rows_done, len(row), grid.shape[1]))
+            grid[rows_done] = row
+            rows_done += 1
+            if progress is not None:
+                progress(rows_done, max(rows_total, rows_done))
+        if grid is None:
+            return np.zeros((0, 0), dtype=np.int64)
+        return grid[:rows_done]
+
+    @staticmethod
+    def _expected_eyescan_rows(vertical, step):
+        """
+        :return: the number of data rows a scan with these settings should send, used to size the grid up front
+        """
+        return 2 * (int(vertical) // max(int(step), 1)) + 1
 
     def raw_command(self, command):
         if not self.check_connected():
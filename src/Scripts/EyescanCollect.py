@@ -17,8 +17,18 @@ def main(data_map, experiment_result):
     vcu108.device.baud_rate = 115200
     vcu108.device.read_termination = '\n'
 
+    reported = 0
+
+    def progress(rows_done, rows_total):
+        # report every tenth of the scan instead of every row
+        nonlocal reported
+        percent = 100 * rows_done // rows_total
+        if percent >= reported + 10:
+            reported = percent - percent % 10
+            print("Eyescan " + str(reported) + "% complete")
+
     experiment_result.start_experiment()
     data_map['Data']['Collect'] = vcu108.eyescan(range_value=range, scale_factor=scale, horizontal=horizontal,
-                                                     vertical=vertical, drp=drp, step=step)
+                                                 vertical=vertical, drp=drp, step=step, progress=progress)
     experiment_result.end_experiment()
     return
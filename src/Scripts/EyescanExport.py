@@ -8,24 +8,9 @@ def main(data_map, experiment_result):
     :param experiment_result: ExperimentResultsModel object
     :return: None
     """
-    # Ensure data points are float, not unicode as they are when sent through the data_map
-    reduced_data = []
-    collected_data = []
-    # for list_points in data_map['Data']['Collect']:
-    #     new_list = []
-    #     for point in list_points:
-    #         new_list.append(float(point))
-    #     collected_data.append(new_list)
-    # for list_points in data_map['Data']['Reduce']:
-    #     new_list = []
-    #     print list_points
-    #     for point in list_points:
-    #         new_list.append(float(point))
-    #     reduced_data.append(new_list)
-
-    collected_data.append(data_map['Data']['Collect'])
-    for lst in data_map['Data']['Reduce']:
-        reduced_data.append(lst)
+    # The VCU108 driver hands back the scan as a grid of integer error counts
+    collected_data = data_map['Data']['Collect']
+    reduced_data = data_map['Data']['Reduce']
 
     # Create colormap for heatmaps
     colors = [(0, 0, 0.8), (0, 0, 0.95), (0, 0, 1), (0, 0.5, 1), (0, 0.85, 1),
@@ -37,10 +22,11 @@ def main(data_map, experiment_result):
     # Edit points to send only center eye
     new_graph_points = []
     for d in reduced_data:
-        new_graph_points.append(d[len(d) / 2 - len(d) / 10:len(d) / 2 + len(d) / 10])
+        new_graph_points.append(d[len(d) // 2 - len(d) // 10:len(d) // 2 + len(d) // 10])
 
-    # Create csv file for Collected Data
+    # Create csv and binary files for Collected Data
     experiment_result.add_csv("Collected_Data", collected_data, row_labels=[])
+    experiment_result.add_array("Collected_Data", collected_data)
     # Create csv file for Reduced Data
     experiment_result.add_csv("Reduced_Data", reduced_data, row_labels=[])
     # Create json file for Config used in experiment
@@ -0,0 +1,30 @@
+from src.GUI.Application.TclSession import get_session, TclSessionError
+
+
+def main(data_map, experiment_result):
+    """
+    Runs the Tcl scripts of a block of Tcl experiments in the shared Tcl session, saving everything the interpreter
+    prints to Tcl_Output
+    :param data_map: The dictionary to store data between tasks. Its initial data has the Tcl_Command that starts the
+    interpreter, the Tcl_Scripts to run as [experiment name, script path] in order, and the Tcl_Output file
+    :return: None
+    """
+    data = data_map['Data']['Initial']
+    session = get_session(data['Tcl_Command'])
+    errors = []
+    with open(data['Tcl_Output'], "a") as output:
+        def on_output(line):
+            print(line)
+            output.write(line + "\n")
+
+        for name, script in data['Tcl_Scripts']:
+            try:
+                session.run(script, on_output)
+            except TclSessionError as e:
+                # a failed script does not stop the rest of the block, like when Vivado read the block line by line
+                on_output("ERROR in " + name + ": " + str(e))
+                errors.append(name)
+                if not session.is_alive():
+                    break
+    if errors:
+        raise TclSessionError("Tcl errors in " + ", ".join(errors))
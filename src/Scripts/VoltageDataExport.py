@@ -3,6 +3,8 @@ import json
 import os
 import time
 
+from src.GUI.Model.ConfigView import json_default
+
 
 def main(data_map, experiment_result):
 	"""
@@ -31,7 +33,7 @@ def main(data_map, experiment_result):
 	# Writing the config file in json format for future use
 	with open("config.json", "w+") as config_file:
 		# config_file.write(str(config).replace('}, ', '}, \n').replace('], ', '], \n').replace("\'", "\""))
-		config_file.write(json.dumps(config, separators=(',', ": "), indent=4))
+		config_file.write(json.dumps(config, separators=(',', ": "), indent=4, default=json_default))
 
 	# arrays for plotting x and y axis
 	x_axis = []
@@ -0,0 +1,478 @@
+import math
+import random
+import re
+import struct
+import zlib
+
+# A "1 by 1 pixel" PNG, returned wherever an instrument would send back a screenshot
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+
+BLANK_PNG = _PNG_SIGNATURE + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 0, 0, 0, 0)) + \
+    _png_chunk(b"IDAT", zlib.compress(b"\x00\x00")) + _png_chunk(b"IEND", b"")
+
+
+def ieee_block(data):
+    """
+    :param data: bytes to send back
+    :return: data as an IEEE 488.2 definite length block, #<digits of size><size><data>, and the new line ending the
+    reply. Bytes replies are sent as they are, so the termination has to be part of them
+    """
+    size = str(len(data))
+    return ("#" + str(len(size)) + size).encode("ascii") + data + b"\n"
+
+
+class ScpiResponder:
+    """
+    A generic instrument answering SCPI and IEEE 488.2 style commands.
+    Every setting command is remembered in a table of registers and every query gives back what was last set, or
+    default_value if it was never set. Instrument specific responders add handlers for the queries that measure
+    something and for the commands that have side effects.
+    """
+
+    # the characters the instrument ends its replies with
+    termination = "\n"
+    identity = "PTCS,Simulated Instrument,0,1.0"
+
+    def __init__(self):
+        self.default_value = "0"
+        self.registers = {}
+        # handlers of queries and commands, keyed by their normalized header, taking the argument string
+        self.queries = {
+            "*IDN": lambda argument: self.identity,
+            "*OPC": lambda argument: "1",
+            "*OPT": lambda argument: "0",
+            "*ESR": lambda argument: "0",
+            "*STB": lambda argument: "0",
+        }
+        self.commands = {
+            "*RST": lambda argument: self.reset(),
+            "*CLS": lambda argument: None,
+        }
+        self.random = random.Random(0)
+
+    def reset(self):
+        self.registers.clear()
+
+    @staticmethod
+    def _normalize(header):
+        return header.strip().lstrip(":").upper()
+
+    def _split(self, message):
+        """
+        :return: (header, argument, is_query) of a command
+        """
+        header, _, argument = message.strip().partition(" ")
+        is_query = header.endswith("?")
+        return self._normalize(header.rstrip("?")), argument.strip(), is_query
+
+    def handle(self, message):
+        """
+        Answer one command written to the instrument
+        :param message: the command without its termination characters
+        :return: the reply as a string, bytes or a list of lines, or None if the command has no reply
+        """
+        if not message.strip():
+            return None
+        header, argument, is_query = self._split(message)
+        if is_query:
+            return self.query(header, argument)
+        self.command(header, argument)
+        return None
+
+    def query(self, header, argument):
+        if header in self.queries:
+            return self.queries[header](argument)
+        if argument and header + " " + argument in self.registers:
+            return self.registers[header + " " + argument]
+        return self.registers.get(header, self.default_value)
+
+    def command(self, header, argument):
+        if header in self.commands:
+            self.commands[header](argument)
+            return
+        self.registers[header] = argument
+        # settings like "AMPLITUDE DATA,0.5" are read back with "AMPLITUDE? DATA"
+        if "," in argument:
+            channel, _, value = argument.partition(",")
+            self.registers[header + " " + channel.strip()] = value.strip()
+
+    def noisy(self, value, noise):
+        """
+        :return: value with uniform noise of up to +/- noise added, like a real measurement
+        """
+        return value + self.random.uniform(-noise, noise)
+
+
+class PrefixResponder(ScpiResponder):
+    """
+    An instrument that takes commands made of a header directly followed by its value, like "TWL1550.000",
+    and queries made of the header followed by a question mark, like "TWL?"
+    """
+
+    PREFIX_COMMAND = re.compile(r'^(?P<header>\*?[A-Za-z]+)(?P<argument>.*)$')
+
+    def _split(self, message):
+        message = message.strip()
+        is_query = message.endswith("?")
+        match = self.PREFIX_COMMAND.match(message.rstrip("?"))
+        if match is None:
+            return message.rstrip("?"), "", is_query
+        return match.group("header").upper(), match.group("argument").strip(), is_query
+
+
+class GpibInstrumentResponder(ScpiResponder):
+    """
+    An instrument reached through the Prologix GPIB to USB adapter. The adapter gives itself as bus, so instruments
+    on the same adapter can see each other (the power meter measures the light of the laser)
+    """
+
+    gpib_address = None
+
+    def __init__(self):
+        ScpiResponder.__init__(self)
+        self.bus = None
+
+    def optical_output_dbm(self):
+        """
+        :return: the optical power this instrument is putting out in dBm, None if it is not a light source or is off
+        """
+        return None
+
+
+class AgilentE3643AResponder(ScpiResponder):
+    """
+    An Agilent E3643A power supply with a resistive load on its output
+    """
+
+    identity = "Agilent Technologies,E3643A,0,1.7-5.0-1.0"
+
+    def __init__(self, load_ohms=100.0):
+        ScpiResponder.__init__(self)
+        self.load_ohms = load_ohms
+        self.queries["MEAS:VOLT:DC"] = lambda argument: "{:+.5E}".format(self.noisy(self._output_voltage(), 1e-4))
+        self.queries["MEAS:CURR:DC"] = lambda argument: "{:+.5E}".format(
+            self.noisy(self._output_voltage() / self.load_ohms, 1e-6))
+
+    def _output_voltage(self):
+        if self.registers.get("OUTP:STAT", "OFF") != "ON":
+            return 0.0
+        voltage = float(self.registers.get("VOLT", 0) or 0)
+        current_limit = self.registers.get("CURR")
+        if current_limit:
+            voltage = min(voltage, float(current_limit) * self.load_ohms)
+        return voltage
+
+
+class AgilentDSO7000AResponder(ScpiResponder):
+    """
+    An Agilent DSO7000A oscilloscope looking at a 1kHz square wave
+    """
+
+    identity = "AGILENT TECHNOLOGIES,DSO7104A,MY48260511,05.25.0000"
+
+    MEASUREMENTS = {
+        "MEAS:VPP": 1.0,
+        "MEAS:VAV": 0.5,
+        "MEAS:DUTY": 50.0,
+        "MEAS:FALL": 2e-9,
+        "MEAS:RIS": 2e-9,
+        "MEAS:FREQ": 1e3,
+        "MEAS:NWID": 5e-4,
+        "MEAS:PWID": 5e-4,
+        "MEAS:OVER": 1.5,
+        "MEAS:PRES": 1.2,
+        "MEAS:PER": 1e-3,
+        "MEAS:PHAS": 0.0,
+    }
+
+    def __init__(self):
+        ScpiResponder.__init__(self)
+        for header, value in self.MEASUREMENTS.items():
+            self.queries[header] = self._measurement(value)
+        self.queries["MEAS:RES"] = self._results
+        self.queries["DISPLAY:DATA"] = lambda argument: ieee_block(BLANK_PNG)
+        self.queries["SAVE:PWD"] = lambda argument: "\\usb\\"
+        self.registers["SAVE:FIL"] = "Image"
+
+    def _measurement(self, value):
+        return lambda argument: "{:+.5E}".format(self.noisy(value, abs(value) * 0.01))
+
+    def _results(self, argument):
+        """
+        :return: the statistics of every measurement as "Name(channel),current,min,max,mean,std dev,count,"
+        """
+        fields = []
+        for header, value in self.MEASUREMENTS.items():
+            name = header.split(":")[1].capitalize()
+            samples = [self.noisy(value, abs(value) * 0.01) for _ in range(5)]
+            mean = sum(samples) / len(samples)
+            fields.append("{}(1),{:E},{:E},{:E},{:E},{:E},{}".format(name, samples[-1], min(samples), max(samples),
+                                                                     mean, abs(value) * 0.005, len(samples)))
+        return ",".join(fields) + ","
+
+
+class AnritsuMP2100AResponder(ScpiResponder):
+    """
+    An Anritsu MP2100A BERTWave. A measurement started with *TRG samples the eye for sample_polls status queries
+    before it holds again
+    """
+
+    identity = "ANRITSU,MP2100A,6200000000,1.00"
+
+    def __init__(self, sample_polls=5):
+        ScpiResponder.__init__(self)
+        self.sample_polls = sample_polls
+        self._polls_left = 0
+        self.registers["SAMPLING:STATUS"] = "HOLD"
+        self.registers["SENSE:MEASURE:EALARM:PERIOD"] = "0,0,0,1"
+        self.queries["*OPT"] = lambda argument: "MP2100A-012,MP2100A-022"
+        self.queries["SAMPLING:STATUS"] = self._sampling_status
+        self.queries["SENSE:MEASURE:ASTATE"] = lambda argument: "1" if self._polls_left > 0 else "0"
+        self.queries["CALCULATE:DATA:EALARM"] = self._error_alarm
+        self.queries["SYSTEM:DISPLAY:DATA"] = lambda argument: ieee_block(BLANK_PNG)
+        self.commands["*TRG"] = self._trigger
+        self.commands["SENSE:MEASURE:ASTP"] = lambda argument: self._stop()
+
+    def _trigger(self, argument):
+        self._polls_left = self.sample_polls
+        self.registers["SAMPLING:STATUS"] = "RUN"
+
+    def _stop(self):
+        self._polls_left = 0
+        self.registers["SAMPLING:STATUS"] = "HOLD"
+
+    def _sampling_status(self, argument):
+        if self._polls_left > 0:
+            self._polls_left -= 1
+            if self._polls_left == 0:
+                self.registers["SAMPLING:STATUS"] = "HOLD"
+            return "RUN"
+        return self.registers["SAMPLING:STATUS"]
+
+    def _error_alarm(self, argument):
+        """
+        :param argument: the quoted result name, like "CURRent:EC:TOTal"
+        :return: the quoted error count or rate
+        """
+        name = argument.strip("\"").upper()
+        if ":EC:" in name:
+            return "\"{}\"".format(0 if "OMI" in name else 10 ** 3)
+        return "\"{:.4E}\"".format(0.0 if "OMI" in name else 1e-7)
+
+
+class PrologixAdapterResponder(ScpiResponder):
+    """
+    The Prologix GPIB to USB adapter and the GPIB bus behind it. "++" commands configure the adapter, anything else is
+    passed to the instrument at the current ++addr. In read-after-write mode (++auto 1) the reply of the instrument is
+    sent back right away, otherwise it is held until a "++read" command
+    """
+
+    termination = "\r\n"
+
+    def __init__(self):
+        ScpiResponder.__init__(self)
+        self.instruments = {}
+        self.settings = {"addr": "0", "mode": "1", "auto": "0", "eos": "0", "eoi": "1", "read_tmo_ms": "500"}
+        self._unread = None
+
+    def attach(self, instrument):
+        """
+        Put an instrument on the GPIB bus at its gpib_address, an instrument already at that address is kept
+        :return: the instrument on the bus at that address
+        """
+        instrument.bus = self
+        return self.instruments.setdefault(instrument.gpib_address, instrument)
+
+    def optical_power_dbm(self):
+        """
+        :return: the total optical power put out by the light sources on the bus in dBm, None if all of them are off
+        """
+        powers = [instrument.optical_output_dbm() for instrument in self.instruments.values()]
+        milliwatts = sum(10 ** (power / 10.0) for power in powers if power is not None)
+        if milliwatts == 0:
+            return None
+        return 10 * math.log10(milliwatts)
+
+    def handle(self, message):
+        message = message.strip()
+        if message.startswith("++"):
+            return self._adapter_command(message[2:])
+        instrument = self.instruments.get(int(self.settings["addr"]))
+        if instrument is None:
+            # nobody on the bus answers, the read will time out
+            return None
+        reply = instrument.handle(message.replace("\x1b", ""))
+        if self.settings["auto"] == "1":
+            return self._as_instrument_reply(instrument, reply)
+        self._unread = (instrument, reply)
+        return None
+
+    def _as_instrument_reply(self, instrument, reply):
+        """
+        The adapter replies with CR LF but the instrument's reply keeps the instrument's own termination
+        """
+        if reply is None or not isinstance(reply, str):
+            return reply
+        return (reply + instrument.termination).encode("ascii")
+
+    def _adapter_command(self, command):
+        name, _, argument = command.partition(" ")
+        name = name.strip().lower()
+        argument = argument.strip()
+        if name == "ver":
+            return "Prologix GPIB-USB Controller version 6.101 (simulated)"
+        if name == "read":
+            unread, self._unread = self._unread, None
+            if unread is None:
+                instrument = self.instruments.get(int(self.settings["addr"]))
+                return None if instrument is None else self._as_instrument_reply(instrument, instrument.handle(""))
+            return self._as_instrument_reply(*unread)
+        if name == "rst":
+            self.settings.update({"addr": "0", "mode": "1", "auto": "0", "eos": "0"})
+            return None
+        if name in self.settings:
+            if argument:
+                self.settings[name] = argument
+                return None
+            return self.settings[name]
+        # ++ifc, ++loc, ++llo, ++clr, ++trg... have no reply
+        return None
+
+
+class Newport835Responder(GpibInstrumentResponder):
+    """
+    A Newport 835 optical power meter. Commands are letters followed by their value and end in an X, an X on its own
+    (with the T4 setting) takes a power reading of the light of the sources on the same GPIB bus
+    """
+
+    termination = "\r\n"
+    gpib_address = 1
+    COMMAND = re.compile(r'(?P<header>[A-Z])(?P<argument>[+\-]?[0-9.]*)')
+
+    def __init__(self):
+        GpibInstrumentResponder.__init__(self)
+        self.registers.update({"W": "+1550", "G": "0", "A": "0", "R": "0", "T": "0"})
+
+    def handle(self, message):
+        message = message.strip()
+        if message.endswith("X"):
+            message = message[:-1]
+        if message == "":
+            return self._power_reading()
+        for match in self.COMMAND.finditer(message):
+            header, argument = match.group("header"), match.group("argument")
+            if header == "U":
+                return "WAVE" + self.registers["W"].lstrip("+")
+            self.registers[header] = argument
+        return None
+
+    def _power_reading(self):
+        dbm = self.bus.optical_power_dbm() if self.bus is not None else None
+        watts = 0.0 if dbm is None else 10 ** (dbm / 10.0) / 1000.0
+        if self.registers["A"] == "1":
+            watts /= 1000.0
+        reading = "{:+.4E}".format(max(0.0, self.noisy(watts, watts * 0.002 + 1e-12)))
+        return reading if self.registers["G"] == "1" else "PWR " + reading
+
+
+class AndoAQ4321DResponder(GpibInstrumentResponder, PrefixResponder):
+    """
+    An Ando AQ4321D tunable laser. It only takes commands after the password has been entered, and a sweep started
+    with TSGL runs for sweep_polls TSWEEP? queries
+    """
+
+    termination = "\r\n"
+    gpib_address = 24
+    identity = "ANDO,AQ4321D,0,1.00"
+
+    def __init__(self, sweep_polls=3):
+        GpibInstrumentResponder.__init__(self)
+        self.sweep_polls = sweep_polls
+        self._sweep_polls_left = 0
+        self.registers.update({"TWL": "1550.000", "TPDB": "-10.00", "L": "0"})
+        self.queries["INIT"] = lambda argument: "1" if self.registers.get("PASSWORD") == "4321" else "0"
+        self.queries["TSWEEP"] = self._sweep_status
+        self.commands["TSGL"] = self._start_sweep
+        self.commands["TSTP"] = lambda argument: self._stop_sweep()
+
+    def _start_sweep(self, argument):
+        self._sweep_polls_left = self.sweep_polls
+
+    def _stop_sweep(self):
+        self._sweep_polls_left = 0
+
+    def _sweep_status(self, argument):
+        """
+        :return: "TS" followed by 1 while sweeping and 0 when stopped
+        """
+        if self._sweep_polls_left > 0:
+            self._sweep_polls_left -= 1
+            return "TS1"
+        return "TS0"
+
+    def optical_output_dbm(self):
+        if self.registers.get("L") != "1":
+            return None
+        return float(self.registers["TPDB"])
+
+
+class XilinxVCU108Responder(ScpiResponder):
+    """
+    The UART console of the PETB firmware on a Xilinx VCU108. Commands are echoed back, and an eyescan streams one
+    "data;" row per vertical step and ends with END
+    """
+
+    termination = "\n"
+
+    def __init__(self):
+        ScpiResponder.__init__(self)
+        self.gpio = {}
+
+    def handle(self, message):
+        words = message.split()
+        if not words:
+            return None
+        echo = ["> " + message.strip()]
+        if words[:2] == ["petb", "eyescan"]:
+            return echo + self._eyescan(*[int(word) for word in words[2:8]])
+        if "gpio" in words[:2]:
+            return echo + self._gpio(words[0], words[2:])
+        if words[:2] == ["adc", "read"]:
+            return echo + ["0x{:03X}".format(self.random.randint(0x700, 0x900))]
+        return echo + ["OK"]
+
+    def _gpio(self, board, arguments):
+        action = arguments[0] if arguments else "list"
+        if action == "list":
+            return ["{} {}: {}".format(board, key, value) for key, value in sorted(self.gpio.items())] or ["none"]
+        key = " ".join(arguments[1:3])
+        if action == "read":
+            return [str(self.gpio.get(key, 0))]
+        if action == "set":
+            self.gpio[key] = 1
+        elif action == "clear":
+            self.gpio[key] = 0
+        elif action == "toggle":
+            self.gpio[key] = 1 - self.gpio.get(key, 0)
+        elif action == "write" and len(arguments) > 3:
+            self.gpio[key] = int(arguments[3])
+        return ["OK"]
+
+    def _eyescan(self, range_value=0, scale_factor=0, horizontal=127, vertical=512, drp=0, step=2):
+        """
+        :return: the lines of an eyescan of an open eye, error counts are 0 inside the eye and grow towards the edges
+        """
+        step = max(1, step)
+        rows = []
+        for y in range(-(vertical // step), vertical // step + 1):
+            row = []
+            for x in range(-(horizontal // step), horizontal // step + 1):
+                distance = (x * step / float(max(horizontal, 1))) ** 2 + (y * step / float(max(vertical, 1))) ** 2
+                row.append(0 if distance < 0.36 else int(100000 * (distance - 0.36)))
+            rows.append(",".join(str(value) for value in row) + ";")
+        return ["Eyescan started"] + rows + ["END"]
@@ -0,0 +1,62 @@
+import random
+
+
+class LatencyModel:
+    """
+    Decides how long a simulated instrument takes to move bytes over its connection.
+    Every command pays a fixed latency plus a random jitter, and every byte costs 1/throughput seconds on top of that,
+    so a chatty driver is slowed down the same way it would be on a slow serial or GPIB link.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, throughput=None, delay_scale=0.0, seed=None):
+        """
+        :param latency: seconds added to every write and to the first byte of every reply
+        :param jitter: the most seconds the latency is randomly moved up or down by
+        :param throughput: bytes per second the connection can carry, None for no limit
+        :param delay_scale: how much of the delay a driver asks for in query(message, delay) is actually waited,
+        0 skips those waits and 1 waits them out like the real instrument would need
+        :param seed: seed of the jitter so a simulated run can be repeated exactly
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.throughput = throughput
+        self.delay_scale = delay_scale
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_config(cls, simulation):
+        """
+        :param simulation: the "Simulation" object of a device in Devices.json, or None
+        :return: a LatencyModel with the settings given in the object, missing settings are left at their defaults
+        """
+        simulation = simulation if simulation is not None else {}
+        return cls(latency=simulation.get("Latency", 0.0),
+                   jitter=simulation.get("Jitter", 0.0),
+                   throughput=simulation.get("Throughput"),
+                   delay_scale=simulation.get("DelayScale", 0.0),
+                   seed=simulation.get("Seed"))
+
+    def round_trip_time(self):
+        """
+        :return: seconds before the first byte of a message gets through, latency with jitter applied
+        """
+        if self.jitter:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        return self.latency
+
+    def transfer_time(self, byte_count):
+        """
+        :return: seconds to push byte_count bytes through the connection once it is started
+        """
+        if not self.throughput:
+            return 0.0
+        return byte_count / float(self.throughput)
+
+    def query_delay(self, delay):
+        """
+        :param delay: the seconds a driver asked to wait between writing a query and reading its answer
+        :return: the seconds that are actually waited
+        """
+        if not delay:
+            return 0.0
+        return delay * self.delay_scale
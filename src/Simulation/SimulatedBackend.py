@@ -0,0 +1,57 @@
+from src.Simulation.InstrumentResponders import ScpiResponder, GpibInstrumentResponder, AgilentE3643AResponder, \
+    AgilentDSO7000AResponder, AnritsuMP2100AResponder, PrologixAdapterResponder, Newport835Responder, \
+    AndoAQ4321DResponder, XilinxVCU108Responder
+from src.Simulation.LatencyModel import LatencyModel
+from src.Simulation.SimulatedLogicAnalyzer import SimulatedLogicAnalyzer
+
+# The responder playing the instrument of each driver. Drivers not listed here get a generic SCPI instrument, which
+# answers *IDN? so the driver still connects
+RESPONDERS = {
+    "Agilent_E3643A": AgilentE3643AResponder,
+    "Agilent_DSO7000A": AgilentDSO7000AResponder,
+    "Anritsu_MP2100A": AnritsuMP2100AResponder,
+    "Xilinx_VCU108": XilinxVCU108Responder,
+    "Prologix_GPIBtoUSBController": None,
+    "Newport_835": Newport835Responder,
+    "Ando_AQ4321D": AndoAQ4321DResponder,
+}
+
+# Drivers that talk to a COM object instead of a VISA resource, and the simulated object they get
+DIRECT_SIMULATORS = {
+    "Agilent_16802A": SimulatedLogicAnalyzer,
+}
+
+# The Prologix adapters opened so far by address. Every device in Devices.json on the same port shares one adapter,
+# and so one GPIB bus, like they would on the bench
+_gpib_adapters = {}
+
+
+def open_simulated_connection(driver_name, address, simulation=None):
+    """
+    Make the connection object a driver is constructed with, for a device with "Type": "SIM" in Devices.json
+    :param driver_name: the name of the driver file of the device
+    :param address: the "Default" address of the device
+    :param simulation: the "Simulation" settings of the device (Latency, Jitter, Throughput, DelayScale, Seed) or None
+    :return: a SimulatedResource, or the simulated COM object for drivers that do not use PyVISA
+    """
+    # imported here because it needs pyvisa, which the simulated COM objects do not
+    from src.Simulation.SimulatedResource import SimulatedResource
+    latency_model = LatencyModel.from_config(simulation)
+    if driver_name in DIRECT_SIMULATORS:
+        return DIRECT_SIMULATORS[driver_name](address, latency_model)
+
+    responder_class = RESPONDERS.get(driver_name, ScpiResponder)
+    if responder_class is None or issubclass(responder_class, GpibInstrumentResponder):
+        responder = _gpib_adapters.setdefault(address, PrologixAdapterResponder())
+        if responder_class is not None:
+            responder.attach(responder_class())
+    else:
+        responder = responder_class()
+    return SimulatedResource(address, responder, latency_model)
+
+
+def reset_simulated_buses():
+    """
+    Forget the state of every simulated GPIB bus, so the next connection starts with instruments at power on
+    """
+    _gpib_adapters.clear()
@@ -0,0 +1,114 @@
+import math
+import time
+
+# Bus signal types, as in the AgtBusSignal* constants of the Agilent logic analyzer COM library
+BUS_SIGNAL_PROBED = 0
+BUS_SIGNAL_TIME = 3
+
+
+class SimulatedSampleData:
+    """
+    The sample data of one bus from the last capture, shaped like the ISampleBusSignalData COM interface
+    """
+
+    Type = "Sample"
+
+    def __init__(self, values, sample_period):
+        self.values = values
+        self.StartSample = -(len(values) // 2)
+        self.EndSample = len(values) - len(values) // 2 - 1
+        self.StartTime = self.StartSample * sample_period
+        self.EndTime = self.EndSample * sample_period
+
+    def GetDataByTime(self, start_time, end_time, bus_type):
+        """
+        :return: a tuple holding the samples as a string with one character per sample, like the COM library
+        """
+        return "".join(chr(value) for value in self.values), len(self.values)
+
+
+class SimulatedBusSignal:
+    def __init__(self, name, bit_size, analyzer):
+        self.Name = name
+        self.BitSize = bit_size
+        self.BytesSize = int(math.ceil(bit_size / 8.0))
+        self.BusSignalType = BUS_SIGNAL_PROBED
+        self._analyzer = analyzer
+
+    @property
+    def BusSignalData(self):
+        """
+        :return: a counter pattern captured at the time of the last Run, masked to the width of the bus
+        """
+        mask = (1 << min(self.BitSize, 8)) - 1
+        start = self._analyzer.run_count * 7
+        values = [(start + i) & mask for i in range(self._analyzer.sample_count)]
+        return SimulatedSampleData(values, self._analyzer.sample_period)
+
+
+class SimulatedBusSignals:
+    def __init__(self, buses):
+        self._buses = buses
+        self.Count = len(buses)
+
+    def Item(self, index):
+        return self._buses[index]
+
+
+class SimulatedModule:
+    def __init__(self, name, buses):
+        self.Name = name
+        self.BusSignals = SimulatedBusSignals(buses)
+
+
+class SimulatedLogicAnalyzer:
+    """
+    An in-process stand in for the Agilent 16800 series logic analyzer COM object returned by
+    AgtLA.Connect.GetInstrument, with one module capturing a counter on a few buses
+    """
+
+    def __init__(self, IP, latency_model=None, sample_count=1024, sample_period=4e-9):
+        """
+        :param IP: the address the analyzer would be at
+        :param latency_model: the LatencyModel of the connection, every COM call pays its round trip time
+        :param sample_count: the number of samples in every capture
+        :param sample_period: the seconds between samples
+        """
+        self.IP = IP
+        self.latency_model = latency_model
+        self.sample_count = sample_count
+        self.sample_period = sample_period
+        self.run_count = 0
+        self.config_path = None
+        self._modules = [SimulatedModule("My 16950A-1", [SimulatedBusSignal("Time", 64, self),
+                                                         SimulatedBusSignal("My Bus 1", 8, self),
+                                                         SimulatedBusSignal("My Bus 2", 16, self)])]
+
+    def _round_trip(self):
+        if self.latency_model is not None:
+            time.sleep(self.latency_model.round_trip_time())
+
+    def IsOnline(self):
+        self._round_trip()
+        return True,
+
+    def Open(self, path):
+        self._round_trip()
+        self.config_path = path
+
+    def Modules(self, index):
+        return self._modules[index]
+
+    def GetModuleByName(self, name):
+        for module in self._modules:
+            if module.Name == name:
+                return module
+        raise Exception("No module named " + name)
+
+    def Run(self):
+        self._round_trip()
+        self.run_count += 1
+
+    def WaitComplete(self, timeout):
+        self._round_trip()
+        return True
@@ -0,0 +1,220 @@
+import collections
+import itertools
+import time
+
+from pyvisa import constants
+from pyvisa.errors import VisaIOError
+from pyvisa.highlevel import ResourceInfo
+
+from src.Simulation.LatencyModel import LatencyModel
+
+# every opened resource gets its own session number, like a real VISA session
+_sessions = itertools.count(1)
+
+
+class SimulatedResource:
+    """
+    An in-process stand in for a PyVISA message based resource. It has the parts of the PyVISA resource interface the
+    drivers use (write, read, query, read_bytes, read_raw, bytes_in_buffer...), and hands every command written to it
+    to a responder that plays the part of the instrument.
+    Replies are not readable until the latency model says they would have arrived, so a simulated run takes about as
+    long as the real one would and the effect of sending fewer commands can be measured without the hardware.
+    The number of writes, reads and bytes moved are counted so benchmarks can report them.
+    """
+
+    def __init__(self, resource_name, responder, latency_model=None, timeout=2000):
+        """
+        :param resource_name: the address the resource was opened with, as written in Devices.json
+        :param responder: the object answering the commands, see InstrumentResponders
+        :param latency_model: the LatencyModel of the connection, None for an instant connection
+        :param timeout: the VISA timeout of reads in milliseconds
+        """
+        self.resource_name = resource_name
+        self.responder = responder
+        self.latency_model = latency_model if latency_model is not None else LatencyModel()
+        self.timeout = timeout
+        self.read_termination = responder.termination
+        self.write_termination = "\r\n"
+        self.encoding = "ascii"
+        self.session = next(_sessions)
+        self.resource_info = (ResourceInfo(constants.InterfaceType.unknown, 0, "INSTR", resource_name,
+                                           "SIM " + resource_name),)
+
+        self.write_count = 0
+        self.read_count = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+        # replies waiting to "arrive" as (time it is readable, bytes) and the bytes that have arrived
+        self._scheduled = collections.deque()
+        self._received = bytearray()
+        self._line_free_at = 0.0
+
+    def __enter__(self):
+        """
+        Enter method for ability to use "with open" statements
+        :return: Class Object
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _check_open(self):
+        if self.session is None:
+            raise VisaIOError(constants.StatusCode.error_invalid_object)
+
+    def _schedule_reply(self, reply):
+        """
+        Queue the reply of the responder, it becomes readable after the round trip time plus the time it takes to
+        transfer it. A reply given as a list of lines streams in one line at a time.
+        """
+        if reply is None:
+            return
+        if isinstance(reply, (str, bytes)):
+            reply = [reply]
+        ready = max(time.time(), self._line_free_at) + self.latency_model.round_trip_time()
+        for part in reply:
+            if isinstance(part, str):
+                part = (part + self.responder.termination).encode(self.encoding)
+            ready += self.latency_model.transfer_time(len(part))
+            self._scheduled.append((ready, part))
+        self._line_free_at = ready
+
+    def _receive(self):
+        """
+        Move every scheduled reply that has arrived by now into the receive buffer
+        """
+        now = time.time()
+        while self._scheduled and self._scheduled[0][0] <= now:
+            self._received.extend(self._scheduled.popleft()[1])
+
+    def _wait_for(self, arrived):
+        """
+        Wait until arrived() is true of the receive buffer, like a VISA read blocking until its data comes in
+        :param arrived: a function of no arguments checking the receive buffer
+        """
+        deadline = time.time() + self.timeout / 1000.0
+        self._receive()
+        while not arrived():
+            if not self._scheduled:
+                # nothing more will ever arrive, so there is no point in waiting out the timeout
+                raise VisaIOError(constants.StatusCode.error_timeout)
+            wait = self._scheduled[0][0] - time.time()
+            if time.time() + wait > deadline:
+                time.sleep(max(0.0, deadline - time.time()))
+                raise VisaIOError(constants.StatusCode.error_timeout)
+            time.sleep(max(0.0, wait))
+            self._receive()
+
+    def _take(self, count):
+        data = bytes(self._received[:count])
+        del self._received[:count]
+        self.read_count += 1
+        self.bytes_read += len(data)
+        return data
+
+    @property
+    def bytes_in_buffer(self):
+        """
+        :return: the number of bytes that have arrived and not been read yet
+        """
+        self._check_open()
+        self._receive()
+        return len(self._received)
+
+    def write_raw(self, message):
+        """
+        Send bytes to the simulated instrument
+        :param message: the bytes to send
+        :return: the number of bytes written
+        """
+        self._check_open()
+        time.sleep(self.latency_model.round_trip_time() + self.latency_model.transfer_time(len(message)))
+        self.write_count += 1
+        self.bytes_written += len(message)
+        text = message.decode(self.encoding, errors="replace")
+        for termination in (self.write_termination, "\r\n", "\n"):
+            if termination and text.endswith(termination):
+                text = text[:-len(termination)]
+                break
+        self._schedule_reply(self.responder.handle(text))
+        return len(message)
+
+    def write(self, message, termination=None, encoding=None):
+        """
+        Send a command to the simulated instrument
+        :param message: the command
+        :param termination: the characters added to the end of the command, defaults to write_termination
+        :param encoding: the encoding of the command, defaults to encoding
+        :return: the number of bytes written
+        """
+        termination = self.write_termination if termination is None else termination
+        return self.write_raw((message + (termination or "")).encode(encoding or self.encoding))
+
+    def read_bytes(self, count, chunk_size=None, break_on_termchar=False):
+        """
+        :param count: the number of bytes to read
+        :param chunk_size: ignored, accepted to match PyVISA
+        :param break_on_termchar: stop at the end of a line even if fewer than count bytes were read
+        :return: the bytes read
+        """
+        self._check_open()
+        termination = (self.read_termination or self.responder.termination).encode(self.encoding)
+
+        def arrived():
+            return len(self._received) >= count or (break_on_termchar and termination in self._received)
+        self._wait_for(arrived)
+        if break_on_termchar and termination in self._received[:count]:
+            count = self._received.find(termination) + len(termination)
+        return self._take(count)
+
+    def read_raw(self, size=None):
+        """
+        :param size: the most bytes to read, None for everything that has arrived
+        :return: the bytes of the next reply that arrived
+        """
+        self._check_open()
+        self._wait_for(lambda: len(self._received) > 0)
+        return self._take(len(self._received) if size is None else size)
+
+    def read(self, termination=None, encoding=None):
+        """
+        Read a reply up to and including its termination characters, which are removed
+        :param termination: the characters ending the reply, defaults to read_termination
+        :param encoding: the encoding of the reply, defaults to encoding
+        :return: the reply as a string
+        """
+        self._check_open()
+        termination = termination or self.read_termination
+        end_of_message = (termination or self.responder.termination).encode(self.encoding)
+        self._wait_for(lambda: end_of_message in self._received)
+        end = self._received.find(end_of_message)
+        data = self._take(end + len(end_of_message)).decode(encoding or self.encoding, errors="replace")
+        if termination:
+            data = data[:-len(termination)]
+        return data
+
+    def query(self, message, delay=None):
+        """
+        Write a command and read its reply
+        :param message: the command
+        :param delay: seconds to wait between the write and the read, scaled by the delay scale of the latency model
+        :return: the reply as a string
+        """
+        self.write(message)
+        wait = self.latency_model.query_delay(delay)
+        if wait:
+            time.sleep(wait)
+        return self.read()
+
+    def clear(self):
+        """
+        Throw away every reply that has not been read yet
+        """
+        self._scheduled.clear()
+        self._received.clear()
+
+    def close(self):
+        self.clear()
+        self.session = None
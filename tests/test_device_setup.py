@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# connects a device that answers and one whose bus never finishes opening, then exits
+HANGING_BUS = """
+import contextlib
+import sys
+import threading
+sys.modules.setdefault("wx", None)
+
+from src.Benchmarks.QueueBenchmark import isolated_results
+from src.GUI.Application.HardwareManager import HardwareManager
+from src.GUI.RunAConfigFile.DeviceSetup import DeviceSetup
+
+connect_device = DeviceSetup.connect_device
+get_hardware_object = HardwareManager.get_hardware_object
+
+
+def hanging_connect_device(self, device_key, device_config, driver_class):
+    if device_key == "Newport OPM":
+        threading.Event().wait()
+    return connect_device(self, device_key, device_config, driver_class)
+
+
+def short_timeout(self, name):
+    device_config = get_hardware_object(self, name)
+    device_config.connect_timeout = 0.5
+    return device_config
+
+
+DeviceSetup.connect_device = hanging_connect_device
+HardwareManager.get_hardware_object = short_timeout
+with isolated_results(sys.argv[1]), contextlib.ExitStack() as exit_stack:
+    print(DeviceSetup().connect_devices(["Voltage_Source", "Newport OPM"], exit_stack))
+"""
+
+
+def test_abandoned_bus_does_not_block_exit(tmp_path):
+    process = subprocess.run([sys.executable, "-c", HANGING_BUS, str(tmp_path)], cwd=ROOT, capture_output=True,
+                             text=True, timeout=30)
+    assert process.returncode == 0, process.stderr
+    assert "Newport OPM: did not connect within 0.5 s" in process.stdout
+    assert process.stdout.rstrip().endswith("None")
@@ -0,0 +1,9 @@
+from src.Benchmarks.ImportTimeBudget import check_budget
+
+
+def test_headless_startup_within_budget():
+    report = check_budget()
+    assert not report["deferred_imported"], "imported at startup but should only load on first use: " + \
+        ", ".join(report["deferred_imported"])
+    assert report["milliseconds"] <= report["budget"], "{:.1f} ms importing, the budget is {:.1f} ms".format(
+        report["milliseconds"], report["budget"])
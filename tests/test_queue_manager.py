@@ -0,0 +1,96 @@
+import json
+import os
+import sys
+
+import pytest
+
+# the queue manager does not need the GUI, so the tests run without wxPython
+sys.modules.setdefault("wx", None)
+
+from src.GUI.Application.QueueManager import QueueManager
+from src.GUI.Model.ConfigCache import config_cache
+from src.GUI.Model.ExperimentQueue import ExperimentQueue
+from src.GUI.Util.CONSTANTS import CONFIGS
+
+
+def test_read_legacy_text_queue(tmp_path):
+    queue_file = tmp_path / "Legacy_Queue"
+    queue_file.write_text("*Eyescan_Tcl\n"
+                          "3 // Lanes\n"
+                          "1.5 // Scale\n"
+                          "2.5m // Dwell\n"
+                          "*Bert_Tcl\n"
+                          "7 // Lanes\n")
+    queue_manager = QueueManager.__new__(QueueManager)
+    experiments = queue_manager.read_queue_from_file(str(queue_file))
+    assert len(experiments) == 2
+    assert experiments[0].config.data["Lanes"] == 3
+    assert experiments[0].config.data["Scale"] == 1.5
+    assert experiments[0].config.data["Dwell"] == 0.0025
+    assert experiments[1].config.data["Lanes"] == 7
+
+
+def test_read_legacy_text_queue_single_experiment(tmp_path):
+    queue_file = tmp_path / "Legacy_Queue"
+    queue_file.write_text("*Eyescan_Tcl\n"
+                          "1 // A\n"
+                          "2 // B\n"
+                          "3 // C\n")
+    queue_manager = QueueManager.__new__(QueueManager)
+    experiments = queue_manager.read_queue_from_file(str(queue_file))
+    assert len(experiments) == 1
+    assert experiments[0].config.data["C"] == 3
+
+
+def saved_queue(tmp_path):
+    queue_manager = QueueManager.__new__(QueueManager)
+    queue_manager.experiment_queue = ExperimentQueue()
+    changed = config_cache.experiment(os.path.join(CONFIGS, "Voltage_Accuracy_Test.json"))
+    changed.config.data["Start_Voltage"] = 2
+    changed.config.data["Final_Voltage"] = 3.0
+    changed.config.data["Step_Voltage"] = 0.25
+    changed.config.data["Label"] = "run 1"
+    del changed.config.data["Oscilloscope_Channel"]
+    queue_manager.add_to_queue(changed)
+    queue_manager.add_to_queue(config_cache.experiment(os.path.join(CONFIGS, "Voltage_Accuracy_Test.json")))
+    queue_manager.add_to_queue(config_cache.experiment(os.path.join(CONFIGS, "Eyescan_Tcl.json")))
+    folder = tmp_path / "queues"
+    folder.mkdir()
+    queue_manager.save_queue_to_file(str(folder), "Round_Trip")
+    return queue_manager, str(folder / "Saved_Queue_Round_Trip")
+
+
+def test_saved_queue_round_trip(tmp_path):
+    queue_manager, path = saved_queue(tmp_path)
+    experiments = queue_manager.read_queue_from_file(path)
+    assert len(experiments) == 3
+
+    changed = dict(experiments[0].config.data)
+    assert changed == {"Start_Voltage": 2, "Final_Voltage": 3.0, "Step_Voltage": 0.25, "Label": "run 1"}
+    assert type(changed["Start_Voltage"]) is int
+    assert type(changed["Final_Voltage"]) is float
+    assert type(changed["Label"]) is str
+
+    unchanged = dict(experiments[1].config.data)
+    assert unchanged == {"Start_Voltage": 1, "Final_Voltage": 3, "Step_Voltage": 0.5, "Oscilloscope_Channel": 1}
+    assert type(unchanged["Final_Voltage"]) is int
+    assert dict(experiments[2].config.data)["pattern"] == "Fast Clk"
+
+    # only what each experiment changed is saved with it
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved["queue"][0]["data"] == {"Start_Voltage": 2, "Final_Voltage": 3.0, "Step_Voltage": 0.25,
+                                         "Label": "run 1"}
+    assert saved["queue"][0]["removed"] == ["Oscilloscope_Channel"]
+    assert saved["queue"][1] == {"config": "Voltage_Accuracy_Test", "data": {}}
+
+
+def test_saved_queue_unsupported_version(tmp_path):
+    queue_manager, path = saved_queue(tmp_path)
+    with open(path) as f:
+        saved = json.load(f)
+    saved["version"] = 99
+    with open(path, "w") as f:
+        json.dump(saved, f)
+    with pytest.raises(ValueError):
+        queue_manager.read_queue_from_file(path)
@@ -0,0 +1,93 @@
+import contextlib
+import io
+import json
+import os
+import sys
+
+# the queue runs without the GUI, so the tests run without wxPython
+sys.modules.setdefault("wx", None)
+
+from src.Benchmarks.QueueBenchmark import config_path, isolated_results
+from src.GUI import RunAConfigFileMain
+from src.GUI.Application.QueueRunner import QueueRunner
+from src.GUI.Model.ExperimentModel import Experiment
+from src.GUI.Model.ExperimentQueue import ExperimentQueue
+
+
+def build_queue():
+    """
+    :return: a queue that runs at positions 0 to 2 a sweep of three points, at 3 and 4 a block of two Tcl experiments
+    and at 5 an experiment with simulated devices
+    """
+    queue = ExperimentQueue()
+    queue.add_to_queue(Experiment(config_path("Fake_Voltage_Accuracy_Test.json")))
+    sweep = Experiment(config_path("Parameter_Sweep.json"))
+    sweep.config.data.update({"Sweep": "Levels=[2, 3, 4]", "Mode": "grid", "Order": "logical", "Costs": ""})
+    queue.add_to_queue(sweep)
+    queue.add_to_queue(Experiment(config_path("Initialize_VCU108_Tcl.json")))
+    queue.add_to_queue(Experiment(config_path("Close_VCU108_Tcl.json")))
+    queue.add_to_queue(Experiment(config_path("Voltage_Accuracy_Test.json")))
+    return queue
+
+
+@contextlib.contextmanager
+def recorded_runs(monkeypatch, fail=lambda data: False):
+    """
+    Record the data of every experiment run (the Tcl block as one), and the first result number of every Tcl block
+    :param fail: called with the data of an experiment, the experiment fails if it returns True
+    """
+    runs = []
+    tcl_start_indexes = []
+    main = RunAConfigFileMain.main
+    run_tcl_tests = QueueRunner.run_tcl_tests
+
+    def recording_main(args, *other_args, **kwargs):
+        with open(args[args.index("-c") + 1]) as f:
+            data = json.load(f).get("data") or {}
+        runs.append(data)
+        if fail(data):
+            raise RuntimeError("interrupted")
+        return main(args, *other_args, **kwargs)
+
+    def recording_run_tcl_tests(self, experiments, start_index=0):
+        tcl_start_indexes.append(start_index)
+        return run_tcl_tests(self, experiments, start_index)
+
+    monkeypatch.setattr(RunAConfigFileMain, "main", recording_main)
+    monkeypatch.setattr(QueueRunner, "run_tcl_tests", recording_run_tcl_tests)
+    yield runs, tcl_start_indexes
+
+
+def test_resume_skips_completed_experiments(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    with isolated_results(directory) as config_manager, contextlib.redirect_stdout(io.StringIO()):
+        queue_manager = config_manager.get_queue_manager()
+
+        # the second point of the sweep and the Tcl block fail, the rest of the queue still runs
+        def fail(data):
+            return data.get("Levels") == 3 or "Tcl_Scripts" in data
+
+        with recorded_runs(monkeypatch, fail) as (runs, tcl_start_indexes):
+            first = queue_manager.run_queue(build_queue(), continue_on_error=True, wait=True)
+        assert len(runs) == 5
+        assert tcl_start_indexes == [3]
+        assert first.checkpoint.completed == {0, 2, 5}
+        assert first.checkpoint.run_count == 6
+        first_results = list(first.queue_result.get_experiment_results_list())
+        monkeypatch.undo()
+
+        with recorded_runs(monkeypatch) as (runs, tcl_start_indexes):
+            resumed = queue_manager.resume_queue(first.checkpoint.queue_result_name, continue_on_error=True,
+                                                 wait=True)
+        # only the failed sweep point and the Tcl block are run again
+        assert [data.get("Levels") for data in runs if "Tcl_Scripts" not in data] == [3]
+        assert sum("Tcl_Scripts" in data for data in runs) == 1
+        # the Tcl results are numbered after the ones of the first run
+        assert tcl_start_indexes == [7]
+        assert not resumed.failures
+        assert not os.path.exists(resumed.checkpoint.get_path())
+
+        results = list(resumed.queue_result.get_experiment_results_list())
+        assert set(first_results) <= set(results)
+        assert len(results) == len(first_results) + 2
+        assert len(set(results)) == len(results)
@@ -0,0 +1,44 @@
+from src.GUI.Model.ResultsCatalog import ResultsCatalog
+
+
+def make_catalog(tmp_path):
+    catalog = ResultsCatalog(str(tmp_path / "catalog.sqlite"))
+    catalog.add_finished_runs([
+        ("Eyescan_Tcl_1", {"name": "Eyescan_Tcl", "data": {"Label": "rise AND fall"}}, "results/1",
+         "2020-01-31 23:59:59.500000", "2020-02-01 00:00:10", [], "queue 1"),
+        ("Eyescan_Tcl_2", {"name": "Eyescan_Tcl", "data": {"Label": "rise"}}, "results/2",
+         "2020-02-01 09:30:00.250000", "2020-02-01 09:31:00", [], "queue 1"),
+        ("Eyescan_Tcl_3", {"name": "Eyescan_Tcl", "data": {"Label": "fall"}}, "results/3",
+         "2020-02-02 00:00:00", "2020-02-02 00:01:00", [], "queue 2"),
+    ])
+    return catalog
+
+
+def names(runs):
+    return sorted(run["name"] for run in runs)
+
+
+def test_quoted_value_keeps_and(tmp_path):
+    assert ResultsCatalog.parse_search('Label="rise AND fall" and name=Eyescan_Tcl') == [
+        ("Label", "=", "rise AND fall"), ("name", "=", "Eyescan_Tcl")]
+    catalog = make_catalog(tmp_path)
+    try:
+        assert names(catalog.search('Label="rise AND fall"')) == ["Eyescan_Tcl_1"]
+        assert names(catalog.search("Label='rise AND fall' AND queue='queue 1'")) == ["Eyescan_Tcl_1"]
+    finally:
+        catalog.close()
+
+
+def test_date_matches_the_whole_day(tmp_path):
+    catalog = make_catalog(tmp_path)
+    try:
+        assert names(catalog.search("date=2020-02-01")) == ["Eyescan_Tcl_2"]
+        assert names(catalog.search("date!=2020-02-01")) == ["Eyescan_Tcl_1", "Eyescan_Tcl_3"]
+        assert names(catalog.search("date>2020-02-01")) == ["Eyescan_Tcl_3"]
+        assert names(catalog.search("date>=2020-02-01")) == ["Eyescan_Tcl_2", "Eyescan_Tcl_3"]
+        assert names(catalog.search("date<2020-02-01")) == ["Eyescan_Tcl_1"]
+        assert names(catalog.search("date<=2020-02-01")) == ["Eyescan_Tcl_1", "Eyescan_Tcl_2"]
+        assert names(catalog.search("end=2020-02-01")) == ["Eyescan_Tcl_1", "Eyescan_Tcl_2"]
+        assert names(catalog.search('start="2020-02-01 09:30"')) == ["Eyescan_Tcl_2"]
+    finally:
+        catalog.close()
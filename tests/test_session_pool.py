@@ -0,0 +1,57 @@
+import sys
+import threading
+
+# the session pool does not need the GUI, so the tests run without wxPython
+sys.modules.setdefault("wx", None)
+
+from src.GUI.Model.HardwareModel import HardwareModel
+from src.GUI.RunAConfigFile.DeviceSetup import DeviceSetup
+from src.GUI.RunAConfigFile.SessionPool import SessionPool
+from src.Simulation.SimulatedBackend import reset_simulated_buses
+
+
+def connect(device_setup, pool, device_key, driver, address):
+    device_config = HardwareModel(driver, "SIM", address)
+    driver_object, reason = device_setup.connect_device(
+        device_key, device_config, device_setup.load_driver_class(driver, [driver]))
+    assert driver_object is not None, reason
+    pool.add(device_key, pool.signature(device_config, True), driver_object, device_setup.resources[device_key],
+             device_setup.bus_of(device_config))
+    return driver_object
+
+
+def test_keepalive_waits_for_devices_on_the_same_bus():
+    reset_simulated_buses()
+    device_setup = DeviceSetup()
+    pool = SessionPool()
+    try:
+        connect(device_setup, pool, "Newport OPM", "Newport_835", "COM16")
+        laser = connect(device_setup, pool, "Laser Source", "Ando_AQ4321D", "COM16")
+        # the power meter is idle while an experiment polls the laser behind the same adapter
+        pool.release("Newport OPM")
+        polls = []
+        stop = threading.Event()
+
+        def keepalive():
+            while not stop.is_set():
+                pool.check_idle_sessions(0)
+
+        monitor = threading.Thread(target=keepalive)
+        monitor.start()
+        try:
+            for _ in range(100):
+                polls.append(laser.check_connected())
+        finally:
+            stop.set()
+            monitor.join()
+        assert all(polls)
+        assert device_setup.resources["Newport OPM"].reconnects == 0
+        assert device_setup.resources["Laser Source"].reconnects == 0
+
+        # once nothing on the bus is in use the power meter is checked
+        pool.release("Laser Source")
+        last_used = device_setup.resources["Newport OPM"].last_used
+        pool.check_idle_sessions(0)
+        assert device_setup.resources["Newport OPM"].last_used > last_used
+    finally:
+        pool.close()
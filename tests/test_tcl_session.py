@@ -0,0 +1,36 @@
+import shutil
+
+import pytest
+
+from src.GUI.Application.TclSession import TclSession, TclSessionError
+
+pytestmark = pytest.mark.skipif(shutil.which("tclsh") is None, reason="tclsh stands in for Vivado")
+
+
+def write_script(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_run_streams_output_and_reports_errors(tmp_path):
+    session = TclSession("tclsh")
+    try:
+        output = []
+        session.run(write_script(tmp_path, "first.tcl", "set kept 41\nputs \"line 1\"\nputs \"line 2\"\n"),
+                    on_output=output.append, timeout=10)
+        assert output == ["line 1", "line 2"]
+
+        output = []
+        with pytest.raises(TclSessionError, match="boom"):
+            session.run(write_script(tmp_path, "fail.tcl", "puts \"before\"\nerror \"boom\"\n"),
+                        on_output=output.append, timeout=10)
+        assert output == ["before"]
+
+        # the session carries on after an error, with the variables of the earlier scripts
+        output = []
+        session.run(write_script(tmp_path, "next.tcl", "puts [expr {$kept + 1}]\n"), on_output=output.append,
+                    timeout=10)
+        assert output == ["42"]
+    finally:
+        session.close()